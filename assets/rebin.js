@@ -0,0 +1,89 @@
+// Client-side re-binning of the return histograms
+// Every FIND sends each series once as sorted float32 values in percent
+// (base64, see hist_util.encode_sorted). Bin width, range and σ lines are
+// then redrawn here from that array without a round trip to the server.
+(function () {
+    var decoded = [];  // last few {b64, values, mean, std}, one per panel
+
+    function decode(b64) {
+        for (var j = 0; j < decoded.length; j++) {
+            if (decoded[j].b64 === b64) {
+                return decoded[j];
+            }
+        }
+        var raw = atob(b64);
+        var bytes = new Uint8Array(raw.length);
+        for (var i = 0; i < raw.length; i++) {
+            bytes[i] = raw.charCodeAt(i);
+        }
+        var values = new Float32Array(bytes.buffer);
+        // Mean and sample std over the whole series, as on the server
+        var n = values.length, sum = 0, m2 = 0;
+        for (i = 0; i < n; i++) {
+            sum += values[i];
+        }
+        var mean = n ? sum / n : NaN;
+        for (i = 0; i < n; i++) {
+            m2 += (values[i] - mean) * (values[i] - mean);
+        }
+        var series = {b64: b64, values: values, mean: mean, std: n > 1 ? Math.sqrt(m2 / (n - 1)) : NaN};
+        decoded = [series].concat(decoded.slice(0, 5));
+        return series;
+    }
+
+    function lowerBound(values, x) {
+        // First position whose value is >= x
+        var lo = 0, hi = values.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >>> 1;
+            if (values[mid] < x) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        return lo;
+    }
+
+    function rebin(b64, width, lo, hi, sigmas, figure) {
+        var noUpdate = window.dash_clientside.no_update;
+        if (!b64 || !figure || !figure.data || !figure.data.length) {
+            return noUpdate;
+        }
+        width = Number(width);
+        lo = Number(lo);
+        hi = Number(hi);
+        if (!(width > 0) || !(hi > lo)) {
+            return noUpdate;
+        }
+        var series = decode(b64);
+        // Same [start, end) bins as hist_util.bin_counts, capped to keep the browser responsive
+        var nBins = Math.min(Math.round((hi - lo) / width), 5000);
+        var x = new Array(nBins), y = new Array(nBins);
+        var below = lowerBound(series.values, lo);
+        for (var i = 0; i < nBins; i++) {
+            var edge = lowerBound(series.values, lo + (i + 1) * width);
+            x[i] = lo + (i + 0.5) * width;
+            y[i] = edge - below;
+            below = edge;
+        }
+
+        var shapes = [];
+        if (isFinite(series.std)) {
+            (sigmas || []).forEach(function (k) {
+                [series.mean - k * series.std, series.mean + k * series.std].forEach(function (edge) {
+                    shapes.push({type: 'line', xref: 'x', yref: 'paper', x0: edge, x1: edge, y0: 0, y1: 1,
+                                 line: {width: 1, dash: 'dash', color: '#ff933b'}, opacity: 0.6});
+                });
+            });
+        }
+
+        var trace = Object.assign({}, figure.data[0], {x: x, y: y});
+        var layout = Object.assign({}, figure.layout, {shapes: shapes});
+        return Object.assign({}, figure, {data: [trace].concat(figure.data.slice(1)), layout: layout});
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        volApp: Object.assign({}, (window.dash_clientside || {}).volApp, {rebin: rebin})
+    });
+})();
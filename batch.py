@@ -0,0 +1,175 @@
+"""
+Headless return statistics for a universe of symbols (no Dash or Plotly imports).
+
+    python batch.py universe.txt --output stats.parquet
+    python batch.py universe.txt --start 2018-01-01 --interval 1d --workers 8 --output stats.json
+
+The universe file lists one or more symbols per line (comma or space
+separated, '#' starts a comment). Prices are fetched in batches into the
+local store, then the close, high-low and open-close statistics of every
+symbol are computed on a process pool and written to one table, one row
+per symbol. Symbols that fail get a row with the error message.
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import config
+from estimator_util import ESTIMATORS, estimator_terms, full_volatility, term_sums
+from provider_util import get_provider
+from stats_util import return_stats
+from store_util import read_range, read_records, split_symbols, store_gaps, update_store
+from stream_util import SERIES, chunk_series
+
+STAT_FIELDS = ('count', 'mean', 'std', 'pos_count', 'pos_mean', 'pos_perc', 'neg_count', 'neg_mean', 'neg_perc')
+
+
+def read_universe(path):
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            symbols += split_symbols(line.split('#', 1)[0])
+    # Keep the file order, drop repeats
+    return list(dict.fromkeys(symbols))
+
+
+def _frame_fetch(frame):
+    # update_store fetch function answering from an already downloaded frame
+    def fetch(symbol, start, end, interval):
+        return frame[(frame.index >= start) & (frame.index < end)]
+    return fetch
+
+
+def fetch_batch(symbols, start, end, interval, store_dir=None):
+    """
+    Bring the stored history of a batch of symbols up to date, fetching only
+    the head/tail gaps of each. Symbols missing the same range (usually the
+    same last few days) share one batched provider request per chunk of it.
+    Returns {symbol: error message}.
+    """
+    gaps = {s: store_gaps(s, start, end, interval, store_dir) for s in symbols}
+    gaps = {s: ranges for s, ranges in gaps.items() if ranges}
+    if not gaps or config.OFFLINE:
+        return {}
+    by_range = {}
+    for s, ranges in gaps.items():
+        for gap in ranges:
+            by_range.setdefault(gap, []).append(s)
+
+    provider = get_provider()
+    parts = {s: [] for s in gaps}
+    errors = {}
+    for (lo, hi), group in by_range.items():
+        for chunk_lo, chunk_hi in provider.chunk_ranges(pd.Timestamp(lo), pd.Timestamp(hi), interval):
+            try:
+                frames = provider.fetch_many(group, chunk_lo, chunk_hi, interval)
+            except Exception as e:
+                errors.update({s: f"fetch failed: {e}" for s in group})
+                break
+            for s in group:
+                parts[s].append(frames.get(s))
+    for s in gaps:
+        if s in errors:
+            continue
+        frames = [f for f in parts[s] if f is not None and not f.empty]
+        if frames:
+            # update_store merges the gaps into the stored history under its lock
+            update_store(s, start, end, interval, fetch=_frame_fetch(pd.concat(frames)), store_dir=store_dir)
+        elif not len(read_records(s, interval, store_dir)):
+            errors[s] = "no data"
+    return errors
+
+
+def symbol_row(symbol, start, end, interval='1d', store_dir=None):
+    """One output row: statistics of the three return series and full-sample volatilities."""
+    row = {'symbol': symbol, 'interval': interval}
+    try:
+        records = read_range(symbol, start, end, interval, store_dir)
+        row['bars'] = len(records)
+        if len(records) < 2:
+            row['error'] = 'no data'
+            return row
+
+        ts = pd.to_datetime(records['ts'][[0, -1]], unit='ns')
+        row['first_date'], row['last_date'] = ts[0].isoformat(), ts[1].isoformat()
+        row['total_return'] = float(records['Close'][-1] / records['Close'][0] - 1)
+
+        stats = return_stats(chunk_series(records))
+        for j, name in enumerate(SERIES):
+            for field in STAT_FIELDS:
+                row[f'{name}_{field}'] = stats[field][j].item()
+            for i, k in enumerate(stats['ks']):
+                row[f'{name}_band{k:g}_perc'] = stats['band_perc'][i, j].item()
+
+        terms = estimator_terms(records['Open'], records['High'], records['Low'], records['Close'])
+        vols = full_volatility(term_sums(terms), symbol, interval)
+        for name, _ in ESTIMATORS:
+            row[f'vol_{name}'] = float(vols[name])
+    except Exception as e:
+        row['error'] = str(e)
+    return row
+
+
+def write_table(rows, path):
+    table = pd.DataFrame(rows)
+    if 'error' not in table:
+        table['error'] = None
+    if path.endswith('.parquet'):
+        # Needs pyarrow or fastparquet
+        table.to_parquet(path, index=False)
+    elif path.endswith('.csv'):
+        table.to_csv(path, index=False)
+    else:
+        table.to_json(path, orient='records', indent=2)
+    return table
+
+
+def run(symbols, start, end, interval='1d', batch_size=100, workers=None, store_dir=None, log=sys.stderr):
+    rows, errors = [], {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for i in range(0, len(symbols), batch_size):
+            batch = symbols[i:i + batch_size]
+            t0 = time.perf_counter()
+            failed = fetch_batch(batch, start, end, interval, store_dir)
+            errors.update(failed)
+            print(f"fetched {i + len(batch)}/{len(symbols)} symbols "
+                  f"({len(failed)} failed, {time.perf_counter() - t0:.1f}s)", file=log, flush=True)
+            # Workers read the store themselves, only symbol names cross the process boundary
+            futures += [pool.submit(symbol_row, s, start, end, interval, store_dir) for s in batch if s not in failed]
+        for future in as_completed(futures):
+            rows.append(future.result())
+    rows += [{'symbol': s, 'interval': interval, 'error': message} for s, message in errors.items()]
+    # Universe order, whatever order the workers finished in
+    order = {s: i for i, s in enumerate(symbols)}
+    return sorted(rows, key=lambda row: order[row['symbol']])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('universe', help='file listing the symbols')
+    parser.add_argument('--output', required=True, help='.parquet, .csv or .json table')
+    parser.add_argument('--start', default='2018-01-01')
+    parser.add_argument('--end', default=None, help='exclusive end date (default: today)')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--batch-size', type=int, default=100, help='symbols per provider request')
+    parser.add_argument('--workers', type=int, default=None, help='processes computing statistics (default: CPU count)')
+    parser.add_argument('--store-dir', default=None, help='local store (default: VOL_APP_STORE_DIR)')
+    args = parser.parse_args(argv)
+
+    start = pd.Timestamp(args.start)
+    end = pd.Timestamp(args.end) if args.end else pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+    symbols = read_universe(args.universe)
+    t0 = time.perf_counter()
+    rows = run(symbols, start, end, args.interval, args.batch_size, args.workers, args.store_dir)
+    table = write_table(rows, args.output)
+    failed = int(table['error'].notna().sum())
+    print(f"{len(table)} symbols, {failed} failed, {time.perf_counter() - t0:.1f}s -> {args.output}", file=sys.stderr)
+    return 0 if failed < len(table) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Micro-benchmarks for the calc modules, figure building, the FIND result and
+the serialization of the per-panel callback responses.
+
+    python benchmark.py                                  # 1k, 100k, 1M and 10M rows
+    python benchmark.py --sizes 1000 100000 --save baseline.json
+    python benchmark.py --sizes 1000 100000 --compare baseline.json --tolerance 0.25
+
+Each case reports the best wall time over --repeat runs and the peak traced
+memory of one run. With --compare the exit status is 1 when any case is
+slower (or uses more memory) than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from plotly.io.json import to_json_plotly
+
+from close_util import close_return_calc
+from h_l_util import h_l_return_calc
+from o_c_util import o_c_return_calc
+from hist_util import bin_returns, hist_bins, histogram_figure
+from ohlcv_util import OHLCV
+from provider_util import synthetic_ohlcv
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+
+
+def build_figures(data, interval='1d'):
+    bins = hist_bins(interval)
+    returns = close_return_calc(data)[0]
+    h_l = h_l_return_calc(data)['h_l']
+    o_c = o_c_return_calc(data)['o_c']
+    return (histogram_figure(bin_returns(returns, *bins["close"][:3]), "Daily Log Returns", '#007BFF', 'plotly_white',
+                             dtick=bins["close"][3]),
+            histogram_figure(bin_returns(h_l, *bins["h_l"][:3]), "High Low", "#00FF59", 'plotly_dark',
+                             dtick=bins["h_l"][3]),
+            histogram_figure(bin_returns(o_c, *bins["o_c"][:3]), "Open Close", "#00FF59", 'plotly_dark',
+                             dtick=bins["o_c"][3]))
+
+
+def callback_outputs(result):
+    # What the panel and summary callbacks send for one FIND result
+    from return_app import PANELS
+    from vol_layout import estimator_columns
+
+    outputs = []
+    for name in PANELS:
+        panel = result[name]
+        start, end, size = panel['bins']
+        outputs.append((panel['figure'], panel['stats'], panel['std'], panel.get('returns'), size, start, end))
+    outputs.append((result['vol'], estimator_columns(), result.get('tails', []), result['cumulative']))
+    return outputs
+
+
+def serialize_outputs(outputs):
+    # Each callback response is serialized on its own
+    return [to_json_plotly(response) for response in outputs]
+
+
+def cases(data):
+    # name -> (setup, timed function); setup runs outside the timer.
+    # The calc modules never write to their input, so every case shares one container
+    from return_app import build_outputs
+
+    return {
+        'close_return_calc': (lambda: data, close_return_calc),
+        'h_l_return_calc': (lambda: data, h_l_return_calc),
+        'o_c_return_calc': (lambda: data, o_c_return_calc),
+        'build_figures': (lambda: data, build_figures),
+        'build_outputs': (lambda: data, lambda d: build_outputs(d, 'BENCH')),
+        'serialize_outputs': (lambda: callback_outputs(build_outputs(data, 'BENCH')), serialize_outputs),
+    }
+
+
+def measure(setup, fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        arg = setup()
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    arg = setup()
+    tracemalloc.start()
+    fn(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes, repeat, seed):
+    results = {}
+    for n in sizes:
+        data = OHLCV.from_frame(synthetic_ohlcv(n, seed=seed))
+        for name, (setup, fn) in cases(data).items():
+            seconds, peak = measure(setup, fn, repeat)
+            results[f"{name}[{n}]"] = {'seconds': seconds, 'peak_bytes': peak}
+            print(f"{name:<20} {n:>10,} rows  {seconds * 1e3:10.2f} ms  {peak / 2**20:10.1f} MiB", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for case, new in results.items():
+        old = baseline.get(case)
+        if old is None:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if old[metric] > 0 and new[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{case} {metric}: {old[metric]:.6g} -> {new[metric]:.6g} "
+                                   f"(+{new[metric] / old[metric] - 1:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write results to this baseline file')
+    parser.add_argument('--compare', help='compare against this baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative slowdown / memory growth (default 0.25)')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.seed)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            print("\n".join(f"  {line}" for line in regressions))
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
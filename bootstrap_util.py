@@ -0,0 +1,197 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+from stats_util import STD_LEVELS
+
+# Resampling confidence intervals
+# Resamples are drawn as (n_resamples, n_obs) index arrays, a chunk of
+# resamples at a time so the working arrays stay under BOOTSTRAP_CHUNK_BYTES.
+# All draws come from one PCG64 stream in which every resample takes a fixed
+# number of uniforms, so a chunk jumps straight to its first resample and a
+# seed gives the same intervals whatever the chunk size and whether the
+# chunks run in this process or on a process pool.
+
+STATISTICS = ('mean', 'std', 'pos_perc', 'band_perc')
+
+
+def resample_indices(rng, n_obs, n_resamples, block=None, length=None):
+    """
+    Row indices of n_resamples resamples of length (default n_obs) drawn
+    from n_obs observations: iid, or moving blocks of consecutive rows when
+    block > 1 (keeps volatility clustering inside a block).
+    """
+    length = length or n_obs
+    if not block or block <= 1:
+        return _uniform_ints(rng, n_obs, (n_resamples, length))
+    block = min(block, n_obs)
+    starts = _uniform_ints(rng, n_obs - block + 1, (n_resamples, _draws_per_resample(n_obs, block, length)))
+    return (starts[:, :, None] + np.arange(block)).reshape(n_resamples, -1)[:, :length]
+
+
+def _draws_per_resample(n_obs, block=None, length=None):
+    # Uniforms resample_indices takes per resample
+    length = length or n_obs
+    if not block or block <= 1:
+        return length
+    return -(-length // min(block, n_obs))
+
+
+def _uniform_ints(rng, n, shape):
+    # One uniform per integer in [0, n), unlike rng.integers whose use of the stream varies
+    return np.minimum((rng.random(shape) * n).astype('i8'), n - 1)
+
+
+def _standard_normal(rng, shape):
+    # Box-Muller on two uniforms per value, a fixed use of the stream unlike rng.normal
+    u = rng.random(shape + (2,))
+    return np.sqrt(-2 * np.log1p(-u[..., 0])) * np.cos(2 * np.pi * u[..., 1])
+
+
+def _stream(seed, skip):
+    # Generator on the seed's stream after its first skip uniforms
+    bit_generator = np.random.PCG64(seed)
+    bit_generator.advance(skip)
+    return np.random.Generator(bit_generator)
+
+
+def resample_weights(idx, n_obs):
+    # How often every observation appears in every resample, shape (n_resamples, n_obs)
+    n_resamples = len(idx)
+    flat = (idx + np.arange(n_resamples)[:, None] * n_obs).ravel()
+    return np.bincount(flat, minlength=n_resamples * n_obs).reshape(n_resamples, n_obs).astype('i4')
+
+
+def resample_stats(x, idx, ks=STD_LEVELS):
+    """
+    Mean, std, positive frequency (%) and σ-band coverage (fraction inside
+    mean ± k·std of the resample itself) of every resample of the columns
+    of x. Shapes (n_resamples, n_series), band_perc (len(ks), n_resamples, n_series).
+    The resamples are never gathered: moments are weight-matrix products and
+    band coverage is a difference of cumulative weights over the sorted values.
+    """
+    n_obs, length = len(x), idx.shape[1]
+    w = resample_weights(idx, n_obs)
+    wf = w.astype('f8')
+    center = x.mean(axis=0)
+    xc = x - center
+    mean_c = wf @ xc / length
+    var = (wf @ (xc * xc) / length - mean_c * mean_c) * length / (length - 1)
+    mean, std = mean_c + center, np.sqrt(np.maximum(var, 0.0))
+    pos_perc = wf @ (x > 0).astype('f8') / length * 100
+
+    rows = np.arange(len(w))
+    band = np.empty((len(ks), len(w), x.shape[1]))
+    for j in range(x.shape[1]):
+        order = np.argsort(x[:, j], kind='stable')
+        xs = x[order, j]
+        cum = np.zeros((len(w), n_obs + 1), dtype='i4')
+        np.cumsum(w[:, order], axis=1, out=cum[:, 1:])
+        for i, k in enumerate(ks):
+            lo = np.searchsorted(xs, mean[:, j] - k * std[:, j], side='left')
+            hi = np.searchsorted(xs, mean[:, j] + k * std[:, j], side='right')
+            band[i, :, j] = (cum[rows, hi] - cum[rows, lo]) / length
+    return {'mean': mean, 'std': std, 'pos_perc': pos_perc, 'band_perc': band}
+
+
+def _boot_chunk(x, lo, hi, block, ks, seed):
+    rng = _stream(seed, lo * _draws_per_resample(len(x), block))
+    return resample_stats(x, resample_indices(rng, len(x), hi - lo, block), ks)
+
+
+def _chunk_bounds(total, row_bytes, chunk_bytes=None):
+    per_chunk = max(1, int((chunk_bytes or config.BOOTSTRAP_CHUNK_BYTES) // max(row_bytes, 1)))
+    return [(lo, min(lo + per_chunk, total)) for lo in range(0, total, per_chunk)]
+
+
+def _run(fn, tasks, workers):
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, *zip(*tasks)))
+    return [fn(*task) for task in tasks]
+
+
+def clean_rows(values):
+    # Rows of an (n_obs, n_series) array where every series has a value
+    x = np.asarray(values, dtype='f8')
+    if x.ndim == 1:
+        x = x[:, None]
+    return x[~np.isnan(x).any(axis=1)]
+
+
+def bootstrap(values, n_resamples=None, block=None, ks=STD_LEVELS, seed=0, chunk_bytes=None, workers=None):
+    """
+    Bootstrap distributions of the resample_stats statistics of the columns
+    of values (rows are resampled together, rows with a NaN are dropped).
+    """
+    x = clean_rows(values)
+    if len(x) < 2:
+        raise ValueError("Too few observations to resample.")
+    n_resamples = n_resamples or config.BOOTSTRAP_RESAMPLES
+    workers = config.BOOTSTRAP_WORKERS if workers is None else workers
+    # Index, weight and cumulative weight rows dominate the memory of a chunk
+    bounds = _chunk_bounds(n_resamples, 40 * len(x), chunk_bytes)
+    parts = _run(_boot_chunk, [(x, lo, hi, block, ks, seed) for lo, hi in bounds], workers)
+    return {name: np.concatenate([part[name] for part in parts], axis=-2) for name in STATISTICS}
+
+
+def confidence_intervals(boot, level=0.95):
+    # {statistic: (lower, upper)} percentile intervals over the resample axis
+    q = [(1 - level) / 2 * 100, (1 + level) / 2 * 100]
+    return {name: tuple(np.percentile(boot[name], q, axis=-2)) for name in STATISTICS}
+
+
+def _path_chunk(x, lo, hi, horizon, block, method, seed):
+    if method == 'normal':
+        rng = _stream(seed, lo * 2 * horizon)
+        steps = x.mean() + x.std(ddof=1) * _standard_normal(rng, (hi - lo, horizon))
+    else:
+        rng = _stream(seed, lo * _draws_per_resample(len(x), block, horizon))
+        steps = x[resample_indices(rng, len(x), hi - lo, block, horizon)]
+    return np.cumsum(steps, axis=1)
+
+
+def simulate_paths(returns, horizon, n_paths=None, method='empirical', block=None, seed=0, chunk_bytes=None,
+                   workers=None):
+    """
+    Monte Carlo cumulative log-return paths over horizon steps, drawn from the
+    empirical returns (iid or in blocks) or from a normal fitted to them.
+    Returns an (n_paths, horizon) array.
+    """
+    x = clean_rows(returns)[:, 0]
+    if len(x) < 2:
+        raise ValueError("Too few observations to simulate.")
+    n_paths = n_paths or config.BOOTSTRAP_RESAMPLES
+    workers = config.BOOTSTRAP_WORKERS if workers is None else workers
+    bounds = _chunk_bounds(n_paths, 16 * horizon, chunk_bytes)
+    parts = _run(_path_chunk, [(x, lo, hi, horizon, block, method, seed) for lo, hi in bounds], workers)
+    return np.concatenate(parts)
+
+
+def path_quantiles(paths, quantiles=(5, 25, 50, 75, 95)):
+    # Percentiles of the cumulative return after every step, shape (len(quantiles), horizon)
+    return np.percentile(paths, quantiles, axis=0)
+
+
+def point_stats(values, ks=STD_LEVELS):
+    # The statistics of the sample itself (the identity resample)
+    x = clean_rows(values)
+    return resample_stats(x, np.arange(len(x))[None, :], ks)
+
+
+def ci_table(point, ci, labels, ks=STD_LEVELS):
+    # One row per series and statistic: estimate and interval bounds
+    rows = []
+    for j, label in enumerate(labels):
+        specs = [("Mean", 'mean', None, "{:.3%}"), ("Std", 'std', None, "{:.2%}"),
+                 ("Positive %", 'pos_perc', None, "{:.2f}%")]
+        specs += [(f"±{k:g}σ Coverage", 'band_perc', i, "{:.2%}") for i, k in enumerate(ks)]
+        for name, key, i, fmt in specs:
+            est, lo, hi = point[key], ci[key][0], ci[key][1]
+            if i is not None:
+                est, lo, hi = est[i], lo[i], hi[i]
+            rows.append({"Series": label if name == "Mean" else "", "Statistic": name,
+                         "Estimate": fmt.format(est[0, j] if est.ndim > 1 else est[j]),
+                         "Low": fmt.format(lo[j]), "High": fmt.format(hi[j])})
+    return rows
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import config
+
+# Result cache shared by all gunicorn workers
+# Entries live in one SQLite file, so every worker process sees the same
+# entries and counters. Eviction is least-recently-used, bounded by entry
+# count and total bytes, and every entry expires after a time-to-live.
+# Reads never write: hit/miss counts and access times are kept per process
+# and flushed in one transaction every few seconds (and by every set(), so
+# eviction sees them), so concurrent reads do not queue for the write lock.
+
+
+def make_key(*parts):
+    # Stable key from normalized inputs (and a data-version stamp)
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, path, max_entries=256, max_bytes=256 * 2**20, ttl=3600, flush_every=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.flush_every = flush_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._accessed = {}
+        self._counts = {}
+        self._flushed = time.time()
+
+    def _connect(self):
+        # One connection per thread and per process (never reused after a fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS entries ('
+                     'key TEXT PRIMARY KEY, value BLOB, size INTEGER, created REAL, accessed REAL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _take_pending(self):
+        with self._lock:
+            accessed, counts = self._accessed, self._counts
+            self._accessed, self._counts, self._flushed = {}, {}, time.time()
+        return accessed, counts
+
+    def _write_pending(self, conn, accessed, counts):
+        conn.executemany('UPDATE entries SET accessed = MAX(accessed, ?) WHERE key = ?',
+                         [(t, key) for key, t in accessed.items()])
+        conn.executemany('INSERT INTO counters VALUES (?, ?) '
+                         'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value', list(counts.items()))
+
+    def flush(self):
+        # Write the access times and counters gathered since the last flush
+        accessed, counts = self._take_pending()
+        if accessed or counts:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._write_pending(conn, accessed, counts)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def _note(self, key, now, counter):
+        with self._lock:
+            if key is not None:
+                self._accessed[key] = now
+            if counter:
+                self._counts[counter] = self._counts.get(counter, 0) + 1
+            due = now - self._flushed > self.flush_every
+        if due:
+            self.flush()
+
+    def get(self, key, count=True):
+        """Return (hit, value); count=False reads without touching the hit/miss counters."""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute('SELECT value, created FROM entries WHERE key = ?', (key,)).fetchone()
+        # Expired rows are left for the next set() to delete
+        if row is None or now - row[1] > self.ttl:
+            self._note(None, now, 'misses' if count else None)
+            return False, None
+        self._note(key, now, 'hits' if count else None)
+        return True, pickle.loads(row[0])
+
+    def set(self, key, value):
+        conn = self._connect()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        accessed, counts = self._take_pending()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._write_pending(conn, accessed, counts)
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                         (key, blob, len(blob), now, now))
+            # TTL, then LRU by entry count and by total size
+            conn.execute('DELETE FROM entries WHERE created < ?', (now - self.ttl,))
+            conn.execute('DELETE FROM entries WHERE key IN ('
+                         'SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+                         (self.max_entries,))
+            conn.execute('DELETE FROM entries WHERE key IN (SELECT key FROM ('
+                         'SELECT key, SUM(size) OVER (ORDER BY accessed DESC) AS running FROM entries) '
+                         'WHERE running > ?)', (self.max_bytes,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def stats(self):
+        self.flush()
+        conn = self._connect()
+        counters = dict(conn.execute('SELECT name, value FROM counters').fetchall())
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {'hits': counters.get('hits', 0), 'misses': counters.get('misses', 0),
+                'entries': entries, 'bytes': size}
+
+    def clear(self):
+        self._take_pending()
+        conn = self._connect()
+        conn.execute('DELETE FROM entries')
+        conn.execute('DELETE FROM counters')
+
+
+result_cache = ResultCache(config.CACHE_PATH, config.CACHE_MAX_ENTRIES, config.CACHE_MAX_BYTES, config.CACHE_TTL)
@@ -0,0 +1,68 @@
+from dash import html, dcc, dash_table
+import config
+
+# Confidence interval module
+
+CI_COLUMNS = [
+    {"name": "", "id": "Series"},
+    {"name": "Statistic", "id": "Statistic"},
+    {"name": "Estimate", "id": "Estimate"},
+    {"name": "95% Low", "id": "Low"},
+    {"name": "95% High", "id": "High"},
+]
+
+
+def confidence_output():
+    return html.Div(
+        html.Div([
+            html.H2(children='Confidence Intervals',
+                    style={'textAlign': 'center', 'fontSize':'18px', 'color': "#f9ec3eff", 'marginTop':'20px'}),
+            html.Div([
+                dcc.RadioItems(
+                    id='ci-method',
+                    options=[{'label': ' IID Bootstrap', 'value': 'iid'},
+                             {'label': f' Block Bootstrap ({config.BOOTSTRAP_BLOCK} bars)', 'value': 'block'}],
+                    value='iid',
+                    inline=True,
+                    inputStyle={'marginLeft': '8px'}
+                ),
+                dcc.RadioItems(
+                    id='mc-method',
+                    options=[{'label': ' Empirical Paths', 'value': 'empirical'},
+                             {'label': ' Normal Fit Paths', 'value': 'normal'}],
+                    value='empirical',
+                    inline=True,
+                    style={'marginLeft': '20px'},
+                    inputStyle={'marginLeft': '8px'}
+                ),
+                html.Button('RESAMPLE', id='ci-button', n_clicks=0, style={
+                    'backgroundColor': "#df6919",
+                    'color': 'white',
+                    'border': 'none',
+                    'padding': '10px 15px',
+                    'borderRadius': '3px',
+                    'cursor': 'pointer',
+                    'fontSize': '15px',
+                    'marginLeft': '20px'
+                }),
+            ], style={'display': 'flex', 'alignItems': 'center', 'padding': '10px', 'color': '#e7e8e6ff',
+                      'fontSize': '15px', 'backgroundColor': "#20374c", 'borderRadius': '3px'}),
+            dcc.Store(id='ci-request'),
+            html.Div(id='ci-output', style={'color': '#e7e8e6ff', 'fontSize': '15px', 'marginTop': '5px'}),
+            html.Div([
+                dash_table.DataTable(
+                    id='ci-table',
+                    columns=CI_COLUMNS,
+                    data=[],
+                    style_table={'marginTop': '1px'},
+                    style_cell={'textAlign': 'center', 'padding': '6px','backgroundColor': "#20374c", 'color': "#FAF25A",'fontSize':'14px'},
+                    style_header={'backgroundColor': "#0f2537", 'color': "#ff933b", 'fontWeight': 'bold'}
+                ),
+                # Monte Carlo fan of the cumulative close return
+                dcc.Graph(
+                    id='mc-fan',
+                    style={'width': '500px', 'height': '400px', 'marginLeft': '20px'}
+                ),
+            ], style={'display': 'flex', 'alignItems': 'flex-start', 'marginTop': '5px'}),
+            ], style={'display':'flex', 'flexDirection':'column','alignItems':'center'})
+    )
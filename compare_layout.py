@@ -0,0 +1,60 @@
+from dash import html, dcc, dash_table
+from compare_util import COMPARE_COLUMNS
+
+# Comparison module
+
+def compare_output():
+    return html.Div(
+        html.Div([
+            html.H2(children='Compare Symbols',
+                    style={'textAlign': 'center', 'fontSize':'18px', 'color': "#f9ec3eff", 'marginTop':'20px'}),
+            html.Div([
+                # Symbol list, fetched together for the picked dates and interval
+                dcc.Input(
+                    id='compare-tickers-input',
+                    type='text',
+                    placeholder='SPY, QQQ, BTC-USD',
+                    style={'padding': '10px 15px', 'fontSize': '16px', 'border':'none',
+                           'borderRadius': '3px', 'width':'320px'}
+                ),
+                html.Button('COMPARE', id='compare-button', n_clicks=0, style={
+                    'backgroundColor': "#df6919",
+                    'color': 'white',
+                    'border': 'none',
+                    'padding': '10px 15px',
+                    'borderRadius': '3px',
+                    'cursor': 'pointer',
+                    'fontSize': '15px',
+                    'marginLeft': '10px'
+                }),
+                dcc.RadioItems(
+                    id='compare-series',
+                    options=[{'label': ' Close', 'value': 'close'},
+                             {'label': ' High-Low', 'value': 'h_l'},
+                             {'label': ' Open-Close', 'value': 'o_c'}],
+                    value='close',
+                    inline=True,
+                    style={'color': '#e7e8e6ff', 'fontSize': '15px', 'marginLeft': '15px'},
+                    inputStyle={'marginLeft': '8px'}
+                ),
+            ], style={'display': 'flex', 'alignItems': 'center', 'padding': '10px',
+                      'backgroundColor': "#20374c", 'borderRadius': '3px'}),
+            dcc.Store(id='compare-request'),
+            # Reference to the comparison result in the shared cache
+            dcc.Store(id='compare-result'),
+            html.Div(id='compare-output', style={'color': '#e7e8e6ff', 'fontSize': '15px', 'marginTop': '5px'}),
+            dcc.Graph(
+                id='compare-histogram',
+                style={'width': '900px', 'height': '400px'}
+            ),
+            dash_table.DataTable(
+                id='compare-table',
+                columns=COMPARE_COLUMNS,
+                data=[],
+                sort_action='native',
+                style_table={'marginTop': '1px'},
+                style_cell={'textAlign': 'center', 'padding': '8px','backgroundColor': "#20374c", 'color': "#FAF25A",'fontSize':'15px'},
+                style_header={'backgroundColor': "#0f2537", 'color': "#ff933b", 'fontWeight': 'bold'}
+            ),
+            ], style={'display':'flex', 'flexDirection':'column','alignItems':'center'})
+    )
@@ -0,0 +1,118 @@
+import numpy as np
+
+import config
+from hist_util import bin_counts, binned_result
+from stats_util import return_stats
+from store_util import read_range
+from stream_util import SERIES, chunk_series
+
+# Multi-ticker comparison
+# All symbols are topped up with one batched provider request per chunk
+# (batch.fetch_batch), then the close, high-low and open-close series of every symbol are stacked
+# side by side (NaN-padded to the longest history) so one return_stats call
+# covers all of them.
+
+COMPARE_COLUMNS = [
+    {"name": "Symbol", "id": "Symbol"},
+    {"name": "Bars", "id": "Bars"},
+    {"name": "Total %", "id": "Total %"},
+    {"name": "Close Mean %", "id": "Close Mean %"},
+    {"name": "Close σ %", "id": "Close σ %"},
+    {"name": "Up %", "id": "Up %"},
+    {"name": "±1σ %", "id": "±1σ %"},
+    {"name": "H-L Mean %", "id": "H-L Mean %"},
+    {"name": "O-C Mean %", "id": "O-C Mean %"},
+    {"name": "O-C σ %", "id": "O-C σ %"},
+]
+
+
+def stack_series(records_list):
+    """
+    Close, high-low and open-close series of several histories as one
+    (n_obs, 3 * n_symbols) array, series-major: column j * n_symbols + i is
+    series j of symbol i. Shorter histories are padded with NaN.
+    """
+    n_symbols = len(records_list)
+    n_obs = max((len(r) for r in records_list), default=0)
+    values = np.full((n_obs, len(SERIES), n_symbols), np.nan)
+    for i, records in enumerate(records_list):
+        if len(records):
+            values[:len(records), :, i] = chunk_series(records)
+    return values.reshape(n_obs, -1)
+
+
+def compare_stats(symbols, start, end, interval='1d', bins=None, store_dir=None, errors=None):
+    """
+    Statistics and histograms of the three stored return series of every
+    symbol; symbols in errors (e.g. failed fetches) are skipped.
+    Returns {'symbols', 'bars', 'total_return', 'stats', 'binned', 'errors'};
+    stats entries have one column per (series, symbol), binned is
+    {series: [per-symbol bin_returns layout]}.
+    """
+    errors = dict(errors or {})
+    found, records_list = [], []
+    for symbol in symbols:
+        if symbol in errors:
+            continue
+        records = read_range(symbol, start, end, interval, store_dir)
+        if len(records) < 2:
+            errors[symbol] = "no data"
+            continue
+        found.append(symbol)
+        records_list.append(records)
+
+    n = len(found)
+    if not n:
+        return {'symbols': [], 'errors': errors}
+    values = stack_series(records_list)
+    stats = return_stats(values)
+
+    # Histograms per symbol with the σ lines of its own series
+    binned = {}
+    for j, name in enumerate(SERIES if bins else ()):
+        start_bin, end_bin, size = bins[name][:3]
+        binned[name] = []
+        for col in range(j * n, (j + 1) * n):
+            x = values[:, col]
+            counts = bin_counts(x[~np.isnan(x)] * 100, start_bin, end_bin, size)
+            binned[name].append(binned_result(counts, start_bin, size, stats["mean"][col] * 100,
+                                              stats["std"][col] * 100))
+    return {
+        'symbols': found,
+        'bars': [len(r) for r in records_list],
+        'total_return': [float(r['Close'][-1] / r['Close'][0] - 1) for r in records_list],
+        'stats': stats,
+        'binned': binned,
+        'errors': errors,
+    }
+
+
+def compare_table(result):
+    # One row per symbol; symbols without data get their error message instead
+    stats, n = result['stats'], len(result['symbols'])
+    rows = []
+    for i, symbol in enumerate(result['symbols']):
+        close, h_l, o_c = i, n + i, 2 * n + i
+        rows.append({
+            "Symbol": symbol,
+            "Bars": int(result['bars'][i]),
+            "Total %": f"{result['total_return'][i]:.2%}",
+            "Close Mean %": f"{stats['mean'][close]:.3%}",
+            "Close σ %": f"{stats['std'][close]:.2%}",
+            "Up %": f"{stats['pos_perc'][close]:.2f}%",
+            "±1σ %": f"{stats['band_perc'][0, close]:.2%}",
+            "H-L Mean %": f"{stats['mean'][h_l]:.2%}",
+            "O-C Mean %": f"{stats['mean'][o_c]:.3%}",
+            "O-C σ %": f"{stats['std'][o_c]:.2%}",
+        })
+    for symbol, message in result['errors'].items():
+        rows.append({"Symbol": symbol, "Bars": message})
+    return rows
+
+
+def check_symbols(symbols):
+    if not symbols:
+        raise ValueError("Enter symbols separated by commas.")
+    if len(symbols) > config.COMPARE_MAX_SYMBOLS:
+        raise ValueError(f"At most {config.COMPARE_MAX_SYMBOLS} symbols can be compared at once.")
+    return symbols
@@ -0,0 +1,83 @@
+import os
+
+# App configuration, overridable through environment variables
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Local OHLCV store (one file per symbol/interval)
+STORE_DIR = os.environ.get('VOL_APP_STORE_DIR', os.path.join(BASE_DIR, 'data_store'))
+
+# Seconds after which a still-forming last bar is refetched
+STORE_STALE_AFTER = float(os.environ.get('VOL_APP_STALE_AFTER', 15 * 60))
+
+# Offline mode serves only what is already on disk (tests, demos)
+OFFLINE = os.environ.get('VOL_APP_OFFLINE', '0').lower() in ('1', 'true', 'yes')
+
+# Shared result cache (SQLite file visible to every worker)
+CACHE_PATH = os.environ.get('VOL_APP_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'results.sqlite'))
+CACHE_MAX_ENTRIES = int(os.environ.get('VOL_APP_CACHE_MAX_ENTRIES', 256))
+CACHE_MAX_BYTES = int(os.environ.get('VOL_APP_CACHE_MAX_BYTES', 256 * 2**20))
+CACHE_TTL = float(os.environ.get('VOL_APP_CACHE_TTL', 60 * 60))
+
+# Largest series sent to the browser for client-side re-binning (float32 values)
+CLIENT_RETURNS_MAX = int(os.environ.get('VOL_APP_CLIENT_RETURNS_MAX', 250_000))
+
+# Symbols in one comparison (all fetched in one batched request)
+COMPARE_MAX_SYMBOLS = int(os.environ.get('VOL_APP_COMPARE_MAX_SYMBOLS', 20))
+
+# Correlation matrix: symbols per request, column block size (bounds the
+# temporaries) and fewest common observations for a pair
+CORR_MAX_SYMBOLS = int(os.environ.get('VOL_APP_CORR_MAX_SYMBOLS', 1000))
+CORR_BLOCK = int(os.environ.get('VOL_APP_CORR_BLOCK', 256))
+CORR_MIN_PERIODS = int(os.environ.get('VOL_APP_CORR_MIN_PERIODS', 20))
+
+# Bootstrap and Monte Carlo: resamples (and paths) per request, memory per
+# chunk of resamples, and processes (0 or 1 runs the chunks in the job itself)
+BOOTSTRAP_RESAMPLES = int(os.environ.get('VOL_APP_BOOTSTRAP_RESAMPLES', 10_000))
+BOOTSTRAP_CHUNK_BYTES = int(os.environ.get('VOL_APP_BOOTSTRAP_CHUNK_BYTES', 64 * 2**20))
+BOOTSTRAP_WORKERS = int(os.environ.get('VOL_APP_BOOTSTRAP_WORKERS', 0))
+BOOTSTRAP_BLOCK = int(os.environ.get('VOL_APP_BOOTSTRAP_BLOCK', 10))
+MC_HORIZON = int(os.environ.get('VOL_APP_MC_HORIZON', 21))
+
+# Quantile sketches (t-digest): monthly digests per symbol, centroid budget,
+# and the count up to which every value is kept (exact answers)
+SKETCH_PATH = os.environ.get('VOL_APP_SKETCH_PATH', os.path.join(BASE_DIR, 'cache', 'sketches.sqlite'))
+SKETCH_COMPRESSION = int(os.environ.get('VOL_APP_SKETCH_COMPRESSION', 1000))
+SKETCH_EXACT = int(os.environ.get('VOL_APP_SKETCH_EXACT', 4096))
+
+# Conditional statistics: trailing bars of the volatility that sets a bar's regime
+REGIME_WINDOW = int(os.environ.get('VOL_APP_REGIME_WINDOW', 21))
+
+# Precomputed outputs of common symbols (built nightly by precompute.py)
+PRECOMPUTE_PATH = os.environ.get('VOL_APP_PRECOMPUTE_PATH', os.path.join(BASE_DIR, 'cache', 'precomputed.sqlite'))
+PRECOMPUTE_MAX_AGE = float(os.environ.get('VOL_APP_PRECOMPUTE_MAX_AGE', 2 * 24 * 60 * 60))
+
+# Default FIND window start (the end defaults to today)
+DEFAULT_START = os.environ.get('VOL_APP_DEFAULT_START', '2018-01-01')
+
+# Live mode: poll period and how long an idle live accumulator is kept
+LIVE_INTERVAL_MS = int(os.environ.get('VOL_APP_LIVE_INTERVAL_MS', 15_000))
+LIVE_TTL = int(os.environ.get('VOL_APP_LIVE_TTL', 60 * 60))
+
+# Background jobs (FIND, confidence intervals, comparison, correlation)
+JOB_CACHE_DIR = os.environ.get('VOL_APP_JOB_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'jobs'))
+JOB_RESULT_TTL = int(os.environ.get('VOL_APP_JOB_RESULT_TTL', 10 * 60))
+MAX_RUNNING_JOBS = int(os.environ.get('VOL_APP_MAX_RUNNING_JOBS', os.cpu_count() or 2))
+MAX_QUEUED_JOBS = int(os.environ.get('VOL_APP_MAX_QUEUED_JOBS', 2 * (os.cpu_count() or 2)))
+
+# Market data provider: yfinance, local (CSV/Parquet directory) or synthetic
+PROVIDER = os.environ.get('VOL_APP_PROVIDER', 'yfinance')
+LOCAL_DATA_DIR = os.environ.get('VOL_APP_LOCAL_DATA_DIR', os.path.join(BASE_DIR, 'local_data'))
+SYNTHETIC_SEED = int(os.environ.get('VOL_APP_SYNTHETIC_SEED', 0))
+FETCH_RETRIES = int(os.environ.get('VOL_APP_FETCH_RETRIES', 3))
+FETCH_BACKOFF = float(os.environ.get('VOL_APP_FETCH_BACKOFF', 1.0))
+# Concurrent downloads of the chunks of a long intraday range
+FETCH_WORKERS = int(os.environ.get('VOL_APP_FETCH_WORKERS', 4))
+
+# Bars per chunk when streaming statistics over intraday history
+STREAM_CHUNK_ROWS = int(os.environ.get('VOL_APP_STREAM_CHUNK_ROWS', 2**18))
+
+# Metrics and sampling profiler (pyinstrument, every Nth FIND request; 0 turns it off)
+METRICS_DIR = os.environ.get('VOL_APP_METRICS_DIR', os.path.join(BASE_DIR, 'cache', 'metrics'))
+PROFILE_EVERY = int(os.environ.get('VOL_APP_PROFILE_EVERY', 0))
+PROFILE_DIR = os.environ.get('VOL_APP_PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Tests run offline on synthetic prices, with every store and cache in a
+# throwaway directory. Set before config is first imported.
+_tmp = tempfile.mkdtemp(prefix='vol_app_test_')
+os.environ.setdefault('VOL_APP_PROVIDER', 'synthetic')
+for name, path in (('VOL_APP_STORE_DIR', 'store'),
+                   ('VOL_APP_CACHE_PATH', 'results.sqlite'),
+                   ('VOL_APP_SKETCH_PATH', 'sketches.sqlite'),
+                   ('VOL_APP_PRECOMPUTE_PATH', 'precomputed.sqlite'),
+                   ('VOL_APP_JOB_CACHE_DIR', 'jobs'),
+                   ('VOL_APP_METRICS_DIR', 'metrics')):
+    os.environ.setdefault(name, os.path.join(_tmp, path))
@@ -0,0 +1,56 @@
+from dash import html, dcc
+
+# Correlation module
+
+def correlation_output():
+    return html.Div(
+        html.Div([
+            html.H2(children='Correlation Matrix',
+                    style={'textAlign': 'center', 'fontSize':'18px', 'color': "#f9ec3eff", 'marginTop':'20px'}),
+            html.Div([
+                # Universe, one or more symbols per line (comma or space separated)
+                dcc.Textarea(
+                    id='corr-tickers-input',
+                    placeholder='SPY, QQQ, GLD, TLT, BTC-USD, ...',
+                    style={'width': '420px', 'height': '60px', 'fontSize': '14px', 'borderRadius': '3px'}
+                ),
+                html.Button('CORRELATE', id='corr-button', n_clicks=0, style={
+                    'backgroundColor': "#df6919",
+                    'color': 'white',
+                    'border': 'none',
+                    'padding': '10px 15px',
+                    'borderRadius': '3px',
+                    'cursor': 'pointer',
+                    'fontSize': '15px',
+                    'marginLeft': '10px'
+                }),
+                html.Div([
+                    dcc.RadioItems(
+                        id='corr-kind',
+                        options=[{'label': ' Correlation', 'value': 'corr'},
+                                 {'label': ' Covariance', 'value': 'cov'}],
+                        value='corr',
+                        inline=True,
+                        inputStyle={'marginLeft': '8px'}
+                    ),
+                    dcc.RadioItems(
+                        id='corr-order',
+                        options=[{'label': ' Clustered', 'value': 'cluster'},
+                                 {'label': ' As entered', 'value': 'input'}],
+                        value='cluster',
+                        inline=True,
+                        inputStyle={'marginLeft': '8px'}
+                    ),
+                ], style={'color': '#e7e8e6ff', 'fontSize': '15px', 'marginLeft': '15px'}),
+            ], style={'display': 'flex', 'alignItems': 'center', 'padding': '10px',
+                      'backgroundColor': "#20374c", 'borderRadius': '3px'}),
+            dcc.Store(id='corr-request'),
+            # Reference to the matrices in the shared cache
+            dcc.Store(id='corr-result'),
+            html.Div(id='corr-output', style={'color': '#e7e8e6ff', 'fontSize': '15px', 'marginTop': '5px'}),
+            dcc.Graph(
+                id='corr-heatmap',
+                style={'width': '800px', 'height': '800px'}
+            ),
+            ], style={'display':'flex', 'flexDirection':'column','alignItems':'center', 'marginBottom': '40px'})
+    )
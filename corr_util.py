@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+import config
+from store_util import read_range
+
+# Cross-asset correlation and covariance
+# Close log returns (as in close_return_calc) of every symbol are aligned on
+# the union of their bar dates, so a 24/7 crypto asset keeps its weekend bars
+# and every pair is measured over the dates both of them traded
+# (pairwise-complete). The matrices are filled block by block of columns, so
+# the temporaries stay at a few (dates x block) and (block x block) arrays.
+
+
+def aligned_returns(symbols, start, end, interval='1d', store_dir=None):
+    """
+    (dates, returns, found, missing): close log returns as an
+    (n_dates, n_symbols) array on the union of bar dates, NaN where a symbol
+    has no bar. Symbols with fewer than two stored bars are listed in missing.
+    """
+    series, found, missing = [], [], []
+    for symbol in symbols:
+        records = read_range(symbol, start, end, interval, store_dir)
+        if len(records) < 2:
+            missing.append(symbol)
+            continue
+        close = np.asarray(records['Close'], dtype='f8')
+        ts = pd.to_datetime(records['ts'][1:], unit='ns')
+        if interval == '1d':
+            # Daily bars of different exchanges carry different times of day
+            ts = ts.normalize()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            series.append(pd.Series(np.log(close[1:] / close[:-1]), index=ts))
+        found.append(symbol)
+    if not series:
+        return pd.DatetimeIndex([]), np.empty((0, 0)), found, missing
+    # Repeated dates (e.g. a bar stored twice after normalizing) keep the last one
+    frame = pd.concat([s[~s.index.duplicated(keep='last')] for s in series], axis=1, join='outer').sort_index()
+    return frame.index, frame.to_numpy(dtype='f8'), found, missing
+
+
+def _block_moments(a, b):
+    # Pairwise-complete count, sums and sums of squares / products of two column blocks
+    ma, mb = ~np.isnan(a), ~np.isnan(b)
+    xa, xb = np.where(ma, a, 0.0), np.where(mb, b, 0.0)
+    ma, mb = ma.astype('f8'), mb.astype('f8')
+    n = ma.T @ mb
+    sa, sb = xa.T @ mb, ma.T @ xb
+    saa, sbb = (xa * xa).T @ mb, ma.T @ (xb * xb)
+    sab = xa.T @ xb
+    return n, sa, sb, saa, sbb, sab
+
+
+def pairwise_cov_corr(returns, block=None, min_periods=None):
+    """
+    Covariance and correlation matrices of the columns of returns from
+    pairwise-complete observations, computed in column blocks of size block.
+    Pairs with fewer than min_periods common observations are NaN.
+    Returns (cov, corr, count).
+    """
+    x = np.asarray(returns, dtype='f8')
+    block = block or config.CORR_BLOCK
+    min_periods = max(min_periods or config.CORR_MIN_PERIODS, 2)
+    k = x.shape[1]
+    cov = np.full((k, k), np.nan)
+    corr = np.full((k, k), np.nan)
+    count = np.zeros((k, k), dtype='i8')
+    for i in range(0, k, block):
+        for j in range(i, k, block):
+            n, sa, sb, saa, sbb, sab = _block_moments(x[:, i:i + block], x[:, j:j + block])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cxy = sab - sa * sb / n
+                cxx = saa - sa * sa / n
+                cyy = sbb - sb * sb / n
+                c = np.where(n >= min_periods, cxy / (n - 1), np.nan)
+                r = np.where(n >= min_periods, cxy / np.sqrt(cxx * cyy), np.nan)
+            r = np.clip(r, -1, 1)
+            rows, cols = slice(i, i + block), slice(j, j + block)
+            cov[rows, cols], corr[rows, cols], count[rows, cols] = c, r, n
+            # Symmetric, the lower block is the transpose
+            cov[cols, rows], corr[cols, rows], count[cols, rows] = c.T, r.T, n.T
+    return cov, corr, count
+
+
+def cluster_order(corr):
+    """
+    Leaf order of an average-linkage clustering on the distance
+    sqrt((1 - corr) / 2), so correlated symbols sit next to each other in the
+    heatmap. Pairs without a correlation count as uncorrelated.
+    """
+    k = len(corr)
+    if k < 3:
+        return list(range(k))
+    dist = np.sqrt(np.clip((1 - np.nan_to_num(np.asarray(corr, dtype='f8'), nan=0.0)) / 2, 0, 1))
+    np.fill_diagonal(dist, np.inf)
+    members = [[i] for i in range(k)]
+    size = np.ones(k)
+    active = np.ones(k, dtype=bool)
+    for _ in range(k - 1):
+        a, b = divmod(int(np.argmin(dist)), k)
+        # Lance-Williams update for average linkage, b is merged into a
+        merged = (size[a] * dist[a] + size[b] * dist[b]) / (size[a] + size[b])
+        dist[a, :], dist[:, a] = merged, merged
+        dist[a, a] = np.inf
+        dist[b, :], dist[:, b] = np.inf, np.inf
+        members[a] = members[a] + members[b]
+        size[a] += size[b]
+        active[b] = False
+    return members[int(np.flatnonzero(active)[0])]
+
+
+def correlation_result(symbols, start, end, interval='1d', store_dir=None):
+    """Everything the correlation panel needs, None when fewer than two symbols have data."""
+    dates, returns, found, missing = aligned_returns(symbols, start, end, interval, store_dir)
+    if len(found) < 2:
+        return None
+    cov, corr, count = pairwise_cov_corr(returns)
+    return {
+        'symbols': found,
+        'missing': missing,
+        'dates': len(dates),
+        'cov': cov.astype('f4'),
+        'corr': corr.astype('f4'),
+        'count': count,
+        'order': cluster_order(corr),
+    }
@@ -0,0 +1,177 @@
+import numpy as np
+
+# Range-based volatility estimators (Parkinson, Garman-Klass, Rogers-Satchell,
+# Yang-Zhang) next to plain close-to-close volatility. Rolling windows are
+# computed from cumulative sums, so each window length costs O(n).
+
+ESTIMATORS = [
+    ("close_to_close", "Close-to-Close"),
+    ("parkinson", "Parkinson"),
+    ("garman_klass", "Garman-Klass"),
+    ("rogers_satchell", "Rogers-Satchell"),
+    ("yang_zhang", "Yang-Zhang"),
+]
+
+ROLLING_WINDOWS = (20, 60, 252)
+
+# Trading days per year and trading hours per day by asset class
+TRADING_DAYS = {'equity': 252, 'index': 252, 'rates': 252, 'futures': 252, 'fx': 260, 'crypto': 365}
+TRADING_HOURS = {'equity': 6.5, 'index': 6.5, 'rates': 6.5, 'futures': 23, 'fx': 24, 'crypto': 24}
+
+RATE_INDICES = ('^IRX', '^FVX', '^TNX', '^TYX')
+CRYPTO_QUOTES = ('-USD', '-USDT', '-USDC', '-EUR', '-GBP', '-BTC', '-ETH')
+
+# Terms whose variance (not just mean) enters an estimator
+MOMENT_TERMS = ("close_close", "overnight", "open_close")
+
+INTERVAL_HOURS = {'1m': 1 / 60, '2m': 2 / 60, '5m': 5 / 60, '15m': 15 / 60, '30m': 0.5,
+                  '60m': 1, '90m': 1.5, '1h': 1}
+
+
+def asset_class(symbol):
+    # Yahoo symbol conventions: EURUSD=X, CL=F, ^GSPC, BTC-USD
+    symbol = symbol.strip().upper()
+    if symbol.endswith('=X'):
+        return 'fx'
+    if symbol.endswith('=F'):
+        return 'futures'
+    if symbol in RATE_INDICES:
+        return 'rates'
+    if symbol.startswith('^'):
+        return 'index'
+    if symbol.endswith(CRYPTO_QUOTES):
+        return 'crypto'
+    return 'equity'
+
+
+def periods_per_year(symbol, interval='1d'):
+    cls = asset_class(symbol)
+    if interval == '1d':
+        return TRADING_DAYS[cls]
+    return TRADING_DAYS[cls] * TRADING_HOURS[cls] / INTERVAL_HOURS[interval]
+
+
+def estimator_terms(open_, high, low, close):
+    """
+    Per-bar log terms of every estimator. The first bar has no previous
+    close, so all terms start at the second bar.
+    """
+    o, h, l, c = (np.asarray(x, dtype='f8') for x in (open_, high, low, close))
+    overnight = np.log(o[1:] / c[:-1])
+    close_close = np.log(c[1:] / c[:-1])
+    o, h, l, c = o[1:], h[1:], l[1:], c[1:]
+    high_low = np.log(h / l)
+    open_close = np.log(c / o)
+    up = np.log(h / o)
+    down = np.log(l / o)
+    terms = {
+        "close_close": close_close,
+        "overnight": overnight,
+        "open_close": open_close,
+        "parkinson": high_low ** 2 / (4 * np.log(2)),
+        "garman_klass": 0.5 * high_low ** 2 - (2 * np.log(2) - 1) * open_close ** 2,
+        "rogers_satchell": up * (up - open_close) + down * (down - open_close),
+    }
+    # Bars with a missing price would poison every cumulative sum after them
+    valid = np.all([np.isfinite(x) for x in terms.values()], axis=0)
+    return {name: x[valid] for name, x in terms.items()}
+
+
+def _window_sums(x, window):
+    # Sum of x over every full window, from one cumulative sum
+    cs = np.concatenate([[0.0], np.cumsum(x)])
+    return cs[window:] - cs[:-window]
+
+
+def _term(terms, name):
+    # "<term>_sq" is the square of a term
+    return terms[name[:-3]] ** 2 if name.endswith("_sq") else terms[name]
+
+
+def _combine(mean, n):
+    # Per-bar variance of each estimator from the mean of every term over n bars
+    def var(name):
+        # Sample variance from first and second moments
+        return (mean(name + "_sq") - mean(name) ** 2) * n / (n - 1)
+
+    k = 0.34 / (1.34 + (n + 1) / (n - 1))
+    rogers_satchell = mean("rogers_satchell")
+    return {
+        "close_to_close": var("close_close"),
+        "parkinson": mean("parkinson"),
+        "garman_klass": mean("garman_klass"),
+        "rogers_satchell": rogers_satchell,
+        "yang_zhang": var("overnight") + k * var("open_close") + (1 - k) * rogers_satchell,
+    }
+
+
+def _variances(terms, window=None):
+    """
+    Per-bar variance of each estimator, over the whole sample (window=None)
+    or over every rolling window of the given length.
+    """
+    if window is None:
+        def mean(name):
+            x = _term(terms, name)
+            return np.array([x.mean()]) if len(x) else np.array([np.nan])
+        return _combine(mean, len(terms["close_close"]))
+
+    def mean(name):
+        x = _term(terms, name)
+        return _window_sums(x, window) / window if len(x) >= window else np.array([])
+    return _combine(mean, window)
+
+
+def term_sums(terms):
+    """
+    Mergeable sums behind the full-sample variances: bar count, sum of every
+    term and sum of squares of the return terms. Sums of two chunks add up.
+    """
+    sums = {name: float(x.sum()) for name, x in terms.items()}
+    sums.update({f"{name}_sq": float((x * x).sum()) for name, x in terms.items() if name in MOMENT_TERMS})
+    sums["n"] = len(terms["close_close"])
+    return sums
+
+
+def full_volatility(sums, symbol, interval='1d'):
+    # Annualized full-sample volatility of every estimator from term_sums
+    n = sums["n"]
+    if n < 2:
+        return {name: np.nan for name, _ in ESTIMATORS}
+    variances = _combine(lambda name: sums[name] / n, n)
+    return {name: _annualize(variances[name], periods_per_year(symbol, interval)) for name, _ in ESTIMATORS}
+
+
+def _annualize(variance, periods):
+    return np.sqrt(np.maximum(variance, 0.0) * periods)
+
+
+def estimate_volatility(data, symbol, interval='1d', windows=ROLLING_WINDOWS):
+    """
+    Annualized volatility of every estimator over the full window and on
+    rolling windows. Returns {estimator: {"full": vol, "rolling": {window: array}}}.
+    """
+    terms = estimator_terms(data['Open'], data['High'], data['Low'], data['Close'])
+    periods = periods_per_year(symbol, interval)
+    if len(terms["close_close"]) < 2:
+        return {name: {"full": np.nan, "rolling": {w: np.array([]) for w in windows}} for name, _ in ESTIMATORS}
+
+    full = _variances(terms)
+    rolling = {w: _variances(terms, w) for w in windows}
+    return {
+        name: {"full": _annualize(full[name][0], periods),
+               "rolling": {w: _annualize(rolling[w][name], periods) for w in windows}}
+        for name, _ in ESTIMATORS
+    }
+
+
+def volatility_table(vols, windows=ROLLING_WINDOWS):
+    # One row per estimator: full-window vol and the latest value of each rolling window
+    rows = []
+    for name, label in ESTIMATORS:
+        row = {"Label": label, "Full": f"{vols[name]['full']:.2%}"}
+        for w in windows:
+            series = vols[name]["rolling"][w]
+            row[f"{w}"] = f"{series[-1]:.2%}" if len(series) else "-"
+        rows.append(row)
+    return rows
@@ -0,0 +1,86 @@
+import os
+import threading
+
+from metrics_util import inc
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on this platform
+    fcntl = None
+
+# Single-flight request coalescing
+# Threads asking for the same key wait on one in-flight call and share its
+# result. Across gunicorn workers an exclusive lock file serializes the
+# call, so a worker that waited finds the work already done when it runs.
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, lock_path=None):
+        """
+        Run fn() once for all concurrent callers with the same key.
+        When lock_path is given the call also holds that file lock.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            inc('vol_app_coalesced_total', scope='thread')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if lock_path is None or fcntl is None:
+                call.result = fn()
+            else:
+                with _file_lock(lock_path):
+                    call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _file_lock:
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another worker is already fetching the same data
+            inc('vol_app_coalesced_total', scope='worker')
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+flight = SingleFlight()
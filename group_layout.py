@@ -0,0 +1,47 @@
+from dash import html, dcc, dash_table
+from group_util import GROUP_COLUMNS
+
+# Conditional statistics module
+
+def conditional_output():
+    return html.Div(
+        html.Div([
+            html.H2(children='Conditional Statistics',
+                    style={'textAlign': 'center', 'fontSize':'18px', 'color': "#f9ec3eff", 'marginTop':'20px'}),
+            html.Div([
+                dcc.RadioItems(
+                    id='group-by',
+                    options=[{'label': ' Weekday', 'value': 'weekday'},
+                             {'label': ' Month', 'value': 'month'},
+                             {'label': ' Volatility Regime', 'value': 'regime'}],
+                    value='weekday',
+                    inline=True,
+                    inputStyle={'marginLeft': '8px'}
+                ),
+                dcc.RadioItems(
+                    id='group-series',
+                    options=[{'label': ' Close', 'value': 'close'},
+                             {'label': ' High-Low', 'value': 'h_l'},
+                             {'label': ' Open-Close', 'value': 'o_c'}],
+                    value='o_c',
+                    inline=True,
+                    style={'marginLeft': '20px'},
+                    inputStyle={'marginLeft': '8px'}
+                ),
+            ], style={'display': 'flex', 'alignItems': 'center', 'padding': '10px', 'color': '#e7e8e6ff',
+                      'fontSize': '15px', 'backgroundColor': "#20374c", 'borderRadius': '3px'}),
+            html.Div(id='group-output', style={'color': '#e7e8e6ff', 'fontSize': '15px', 'marginTop': '5px'}),
+            dcc.Graph(
+                id='group-histograms',
+                style={'width': '900px', 'height': '500px'}
+            ),
+            dash_table.DataTable(
+                id='group-table',
+                columns=GROUP_COLUMNS,
+                data=[],
+                style_table={'marginTop': '1px'},
+                style_cell={'textAlign': 'center', 'padding': '8px','backgroundColor': "#20374c", 'color': "#FAF25A",'fontSize':'15px'},
+                style_header={'backgroundColor': "#0f2537", 'color': "#ff933b", 'fontWeight': 'bold'}
+            ),
+            ], style={'display':'flex', 'flexDirection':'column','alignItems':'center'})
+    )
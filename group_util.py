@@ -0,0 +1,167 @@
+import numpy as np
+
+import config
+from stats_util import STD_LEVELS
+
+# Conditional statistics by weekday, calendar month and volatility regime
+# Every bar gets an integer group code and all statistics of all groups and
+# series come from np.bincount over the flat index series * n_groups + code:
+# one pass for the counts and sums, a second one for the squared deviations
+# and σ-band counts. No subset of the returns is ever filtered out or copied.
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+REGIMES = ("Low vol", "Mid vol", "High vol")
+GROUPINGS = ('weekday', 'month', 'regime')
+
+GROUP_COLUMNS = [
+    {"name": "", "id": "Group"},
+    {"name": "Count", "id": "Count"},
+    {"name": "Mean", "id": "Mean"},
+    {"name": "Std", "id": "Std"},
+    {"name": "Up %", "id": "Up %"},
+    {"name": "Up Mean", "id": "Up Mean"},
+    {"name": "Down Mean", "id": "Down Mean"},
+] + [{"name": f"±{k:g}σ %", "id": f"±{k:g}σ %"} for k in STD_LEVELS]
+
+
+def trailing_volatility(returns, window=None):
+    """
+    Std of the window returns before every bar (the bar itself excluded, so
+    a regime is known when the bar opens); NaN until window returns exist.
+    """
+    window = window or config.REGIME_WINDOW
+    x = np.asarray(returns, dtype='f8')
+    valid = ~np.isnan(x)
+    # Cumulative count, sum and sum of squares with a leading zero, so every
+    # window is a difference of two entries
+    n = np.concatenate([[0], np.cumsum(valid)])
+    s = np.concatenate([[0.0], np.cumsum(np.where(valid, x, 0.0))])
+    ss = np.concatenate([[0.0], np.cumsum(np.where(valid, x * x, 0.0))])
+    vol = np.full(len(x), np.nan)
+    if len(x) > window:
+        cnt = n[window:-1] - n[:-window - 1]
+        sm = s[window:-1] - s[:-window - 1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (ss[window:-1] - ss[:-window - 1] - sm * sm / cnt) / (cnt - 1)
+        vol[window:] = np.where(cnt == window, np.sqrt(np.maximum(var, 0.0)), np.nan)
+    return vol
+
+
+def expanding_rank(values):
+    """
+    Fraction of values[:i + 1] that are <= values[i], for every i: the
+    percentile of each value among those seen so far, from a Fenwick tree
+    over the value ranks (O(n log n)).
+    """
+    x = np.asarray(values, dtype='f8')
+    n = len(x)
+    # Tree slot of each value: one past the position of its last equal in sorted order
+    slots = np.searchsorted(np.sort(x), x, side='right').tolist()
+    tree = [0] * (n + 1)
+    below = np.empty(n, dtype='i8')
+    for i, slot in enumerate(slots):
+        p = slot
+        while p <= n:
+            tree[p] += 1
+            p += p & -p
+        count, p = 0, slot
+        while p > 0:
+            count += tree[p]
+            p -= p & -p
+        below[i] = count
+    return below / np.arange(1, n + 1)
+
+
+def group_codes(ts, close_returns, by):
+    """
+    (codes, labels): the group of every bar, -1 where it has none.
+    ts are epoch nanoseconds; a bar's regime is the tercile of its trailing
+    close volatility among the trailing volatilities up to it (expanding,
+    so no bar is classified with later data), once window of them exist.
+    """
+    days = np.asarray(ts, dtype='i8') // (86_400 * 10**9)
+    if by == 'weekday':
+        # 1970-01-01 was a Thursday
+        return (days + 3) % 7, WEEKDAYS
+    if by == 'month':
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype('i8') % 12, MONTHS
+    if by == 'regime':
+        vol = trailing_volatility(close_returns)
+        codes = np.full(len(vol), -1)
+        known = np.flatnonzero(~np.isnan(vol))
+        rank = expanding_rank(vol[known])
+        # Terciles of too short a history say little, those bars stay unclassified
+        warm = np.arange(len(known)) + 1 >= config.REGIME_WINDOW
+        codes[known[warm]] = np.minimum(np.ceil(rank[warm] * 3).astype('i8') - 1, 2)
+        return codes, REGIMES
+    raise ValueError(f"Unknown grouping '{by}'.")
+
+
+def grouped_stats(values, codes, n_groups, ks=STD_LEVELS):
+    """
+    The return_stats statistics of every (group, series) cell of values
+    ((n_obs, n_series), NaN missing) grouped by codes (-1 skips a bar).
+    Entries have shape (n_groups, n_series), σ-band entries (len(ks), n_groups, n_series).
+    """
+    x = np.asarray(values, dtype='f8')
+    if x.ndim == 1:
+        x = x[:, None]
+    ks = np.asarray(ks, dtype='f8')
+    n_series = x.shape[1]
+    size = n_groups * n_series
+    codes = np.asarray(codes)
+    keep = (codes >= 0)[:, None] & ~np.isnan(x)
+    cell = (np.arange(n_series) * n_groups + codes[:, None])[keep]
+    x = x[keep]
+
+    def total(weights=None):
+        return np.bincount(cell, weights, minlength=size).reshape(n_series, n_groups).T
+
+    count = total()
+    pos, neg = x > 0, x < 0
+    pos_count = total(pos.astype('f8')).astype('i8')
+    neg_count = total(neg.astype('f8')).astype('i8')
+    pos_sum, neg_sum = total(np.where(pos, x, 0.0)), total(np.where(neg, x, 0.0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total(x) / count
+        # Deviations from the mean of each bar's own cell
+        dev = x - mean.T.ravel()[cell]
+        std = np.sqrt(total(dev * dev) / (count - 1))
+        band_count = np.stack([total((np.abs(dev) <= k * std.T.ravel()[cell]).astype('f8')) for k in ks])
+        band_count = band_count.astype('i8')
+        return {
+            "ks": ks,
+            "count": count,
+            "mean": mean,
+            "std": std,
+            "pos_count": pos_count,
+            "neg_count": neg_count,
+            "pos_mean": pos_sum / pos_count,
+            "neg_mean": neg_sum / neg_count,
+            "pos_perc": pos_count / count * 100,
+            "neg_perc": neg_count / count * 100,
+            "lower": mean - ks[:, None, None] * std,
+            "upper": mean + ks[:, None, None] * std,
+            "band_count": band_count,
+            "band_perc": band_count / count,
+        }
+
+
+def group_table(stats, labels, j=0):
+    # One row per group of series j; groups without bars (weekends of a stock) are left out
+    rows = []
+    for g, label in enumerate(labels):
+        if not stats["count"][g, j]:
+            continue
+        row = {"Group": label,
+               "Count": int(stats["count"][g, j]),
+               "Mean": f"{stats['mean'][g, j]:.3%}",
+               "Std": f"{stats['std'][g, j]:.2%}",
+               "Up %": f"{stats['pos_perc'][g, j]:.2f}%",
+               "Up Mean": f"{stats['pos_mean'][g, j]:.2%}",
+               "Down Mean": f"{stats['neg_mean'][g, j]:.2%}"}
+        for i, k in enumerate(stats["ks"]):
+            row[f"±{k:g}σ %"] = f"{stats['band_perc'][i, g, j]:.2%}"
+        rows.append(row)
+    return rows
@@ -0,0 +1,255 @@
+import base64
+import functools
+
+import numpy as np
+
+from stats_util import STD_LEVELS
+
+# Share of a 6.5 hour trading day covered by one intraday bar
+INTRADAY_FRACTION = {'1m': 1 / 390, '2m': 2 / 390, '5m': 5 / 390, '15m': 15 / 390, '30m': 30 / 390,
+                     '60m': 60 / 390, '90m': 90 / 390, '1h': 60 / 390}
+
+# Server-side histogram binning
+# Only bin counts and σ-band positions are sent to the browser, so the
+# figure payload does not grow with the length of the history.
+
+
+def bin_returns(values, start, end, size, ks=STD_LEVELS, scale=100, mean=None, std=None):
+    """
+    Bin values * scale into fixed [start, end) bins of width size, with the
+    mean ± k·σ band edges in the same scaled units. mean and std (unscaled)
+    are usually already known from return_stats; they are only derived here when missing.
+    """
+    x = np.asarray(values, dtype='f8').ravel()
+    x = x[~np.isnan(x)] * scale
+    counts = bin_counts(x, start, end, size)
+
+    n = len(x)
+    if mean is None:
+        mean = x.sum() / n / scale if n else np.nan
+    if std is None:
+        std = np.sqrt(((x - mean * scale) ** 2).sum() / (n - 1)) / scale if n > 1 else np.nan
+    return binned_result(counts, start, size, mean * scale, std * scale, ks)
+
+
+def bin_counts(x, start, end, size):
+    # Counts of the (already scaled, NaN-free) values in every [start, end) bin
+    n_bins = int(round((end - start) / size))
+    idx = np.floor((x - start) / size).astype('i8')
+    inside = (idx >= 0) & (idx < n_bins)
+    return np.bincount(idx[inside], minlength=n_bins)
+
+
+def grouped_bin_counts(x, codes, n_groups, start, end, size):
+    # (n_groups, n_bins) counts of scaled NaN-free values by group code (-1 skips), one bincount
+    n_bins = int(round((end - start) / size))
+    idx = np.floor((x - start) / size).astype('i8')
+    inside = (idx >= 0) & (idx < n_bins) & (codes >= 0)
+    flat = np.asarray(codes)[inside] * n_bins + idx[inside]
+    return np.bincount(flat, minlength=n_groups * n_bins).reshape(n_groups, n_bins)
+
+
+def binned_result(counts, start, size, mean, std, ks=STD_LEVELS):
+    edges = start + size * np.arange(len(counts) + 1)
+    return {
+        "centers": (edges[:-1] + edges[1:]) / 2,
+        "counts": counts,
+        "size": size,
+        "mean": mean,
+        "std": std,
+        "ks": np.asarray(ks),
+    }
+
+
+def encode_sorted(values, scale=100, max_values=None):
+    """
+    Sorted float32 values * scale as a base64 string, the compact form the
+    browser re-bins from (assets/rebin.js). None when there are more than max_values.
+    """
+    x = np.asarray(values, dtype='f8').ravel()
+    x = x[~np.isnan(x)]
+    if max_values is not None and len(x) > max_values:
+        return None
+    return base64.b64encode(np.sort(x * scale).astype('<f4').tobytes()).decode('ascii')
+
+
+def _nice(x):
+    # Largest 1-2-2.5-5 step not above x
+    base = 10.0 ** np.floor(np.log10(x))
+    return float(base * max(step for step in (1, 2, 2.5, 5) if step * base <= x * (1 + 1e-9)))
+
+
+def hist_bins(interval='1d'):
+    """
+    Histogram bins (start, end, size, dtick) in percent for the close,
+    high-low and open-close panels. Intraday bins shrink with the square
+    root of the bar length so a bar's returns still spread over the chart.
+    """
+    if interval not in INTRADAY_FRACTION:
+        return {"close": (-12, 12, 0.5, 2), "h_l": (0, 20, 1, None), "o_c": (-12, 12, 0.5, 2)}
+    scale = np.sqrt(INTRADAY_FRACTION[interval])
+    size = _nice(0.5 * scale)
+    h_l_size = _nice(scale)
+    edge = round(24 * size, 10)
+    return {"close": (-edge, edge, size, round(4 * size, 10)),
+            "h_l": (0, round(20 * h_l_size, 10), h_l_size, None),
+            "o_c": (-edge, edge, size, round(4 * size, 10))}
+
+
+def horizon_bins(h):
+    # Daily close bins widened with the square root of the horizon (in bars)
+    if h <= 1:
+        return hist_bins('1d')["close"]
+    size = _nice(0.5 * np.sqrt(h))
+    edge = round(24 * size, 10)
+    return (-edge, edge, size, round(4 * size, 10))
+
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    # Expanded once per process; validating a named template costs more than the whole figure.
+    # Plotly is imported here so headless users of the binning helpers never load it
+    import plotly.io as pio
+
+    return pio.templates[name].to_plotly_json()
+
+
+def band_shapes(binned, axis=None):
+    # σ-band overlays as dashed vertical lines, on subplot axis ('', '2', ...) when given
+    shapes = []
+    xref, yref = ('x', 'paper') if axis is None else (f'x{axis}', f'y{axis} domain')
+    if np.isfinite(binned["std"]):
+        for k in binned["ks"]:
+            for edge in (binned["mean"] - k * binned["std"], binned["mean"] + k * binned["std"]):
+                shapes.append(dict(type='line', xref=xref, yref=yref, x0=float(edge), x1=float(edge), y0=0, y1=1,
+                                   line=dict(width=1, dash='dash', color='#ff933b'), opacity=0.6))
+    return shapes
+
+
+def histogram_figure(binned, name, marker_color, template, dtick=None):
+    """
+    Bar figure of the bin counts as a plain dict (Dash sends it as is,
+    skipping Plotly's per-figure validation).
+    """
+    layout = dict(
+        template=_template(template),
+        bargap=0.05,
+        margin=dict(l=20, r=20, t=30, b=20),
+        shapes=band_shapes(binned)
+        )
+    if dtick is not None:
+        layout['xaxis'] = dict(dtick=dtick)
+    return dict(
+        data=[dict(
+            type='bar',
+            x=binned["centers"],
+            y=binned["counts"],
+            marker=dict(color=marker_color),
+            opacity=0.8,
+            name=name
+        )],
+        layout=layout
+    )
+
+
+def overlay_figure(binned_list, names, template, dtick=None):
+    """
+    Several histograms on one chart as step lines of the share of
+    observations per bin, so series of different lengths compare directly.
+    """
+    data = []
+    for binned, name in zip(binned_list, names):
+        total = binned["counts"].sum()
+        data.append(dict(
+            type='scatter',
+            mode='lines',
+            line=dict(shape='hvh', width=1.5),
+            x=binned["centers"],
+            y=binned["counts"] / total * 100 if total else binned["counts"],
+            name=name
+        ))
+    layout = dict(
+        template=_template(template),
+        margin=dict(l=20, r=20, t=30, b=20),
+        yaxis=dict(title='% of bars'),
+        legend=dict(orientation='h', y=1.1)
+        )
+    if dtick is not None:
+        layout['xaxis'] = dict(dtick=dtick)
+    return dict(data=data, layout=layout)
+
+
+def small_multiples_figure(binned_list, names, marker_color, template, cols=4, dtick=None):
+    """
+    One small histogram per entry of binned_list in a grid of cols columns,
+    on a shared x range, each with its own σ lines and its name as title.
+    """
+    rows = max(-(-len(binned_list) // cols), 1)
+    gap_x, gap_y = 0.04, 0.12 / rows
+    width, height = (1 - gap_x * (cols - 1)) / cols, (1 - gap_y * (rows - 1)) / rows
+    layout = dict(
+        template=_template(template),
+        bargap=0.05,
+        margin=dict(l=20, r=20, t=30, b=20),
+        showlegend=False,
+        shapes=[],
+        annotations=[]
+        )
+    data = []
+    for i, (binned, name) in enumerate(zip(binned_list, names)):
+        axis = str(i + 1) if i else ''
+        row, col = divmod(i, cols)
+        x0, y1 = round(col * (width + gap_x), 6), round(1 - row * (height + gap_y), 6)
+        layout[f'xaxis{axis}'] = dict(domain=[x0, min(round(x0 + width, 6), 1)], anchor=f'y{axis}', matches='x' if i else None,
+                                      dtick=dtick)
+        layout[f'yaxis{axis}'] = dict(domain=[max(round(y1 - height, 6), 0), y1], anchor=f'x{axis}')
+        data.append(dict(type='bar', x=binned["centers"], y=binned["counts"], xaxis=f'x{axis}', yaxis=f'y{axis}',
+                         marker=dict(color=marker_color), opacity=0.8, name=name))
+        layout['shapes'] += band_shapes(binned, axis)
+        layout['annotations'].append(dict(text=name, x=x0 + width / 2, y=y1, xref='paper', yref='paper',
+                                          xanchor='center', yanchor='bottom', showarrow=False, font=dict(size=12)))
+    return dict(data=data, layout=layout)
+
+
+def heatmap_figure(z, labels, template, **trace):
+    # Square matrix heatmap as a plain dict, first label at the top left; labels hidden when crowded
+    ticks = len(labels) <= 60
+    return dict(
+        data=[dict(type='heatmap', z=z, x=labels, y=labels, **trace)],
+        layout=dict(
+            template=_template(template),
+            margin=dict(l=80, r=20, t=30, b=80),
+            xaxis=dict(showticklabels=ticks),
+            yaxis=dict(autorange='reversed', showticklabels=ticks),
+        )
+    )
+
+
+def fan_figure(bands, quantiles, template, title=None):
+    """
+    Percentile fan of simulated cumulative returns (in %) by step, each band
+    filled down to the line below it.
+    """
+    steps = list(range(1, bands.shape[1] + 1))
+    data = []
+    for i, (q, band) in enumerate(zip(quantiles, bands)):
+        data.append(dict(
+            type='scatter',
+            mode='lines',
+            x=steps,
+            y=band,
+            name=f"P{q:g}",
+            line=dict(width=2 if q == 50 else 1, color='#ff933b' if q == 50 else '#007BFF'),
+            fill='tonexty' if i else None,
+            fillcolor='rgba(0, 123, 255, 0.15)'
+        ))
+    layout = dict(
+        template=_template(template),
+        margin=dict(l=20, r=20, t=40, b=20),
+        xaxis=dict(title='Bars ahead'),
+        yaxis=dict(title='Cumulative return %'),
+        showlegend=False
+        )
+    if title:
+        layout['title'] = dict(text=title, font=dict(size=14))
+    return dict(data=data, layout=layout)
@@ -0,0 +1,53 @@
+from dash import html, dcc, dash_table
+from stats_util import STATS_COLUMNS, STD_COLUMNS
+from horizon_util import HORIZONS
+
+# Multi-horizon return module
+
+def horizon_return_output():
+    return html.Div(
+        html.Div([
+            html.H2(children='Multi-Horizon Close Returns',
+                    style={'textAlign': 'center', 'fontSize':'18px', 'color': "#f9ec3eff", 'marginTop':'20px'}),
+            html.Div([
+                dcc.RadioItems(
+                    id='horizon-select',
+                    options=[{'label': f' {h}-Day', 'value': h} for h in HORIZONS],
+                    value=HORIZONS[1],
+                    inline=True,
+                    inputStyle={'marginLeft': '8px'}
+                ),
+                dcc.RadioItems(
+                    id='horizon-mode',
+                    options=[{'label': ' Overlapping', 'value': 'overlap'},
+                             {'label': ' Non-overlapping', 'value': 'step'}],
+                    value='overlap',
+                    inline=True,
+                    style={'marginLeft': '20px'},
+                    inputStyle={'marginLeft': '8px'}
+                ),
+            ], style={'display': 'flex', 'alignItems': 'center', 'padding': '10px', 'color': '#e7e8e6ff',
+                      'fontSize': '15px', 'backgroundColor': "#20374c", 'borderRadius': '3px'}),
+            html.Div(id='horizon-output', style={'color': '#e7e8e6ff', 'fontSize': '15px', 'marginTop': '5px'}),
+            dcc.Graph(
+                id='horizon-histogram',
+                style={'width': '450px', 'height': '400px'}
+            ),
+            dash_table.DataTable(
+                id='horizon_stats-table',
+                columns=STATS_COLUMNS,
+                data=[],
+                style_table={'marginTop': '1px'},
+                style_cell={'textAlign': 'center', 'padding': '8px','backgroundColor': "#20374c", 'color': "#FAF25A",'fontSize':'15px'},
+                style_header={'backgroundColor': "#0f2537", 'color': "#ff933b", 'fontWeight': 'bold'}
+            ),
+            dash_table.DataTable(
+                id='horizon_std-table',
+                columns=STD_COLUMNS,
+                data=[],
+                style_table={'marginTop': '10px'},
+                style_cell={'textAlign': 'center', 'padding': '8px','backgroundColor': '#20374c','color': "#FAF25A",'fontSize':'15px'},
+                style_header={'backgroundColor': "#0f2537", 'color': "#ff933b", 'fontWeight': 'bold'}
+            ),
+            ], style={'display':'flex', 'flexDirection':'column','alignItems':'center'})
+    )
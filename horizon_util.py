@@ -0,0 +1,45 @@
+import numpy as np
+
+from stats_util import return_stats
+
+# Multi-horizon close returns
+# Every horizon is a difference of two views of one cumulative log-price
+# array: consecutive windows overlap (logp[h:] - logp[:-h]) or step by the
+# horizon (strided views logp[h::h] - logp[:-h:h]). The differences are
+# written straight into one NaN-padded block, so all horizons and both modes
+# share a single return_stats call.
+
+HORIZONS = (1, 5, 10, 21)
+MODES = ('overlap', 'step')
+
+
+def horizon_views(logp, h, overlapping=True):
+    # (end, start) views of the log prices whose difference is the h-bar log return
+    if overlapping:
+        return logp[h:], logp[:-h]
+    return logp[h::h], logp[:-h:h]
+
+
+def horizon_returns(close, horizons=HORIZONS):
+    """
+    h-bar log returns of the closes for every horizon, overlapping ones first,
+    then non-overlapping ones, as the columns of an (n, 2 * len(horizons))
+    array padded with NaN.
+    """
+    logp = np.log(np.asarray(close, dtype='f8'))
+    views = [horizon_views(logp, h, mode == 'overlap') for mode in MODES for h in horizons]
+    n = max((len(end) for end, _ in views), default=0)
+    values = np.full((n, len(views)), np.nan)
+    for j, (end, start) in enumerate(views):
+        np.subtract(end, start, out=values[:len(end), j])
+    return values
+
+
+def horizon_stats(close, horizons=HORIZONS):
+    """
+    Statistics of all horizons in one batched computation.
+    Returns (values, stats, columns) where columns[j] is the (mode, horizon) of column j.
+    """
+    values = horizon_returns(close, horizons)
+    columns = [(mode, h) for mode in MODES for h in horizons]
+    return values, return_stats(values), columns
@@ -0,0 +1,69 @@
+import os
+import time
+
+import diskcache
+import psutil
+from dash import DiskcacheManager
+
+import config
+
+# Background job manager for FIND, confidence intervals, comparison and correlation
+# Jobs run in their own processes so web workers stay free. JobSlots bounds
+# how many run at once and how many may wait, over all kinds of jobs; the
+# slot list lives in the shared diskcache so the limit holds across gunicorn
+# workers. Button callbacks check full() before a job is started, so a busy
+# server answers without spawning a process.
+
+job_cache = diskcache.Cache(config.JOB_CACHE_DIR)
+background_callback_manager = DiskcacheManager(job_cache, expire=config.JOB_RESULT_TTL)
+
+
+BUSY = "Server is busy, please try again in a moment."
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobSlots:
+
+    def __init__(self, cache, name, max_running, max_queued):
+        self.cache = cache
+        self.key = f"job-slots-{name}"
+        self.max_running = max_running
+        self.max_queued = max_queued
+
+    def _alive(self):
+        # Jobs cancelled by a resubmit are killed, so drop slots of dead processes
+        return [pid for pid in self.cache.get(self.key, []) if psutil.pid_exists(pid)]
+
+    def full(self):
+        # Whether a new job would be turned away (checked again when it acquires)
+        return len(self._alive()) >= self.max_running + self.max_queued
+
+    def acquire(self, on_wait=None, poll=0.2):
+        pid = os.getpid()
+        with self.cache.transact():
+            pids = self._alive()
+            if len(pids) >= self.max_running + self.max_queued:
+                raise QueueFull(BUSY)
+            self.cache.set(self.key, pids + [pid])
+        # Wait until this job is among the first max_running entries
+        while True:
+            with self.cache.transact():
+                pids = self._alive()
+                self.cache.set(self.key, pids)
+            ahead = pids.index(pid)
+            if ahead < self.max_running:
+                return
+            if on_wait is not None:
+                on_wait(ahead - self.max_running + 1)
+            time.sleep(poll)
+
+    def release(self):
+        pid = os.getpid()
+        with self.cache.transact():
+            self.cache.set(self.key, [p for p in self._alive() if p != pid])
+
+
+job_slots = JobSlots(job_cache, 'jobs', config.MAX_RUNNING_JOBS, config.MAX_QUEUED_JOBS)
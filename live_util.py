@@ -0,0 +1,115 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import config
+from flight_util import flight
+from metrics_util import inc
+from provider_util import BAR_LENGTH, get_provider
+from ohlcv_util import OHLCV
+from store_util import normalize_symbol, read_range, update_store
+from stream_util import IncrementalStats, series_bins
+
+# Live statistics of a symbol while its last bar is still forming
+# One IncrementalStats per (symbol, interval, window start) lives in a shared
+# diskcache, so every worker and every viewer of the same window reads the
+# same accumulator. Ticks never fetch: a stale accumulator is handed to a
+# refresher thread, and the refresh runs single-flight per window across
+# threads and workers, so N viewers cost one fetch per tick period.
+
+
+def live_key(symbol, interval, start):
+    return ('live', normalize_symbol(symbol), interval, pd.Timestamp(start).isoformat())
+
+
+def _live_end(interval):
+    # Exclusive end that still includes the bar forming now
+    return pd.Timestamp.now('UTC').tz_localize(None) + BAR_LENGTH.get(interval, pd.Timedelta(days=1))
+
+
+def _period():
+    return config.LIVE_INTERVAL_MS / 1000
+
+
+_pool = None
+_pool_pid = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _submit(key, fn):
+    # At most one queued refresh per window in this process
+    global _pool, _pool_pid
+    with _pending_lock:
+        if _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(max_workers=config.FETCH_WORKERS, thread_name_prefix='live')
+            _pool_pid = os.getpid()
+            _pending.clear()
+        if key in _pending:
+            return
+        _pending.add(key)
+
+    def run():
+        try:
+            fn()
+        finally:
+            with _pending_lock:
+                _pending.discard(key)
+    _pool.submit(run)
+
+
+def live_stats(cache, symbol, start, interval, bins):
+    """
+    Return (accumulator, error) of a window as last refreshed, and start a
+    refresh when it is older than a tick period. The accumulator is None
+    until the first refresh, which seeds it from the (topped up) store,
+    binned by bins (hist_util.hist_bins layout).
+    """
+    key = live_key(symbol, interval, start)
+    state = cache.get(key)
+    if state is None or time.time() - state['refreshed_at'] >= _period():
+        _submit(key, lambda: refresh(cache, symbol, start, interval, bins))
+    if state is None:
+        return None, cache.get(key + ('error',))
+    return IncrementalStats.from_dict(state['acc']), state.get('error')
+
+
+def refresh(cache, symbol, start, interval, bins):
+    """Advance the accumulator of a window by the bars since its forming bar, once for all workers."""
+    key = live_key(symbol, interval, start)
+    name = hashlib.sha1(repr(key).encode()).hexdigest()
+    lock_path = os.path.join(cache.directory, '.locks', f"live-{name}.lock")
+    try:
+        flight.do(key, lambda: _refresh(cache, key, symbol, start, interval, bins), lock_path=lock_path)
+    except Exception as e:
+        inc('vol_app_errors_total', stage='live_refresh')
+        state = cache.get(key)
+        if state is None:
+            cache.set(key + ('error',), str(e), expire=config.LIVE_TTL)
+        else:
+            # Keep serving the last accumulator, retried on the next stale tick
+            cache.set(key, dict(state, error=str(e)), expire=config.LIVE_TTL)
+
+
+def _refresh(cache, key, symbol, start, interval, bins):
+    # Under the window's lock; another worker may have refreshed it meanwhile
+    state = cache.get(key)
+    if state is not None and time.time() - state['refreshed_at'] < _period():
+        return
+    end = _live_end(interval)
+    if state is None:
+        update_store(symbol, start, end, interval)
+        acc = IncrementalStats.from_records(read_range(symbol, start, end, interval), series_bins(bins))
+    else:
+        acc = IncrementalStats.from_dict(state['acc'])
+        if not config.OFFLINE:
+            since = acc.last[0] if acc.last is not None else pd.Timestamp(start).value
+            bars = OHLCV.from_frame(get_provider().fetch(symbol, pd.Timestamp(since), end, interval))
+            for bar in zip(*(bars[col] for col in ('ts', 'Open', 'High', 'Low', 'Close'))):
+                acc.push(*bar)
+    cache.set(key, {'acc': acc.to_dict(), 'refreshed_at': time.time()}, expire=config.LIVE_TTL)
+    cache.delete(key + ('error',))
@@ -0,0 +1,372 @@
+"""
+Load test of the FIND callback through /_dash-update-component.
+
+    python loadtest.py --workers 2 --threads 4 --users 8 --requests 200
+    python loadtest.py --users 16 --tickers SPY:4,QQQ:2,BTC-USD:1 --intervals 1d:3,1h:1 --save run.json
+    python loadtest.py --workers 4 --threads 2 --users 16 --compare run.json --tolerance 0.25
+    python loadtest.py --url http://127.0.0.1:8050 --pid 12345 --users 4      # an already running server
+
+Unless --url is given, gunicorn serves return_app:server with the synthetic
+provider and a fresh temporary store, result cache and job cache, so no
+network is involved and every run starts from the same cold state. Each
+user replays FIND the way the browser does: the button callback, the
+background job request, then polls until the job answers (and with
+--render the panel callbacks). Tickers, ranges and intervals are drawn from
+the weighted mixes with --seed, so runs with the same arguments send the
+same requests. The RSS of the server's process tree (workers and FIND jobs)
+is sampled during the run.
+
+With --compare the exit status is 1 when throughput dropped, p95/p99
+latency or peak RSS grew by more than the tolerance, or the error rate rose.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import psutil
+import requests
+
+DEFAULT_TICKERS = 'SPY:4,QQQ:2,EURUSD=X:1,BTC-USD:1'
+DEFAULT_RANGES = '2018-01-01:2024-01-01:3,2022-01-01:2024-01-01:1'
+PANEL_OUTPUTS = ('close_stats-table', 'h_l_stats-table', 'o_c_stats-table', 'tail-table')
+
+
+def parse_mix(text):
+    # "A:3,B" -> ([A, B], [3, 1]); the weight is the last ':' field when numeric
+    items, weights = [], []
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        head, _, tail = part.rpartition(':')
+        if head and tail.replace('.', '', 1).isdigit():
+            items.append(head)
+            weights.append(float(tail))
+        else:
+            items.append(part)
+            weights.append(1.0)
+    return items, weights
+
+
+def schedule(n_requests, tickers, ranges, intervals, seed):
+    # The (ticker, start, end, interval) of every request, drawn once so the run is repeatable
+    rng = random.Random(seed)
+    plan = []
+    for _ in range(n_requests):
+        start, end = rng.choices(*ranges)[0].split(':')
+        plan.append((rng.choices(*tickers)[0], start, end, rng.choices(*intervals)[0]))
+    return plan
+
+
+def _outputs(output):
+    # Dash output spec "..a.b...c.d.." / "a.b" to the outputs list of a request body
+    multi = output.startswith('..')
+    specs = []
+    for part in (output[2:-2].split('...') if multi else [output]):
+        component, prop = part.rsplit('.', 1)
+        specs.append({'id': component, 'property': prop.split('@')[0]})
+    return specs if multi else specs[0]
+
+
+def _body(dep, inputs, state=()):
+    ins = [dict(spec, value=value) for spec, value in zip(dep['inputs'], inputs)]
+    return {'output': dep['output'], 'outputs': _outputs(dep['output']), 'inputs': ins,
+            'state': [dict(spec, value=value) for spec, value in zip(dep['state'], state)],
+            'changedPropIds': [f"{spec['id']}.{spec['property']}" for spec in dep['inputs']]}
+
+
+class Client:
+    """One simulated browser tab: a session and the callback specs of the app."""
+
+    def __init__(self, url, deps, poll, timeout, render):
+        self.url = url.rstrip('/') + '/_dash-update-component'
+        self.session = requests.Session()
+        self.poll, self.timeout, self.render = poll, timeout, render
+        self.click = next(d for d in deps if 'find-request.data' in d['output'])
+        self.job = next(d for d in deps if d['output'].startswith('find-result.data')
+                        and d['inputs'][0]['id'] == 'find-request')
+        self.panels = [d for d in deps if any(name in d['output'] for name in PANEL_OUTPUTS)
+                       and d['inputs'][0]['id'] == 'find-result']
+
+    def _post(self, body, **params):
+        r = self.session.post(self.url, json=body, params=params, timeout=self.timeout)
+        if r.status_code not in (200, 202, 204):
+            raise RuntimeError(f"HTTP {r.status_code}")
+        return r
+
+    def find(self, n_clicks, ticker, start, end, interval):
+        """
+        One FIND; returns ({stage: seconds}, error or None). Stages: click,
+        job (request to answer, polling included), render and total.
+        """
+        t0 = time.perf_counter()
+        times = {}
+        r = self._post(_body(self.click, [n_clicks], [ticker, start, end, interval, None]))
+        times['click'] = time.perf_counter() - t0
+        response = r.json()['response']
+        ref = response.get('find-result', {}).get('data')
+        request = response.get('find-request', {}).get('data')
+
+        if request is not None:
+            t1 = time.perf_counter()
+            body = _body(self.job, [request])
+            job = self._post(body).json()
+            ref = job.get('response', {}).get('find-result', {}).get('data')
+            while ref is None:
+                if time.perf_counter() - t1 > self.timeout:
+                    raise TimeoutError("job timed out")
+                time.sleep(self.poll)
+                r = self._post(body, cacheKey=job['cacheKey'], job=job['job'])
+                if r.status_code == 200 and 'response' in r.json():
+                    ref = r.json()['response']['find-result']['data']
+            times['job'] = time.perf_counter() - t1
+
+        # The app answers busy queues and bad tickers with a message instead of a result
+        error = ("busy" if 'busy' in ref['message'] else "message") if 'message' in ref else None
+        if self.render and error is None:
+            t2 = time.perf_counter()
+            for dep in self.panels:
+                self._post(_body(dep, [ref]))
+            times['render'] = time.perf_counter() - t2
+        times['total'] = time.perf_counter() - t0
+        return times, error
+
+
+class RssSampler(threading.Thread):
+    """Samples the RSS of a process and its children every period seconds."""
+
+    def __init__(self, pid, period):
+        super().__init__(daemon=True)
+        self.process = psutil.Process(pid) if pid else None
+        self.period = period
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def sample(self):
+        procs = [self.process] + self.process.children(recursive=True)
+        rss = []
+        for proc in procs:
+            try:
+                rss.append(proc.memory_info().rss)
+            except psutil.Error:
+                pass
+        return {'rss_bytes': sum(rss), 'max_process_bytes': max(rss, default=0), 'processes': len(rss)}
+
+    def run(self):
+        t0 = time.perf_counter()
+        while self.process is not None and not self.stopped.is_set():
+            try:
+                self.samples.append(dict(self.sample(), t=round(time.perf_counter() - t0, 3)))
+            except psutil.Error:
+                return
+            self.stopped.wait(self.period)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, threads, env_overrides, timeout=60):
+    """
+    gunicorn serving return_app:server on a free port with the synthetic
+    provider and every store and cache in a new temporary directory.
+    Returns (process, url, tmpdir).
+    """
+    tmp = tempfile.mkdtemp(prefix='vol_app_load_')
+    env = dict(os.environ,
+               VOL_APP_PROVIDER='synthetic',
+               VOL_APP_STORE_DIR=os.path.join(tmp, 'data_store'),
+               VOL_APP_CACHE_PATH=os.path.join(tmp, 'results.sqlite'),
+               VOL_APP_JOB_CACHE_DIR=os.path.join(tmp, 'jobs'),
+               VOL_APP_PRECOMPUTE_PATH=os.path.join(tmp, 'precomputed.sqlite'),
+               VOL_APP_SKETCH_PATH=os.path.join(tmp, 'sketches.sqlite'),
+               VOL_APP_METRICS_DIR=os.path.join(tmp, 'metrics'))
+    env.update(env_overrides)
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'return_app:server', '--bind', f'127.0.0.1:{port}',
+                             '--workers', str(workers), '--threads', str(threads), '--timeout', '120'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited while starting")
+        try:
+            if requests.get(url + '/_dash-dependencies', timeout=2).ok:
+                return proc, url, tmp
+        except requests.RequestException:
+            # Not listening yet, or the workers are still importing the app
+            pass
+        time.sleep(0.2)
+    stop_server(proc, tmp)
+    raise RuntimeError("gunicorn did not answer in time")
+
+
+def stop_server(proc, tmp):
+    proc.terminate()
+    try:
+        proc.wait(30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run(url, plan, users, poll, timeout, render, pid=None, sample_period=0.5):
+    """
+    Replay plan with users concurrent clients (closed loop, request i goes
+    to user i % users). Returns (records, rss samples, wall seconds).
+    """
+    deps = requests.get(url.rstrip('/') + '/_dash-dependencies', timeout=timeout).json()
+    records = [None] * len(plan)
+    sampler = RssSampler(pid, sample_period)
+
+    def user(u):
+        client = Client(url, deps, poll, timeout, render)
+        for i in range(u, len(plan), users):
+            start = time.perf_counter()
+            try:
+                times, error = client.find(i + 1, *plan[i])
+            except Exception as e:
+                times, error = {'total': time.perf_counter() - start}, type(e).__name__
+            records[i] = {'request': plan[i], 'times': times, 'error': error}
+
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(users)]
+    sampler.start()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    sampler.stopped.set()
+    sampler.join()
+    return records, sampler.samples, wall
+
+
+def summarize(records, samples, wall):
+    ok = [r for r in records if r['error'] is None]
+    errors = {}
+    for r in records:
+        if r['error'] is not None:
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+    latency = {}
+    for stage in ('total', 'click', 'job', 'render'):
+        values = [r['times'][stage] for r in ok if stage in r['times']]
+        if values:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            latency[stage] = {'p50': p50, 'p95': p95, 'p99': p99, 'max': max(values), 'count': len(values)}
+    return {
+        'requests': len(records),
+        'errors': errors,
+        'error_rate': (len(records) - len(ok)) / len(records) if records else 0.0,
+        'seconds': wall,
+        'throughput': len(ok) / wall if wall else 0.0,
+        'latency': latency,
+        'peak_rss_bytes': max((s['rss_bytes'] for s in samples), default=0),
+        'peak_process_bytes': max((s['max_process_bytes'] for s in samples), default=0),
+    }
+
+
+def report(summary, samples):
+    print(f"{summary['requests']} requests in {summary['seconds']:.1f} s, "
+          f"{summary['throughput']:.2f} FIND/s, error rate {summary['error_rate']:.1%} {summary['errors'] or ''}")
+    for stage, p in summary['latency'].items():
+        print(f"  {stage:<7} p50 {p['p50'] * 1e3:9.1f} ms  p95 {p['p95'] * 1e3:9.1f} ms  "
+              f"p99 {p['p99'] * 1e3:9.1f} ms  max {p['max'] * 1e3:9.1f} ms")
+    if samples:
+        print(f"  RSS     peak {summary['peak_rss_bytes'] / 2**20:.0f} MiB total, "
+              f"{summary['peak_process_bytes'] / 2**20:.0f} MiB largest process")
+        # About ten points of the RSS timeline
+        for s in samples[::max(len(samples) // 10, 1)]:
+            print(f"    t={s['t']:7.1f} s  {s['rss_bytes'] / 2**20:8.0f} MiB  {s['processes']} processes")
+
+
+def compare(summary, baseline, tolerance):
+    regressions = []
+    if summary['throughput'] < baseline['throughput'] * (1 - tolerance):
+        regressions.append(f"throughput: {baseline['throughput']:.3g} -> {summary['throughput']:.3g} FIND/s")
+    for q in ('p95', 'p99'):
+        old, new = baseline['latency'].get('total', {}).get(q), summary['latency'].get('total', {}).get(q)
+        if old and new and new > old * (1 + tolerance):
+            regressions.append(f"total {q}: {old * 1e3:.1f} -> {new * 1e3:.1f} ms (+{new / old - 1:.0%})")
+    if summary['error_rate'] > baseline['error_rate'] + 0.01:
+        regressions.append(f"error rate: {baseline['error_rate']:.1%} -> {summary['error_rate']:.1%}")
+    old, new = baseline['peak_rss_bytes'], summary['peak_rss_bytes']
+    if old and new > old * (1 + tolerance):
+        regressions.append(f"peak RSS: {old / 2**20:.0f} -> {new / 2**20:.0f} MiB (+{new / old - 1:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='test an already running server instead of starting gunicorn')
+    parser.add_argument('--pid', type=int, help='with --url, the server process whose RSS is sampled')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (default 2)')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker (default 4)')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='extra environment for the started server, e.g. VOL_APP_MAX_RUNNING_JOBS=4')
+    parser.add_argument('--users', type=int, default=4, help='concurrent users (default 4)')
+    parser.add_argument('--requests', type=int, default=100, help='FIND requests in total (default 100)')
+    parser.add_argument('--tickers', default=DEFAULT_TICKERS, help=f'weighted ticker mix (default {DEFAULT_TICKERS})')
+    parser.add_argument('--ranges', default=DEFAULT_RANGES,
+                        help=f'weighted start:end date ranges (default {DEFAULT_RANGES})')
+    parser.add_argument('--intervals', default='1d', help='weighted interval mix, e.g. 1d:3,1h:1 (default 1d)')
+    parser.add_argument('--render', action='store_true', help='also load the panels of every result')
+    parser.add_argument('--poll', type=float, default=1.0,
+                        help='seconds between job polls (default 1.0, as the browser does)')
+    parser.add_argument('--timeout', type=float, default=120.0, help='seconds before a FIND counts as failed')
+    parser.add_argument('--sample-period', type=float, default=0.5, help='seconds between RSS samples')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the summary and timeline to this file')
+    parser.add_argument('--compare', help='compare against this saved run')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative throughput drop / latency and RSS growth (default 0.25)')
+    args = parser.parse_args(argv)
+
+    plan = schedule(args.requests, parse_mix(args.tickers), parse_mix(args.ranges), parse_mix(args.intervals),
+                    args.seed)
+    server = None
+    if args.url:
+        url, pid = args.url, args.pid
+    else:
+        env = dict(item.split('=', 1) for item in args.env)
+        server = start_server(args.workers, args.threads, env)
+        url, pid = server[1], server[0].pid
+        print(f"gunicorn on {url}: {args.workers} workers x {args.threads} threads, {args.users} users", flush=True)
+    try:
+        records, samples, wall = run(url, plan, args.users, args.poll, args.timeout, args.render, pid,
+                                     args.sample_period)
+    finally:
+        if server is not None:
+            stop_server(server[0], server[2])
+
+    summary = summarize(records, samples, wall)
+    report(summary, samples)
+
+    if args.save:
+        config = {key: getattr(args, key) for key in ('workers', 'threads', 'env', 'users', 'requests', 'tickers',
+                                                      'ranges', 'intervals', 'render', 'poll', 'seed')}
+        with open(args.save, 'w') as f:
+            json.dump({'config': config, 'summary': summary, 'timeline': samples, 'records': records}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(summary, json.load(f)['summary'], args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            print("\n".join(f"  {line}" for line in regressions))
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import atexit
+import bisect
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import diskcache
+
+import config
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # sampling profiler is optional
+    Profiler = None
+
+# Prometheus-style metrics shared by web workers and background job processes
+# Observations are summed in process and added to one diskcache directory in
+# a single transaction at most every FLUSH_EVERY seconds (and at exit), so
+# /metrics on any worker reports the totals of all of them, that much behind.
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6, 1e7)
+
+HISTOGRAMS = {
+    'vol_app_stage_seconds': ('Time spent in each stage of a FIND request', STAGE_BUCKETS, 1e6),
+    'vol_app_provider_seconds': ('Latency of market data provider calls', STAGE_BUCKETS, 1e6),
+    'vol_app_payload_bytes': ('Size of callback responses', BYTES_BUCKETS, 1),
+}
+COUNTERS = {
+    'vol_app_errors_total': 'Errors by stage',
+    'vol_app_requests_total': 'FIND requests by symbol class',
+    'vol_app_coalesced_total': 'Calls that waited on an identical in-flight one, by scope',
+}
+
+FLUSH_EVERY = 1.0
+
+_store = None
+_store_lock = threading.Lock()
+
+_pending = {}
+_pending_lock = threading.Lock()
+_pending_pid = None
+_flushed_at = 0.0
+
+
+def _cache():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = diskcache.Cache(config.METRICS_DIR)
+        return _store
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _exit_flush():
+    # Background jobs leave through os._exit, which skips atexit but still
+    # runs the finalizers of their process module
+    atexit.register(flush)
+    for name in ('multiprocess.util', 'multiprocessing.util'):
+        module = sys.modules.get(name)
+        if module is not None:
+            module.Finalize(None, flush, exitpriority=0)
+
+
+def _add(*increments):
+    global _pending_pid, _flushed_at
+    with _pending_lock:
+        if _pending_pid != os.getpid():
+            # A forked process starts without its parent's unflushed counts
+            _pending.clear()
+            _pending_pid = os.getpid()
+            _flushed_at = time.monotonic()
+            _exit_flush()
+        for key, amount in increments:
+            _pending[key] = _pending.get(key, 0) + amount
+        due = time.monotonic() - _flushed_at >= FLUSH_EVERY
+    if due:
+        flush()
+
+
+def flush():
+    """Add the observations of this process to the shared totals."""
+    global _flushed_at
+    with _pending_lock:
+        if _pending_pid != os.getpid() or not _pending:
+            return
+        pending = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    cache = _cache()
+    with cache.transact():
+        for key, amount in pending.items():
+            cache.incr(key, amount)
+
+
+def observe(name, value, **labels):
+    # Histograms keep per-bucket counts and an integer sum (scaled, e.g. microseconds)
+    _, buckets, scale = HISTOGRAMS[name]
+    key = _labels(labels)
+    _add((('bucket', name, key, bisect.bisect_left(buckets, value)), 1),
+         (('sum', name, key), int(round(value * scale))))
+
+
+def inc(name, amount=1, **labels):
+    _add((('counter', name, _labels(labels)), amount))
+
+
+@contextmanager
+def timer(stage, **labels):
+    """Time a block into vol_app_stage_seconds; an exception is counted as a stage error."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc('vol_app_errors_total', stage=stage)
+        raise
+    finally:
+        observe('vol_app_stage_seconds', time.perf_counter() - t0, stage=stage, **labels)
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+def render(extra_gauges=None):
+    """Prometheus text exposition of all metrics."""
+    flush()
+    cache = _cache()
+    buckets, sums, counters = {}, {}, {}
+    for key in list(cache.iterkeys()):
+        value = cache.get(key)
+        if value is None:
+            continue
+        if key[0] == 'bucket':
+            buckets.setdefault((key[1], key[2]), {})[key[3]] = value
+        elif key[0] == 'sum':
+            sums[(key[1], key[2])] = value
+        elif key[0] == 'counter':
+            counters[(key[1], key[2])] = value
+
+    lines = []
+    for name, (help_text, bounds, scale) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (metric, key), counts in sorted(buckets.items()):
+            if metric != name:
+                continue
+            running = 0
+            for i, bound in enumerate(list(bounds) + ['+Inf']):
+                running += counts.get(i, 0)
+                lines.append(f'{name}_bucket{_format_labels(key, [("le", bound)])} {running}')
+            lines.append(f'{name}_sum{_format_labels(key)} {sums.get((name, key), 0) / scale:g}')
+            lines.append(f'{name}_count{_format_labels(key)} {running}')
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (metric, key), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{_format_labels(key)} {value}')
+    for name, (help_text, samples) in (extra_gauges or {}).items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+        for labels, value in samples:
+            lines.append(f'{name}{_format_labels(_labels(labels))} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def sampled_profile(label):
+    """
+    Profile every PROFILE_EVERY-th call with pyinstrument (when installed)
+    and write the flame report as HTML into PROFILE_DIR.
+    """
+    every = config.PROFILE_EVERY
+    if Profiler is None or every <= 0 or _cache().incr(('profile_calls',)) % every:
+        yield
+        return
+    profiler = Profiler()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(config.PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{label}.html")
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
@@ -1,4 +1,6 @@
 from dash import Dash, html, dcc, Input, Output, State, dash_table, no_update
+from stats_util import STATS_COLUMNS, STD_COLUMNS
+from rebin_layout import rebin_controls
 
 # Close Return module
 
@@ -12,20 +14,15 @@ def open_close_return_output():
                 dcc.Graph(
                     id='open_close',
                     style={'width': '450px', 'height': '400px'}
-            )
+            ),
+                rebin_controls('o_c')
             ]),
             # Statistics Table Close Return
             html.H2(children='Return Statistics',
                     style={'textAlign': 'center', 'fontSize':'18px', 'color': "#f9ec3eff", 'marginTop':'5px'}),
             dash_table.DataTable(
                 id='o_c_stats-table',
-                columns=[
-                    {"name": " ", "id": "Label"},
-                    {"name": "Mean", "id": "Mean"},
-                    {"name": "Count", "id": "Count"},
-                    {"name": "Frequency %", "id": "Frequency %"},
-                    {"name": "Adj Return", "id": "Adj Return"},
-                ],
+                columns=STATS_COLUMNS,
                 data=[
                     {"Label": "Positive", "Mean": "", "Count": "", "Frequency %": "", "Adj Return": ""},
                     {"Label": "Negative", "Mean": "", "Count": "", "Frequency %": "", "Adj Return": ""},
@@ -39,17 +36,11 @@ def open_close_return_output():
                     style={'textAlign': 'center','marginTop': '10px', 'fontSize':'18px', 'color': "#f9ec3eff"}),
             dash_table.DataTable(
                 id='o_c_std-table',
-                columns = [
-                    {"name": "", "id": "label"},
-                    {"name": "Upper Bound", "id": "Upper Bound"},
-                    {"name": "Lower Bound", "id": "Lower Bound"},
-                    {"name": "Count", "id": "Count"},
-                    {"name": "Count %", "id": "Count %"},
-                ],
+                columns=STD_COLUMNS,
                 data=[
-                    {"label": "Std_1","Upper Bound":"", "Lower Bound":"","Count":"","Count %":""},
-                    {"label": "Std_2","Upper Bound":"", "Lower Bound":"","Count":"","Count %":""},
-                    {"label": "Std_3","Upper Bound":"", "Lower Bound":"","Count":"","Count %":""},
+                    {"Label": "Std_1","Upper Bound":"", "Lower Bound":"","Count":"","Count %":""},
+                    {"Label": "Std_2","Upper Bound":"", "Lower Bound":"","Count":"","Count %":""},
+                    {"Label": "Std_3","Upper Bound":"", "Lower Bound":"","Count":"","Count %":""},
                     
                 ],
                 style_table={'marginTop': '1px', 'width': '45%'},
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from provider_util import COLUMNS, normalize_frame
+
+# Read-only OHLCV container
+# One int64 epoch-ns index plus one NumPy array per price column. Read from
+# the store the columns are contiguous views on the memory-mapped file, so
+# every worker reading a history shares the same pages and nothing is copied
+# per request. The arrays are not writeable, calc modules derive new arrays
+# instead of adding columns. pandas is only used at the edges (from_frame, to_frame).
+
+
+def _readonly(values, dtype=None):
+    # A read-only view, the caller's own array stays as it was
+    x = np.asarray(values, dtype=dtype).view()
+    x.flags.writeable = False
+    return x
+
+
+class OHLCV:
+
+    def __init__(self, ts, columns):
+        self.ts = _readonly(ts, 'i8')
+        self.columns = {col: _readonly(values) for col, values in columns.items()}
+
+    @classmethod
+    def from_frame(cls, data):
+        # Provider frames (MultiIndex columns, tz-aware index) are flattened first
+        data = normalize_frame(data)
+        return cls(data.index.as_unit('ns').asi8, {col: data[col].to_numpy(dtype='f8') for col in COLUMNS})
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype='i8'), {col: np.empty(0) for col in COLUMNS})
+
+    @classmethod
+    def concat(cls, parts):
+        # One container of the bars of all parts in order (copies)
+        parts = list(parts)
+        return cls(np.concatenate([p.ts for p in parts]),
+                   {col: np.concatenate([p[col] for p in parts]) for col in COLUMNS})
+
+    def to_frame(self):
+        # Back to a DataFrame for code that wants one (copies)
+        return pd.DataFrame({col: np.array(values) for col, values in self.columns.items()}, index=self.index)
+
+    @property
+    def index(self):
+        return pd.DatetimeIndex(pd.to_datetime(self.ts, unit='ns'), name='Date')
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, key):
+        # data['Close'] like a frame; slices give a container of views
+        if isinstance(key, str):
+            return self.ts if key == 'ts' else self.columns[key]
+        return OHLCV(self.ts[key], {col: values[key] for col, values in self.columns.items()})
+
+    def __repr__(self):
+        span = f", {self.index[0]} .. {self.index[-1]}" if len(self) else ""
+        return f"OHLCV({len(self)} bars{span})"
+
+
+def column(data, name):
+    # One price column of an OHLCV or a DataFrame (flat or yfinance MultiIndex) as float64
+    return np.asarray(data[name], dtype='f8').ravel()
@@ -0,0 +1,72 @@
+"""
+Nightly precompute of the FIND outputs for a universe of common symbols.
+
+    python precompute.py universe.txt                       # default window, daily bars
+    python precompute.py universe.txt --start 2018-01-01 --end 2025-08-30
+
+Tops up the local store in batches, builds the figures, tables and
+cumulative return of every symbol exactly as the app would, and writes
+them into the precomputed index (VOL_APP_PRECOMPUTE_PATH) stamped with a
+digest of the stored bars they were built from. Rows older than
+VOL_APP_PRECOMPUTE_MAX_AGE are dropped afterwards. Run it from cron after
+the close, e.g. `15 1 * * * python precompute.py universe.txt`.
+"""
+import argparse
+import sys
+import time
+from datetime import date
+
+import config
+from batch import fetch_batch, read_universe
+from precompute_util import precomputed
+from return_app import compute_outputs
+from store_util import window_version
+
+
+def build(symbols, start, end, interval='1d', batch_size=100, log=sys.stderr):
+    built, failed = 0, 0
+    started = time.time()
+    for i in range(0, len(symbols), batch_size):
+        batch = symbols[i:i + batch_size]
+        errors = fetch_batch(batch, start, end, interval)
+        for symbol in batch:
+            if symbol in errors:
+                failed += 1
+                continue
+            try:
+                outputs = compute_outputs(symbol, start, end, interval=interval)
+            except Exception as e:
+                print(f"{symbol}: {e}", file=log)
+                failed += 1
+                continue
+            # Messages (no data) are not worth serving from the index
+            if 'message' in outputs:
+                failed += 1
+                continue
+            precomputed.put(symbol, interval, start, end, window_version(symbol, start, end, interval),
+                            outputs, started)
+            built += 1
+        print(f"{i + len(batch)}/{len(symbols)} symbols ({built} built, {failed} failed)", file=log, flush=True)
+    return built, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('universe', help='file listing the symbols')
+    parser.add_argument('--start', default=config.DEFAULT_START)
+    parser.add_argument('--end', default=None, help='window end as picked in the app (default: today)')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--batch-size', type=int, default=100, help='symbols per provider request')
+    args = parser.parse_args(argv)
+
+    end = args.end or date.today().isoformat()
+    t0 = time.perf_counter()
+    built, failed = build(read_universe(args.universe), args.start, end, args.interval, args.batch_size)
+    pruned = precomputed.prune(config.PRECOMPUTE_MAX_AGE)
+    print(f"{built} built, {failed} failed, {pruned} old rows dropped, {time.perf_counter() - t0:.1f}s",
+          file=sys.stderr)
+    return 0 if built or not failed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
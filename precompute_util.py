@@ -0,0 +1,85 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+import config
+from store_util import normalize_symbol
+
+# Precomputed FIND outputs of common symbols
+# A nightly job (precompute.py) writes the full callback outputs of every
+# symbol of a universe for the default window into one SQLite file, keyed on
+# (symbol, interval, start, end). Each row carries a digest of the stored bars
+# of its window (store_util.window_version) and the output schema, so a row is
+# only served while both match: top-ups that leave the window's bars alone
+# keep it valid. A hit is served without topping up the store, so callers
+# check needs_update first.
+
+# Bump when the FIND outputs change shape, old rows then stop matching
+SCHEMA_VERSION = 9
+
+
+def _window(symbol, interval, start, end):
+    return normalize_symbol(symbol), interval, pd.Timestamp(start).isoformat(), pd.Timestamp(end).isoformat()
+
+
+class PrecomputedIndex:
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per thread and per process (never reused after a fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS outputs ('
+                     'symbol TEXT, interval TEXT, start TEXT, end TEXT, '
+                     'store_version TEXT, schema INTEGER, built_at REAL, value BLOB, '
+                     'PRIMARY KEY (symbol, interval, start, end))')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, symbol, interval, start, end, version):
+        """Return (hit, outputs); rows built from other bars of the window or another schema are misses."""
+        row = self._connect().execute(
+            'SELECT value, store_version, schema FROM outputs '
+            'WHERE symbol = ? AND interval = ? AND start = ? AND end = ?',
+            _window(symbol, interval, start, end)).fetchone()
+        if row is None or row[2] != SCHEMA_VERSION or row[1] != version:
+            return False, None
+        return True, pickle.loads(row[0])
+
+    def contains(self, symbol, interval, start, end, version):
+        # Cheap check without loading the outputs
+        row = self._connect().execute(
+            'SELECT store_version, schema FROM outputs '
+            'WHERE symbol = ? AND interval = ? AND start = ? AND end = ?',
+            _window(symbol, interval, start, end)).fetchone()
+        return row is not None and row[1] == SCHEMA_VERSION and row[0] == version
+
+    def put(self, symbol, interval, start, end, version, outputs, built_at=None):
+        blob = pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL)
+        self._connect().execute('INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                _window(symbol, interval, start, end)
+                                + (version, SCHEMA_VERSION, built_at or time.time(), blob))
+
+    def prune(self, max_age):
+        # Drop rows of earlier builds (e.g. yesterday's window)
+        cur = self._connect().execute('DELETE FROM outputs WHERE built_at < ?', (time.time() - max_age,))
+        return cur.rowcount
+
+    def stats(self):
+        entries, size, last_build = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0), COALESCE(MAX(built_at), 0) FROM outputs').fetchone()
+        return {'entries': entries, 'bytes': size, 'last_build': last_build}
+
+
+precomputed = PrecomputedIndex(config.PRECOMPUTE_PATH)
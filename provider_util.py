@@ -0,0 +1,314 @@
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import config
+import metrics_util
+
+# Market data providers
+# Every provider returns flat OHLCV frames (Open, High, Low, Close, Volume
+# columns, tz-naive DatetimeIndex) for [start, end) and records the latency
+# of each call so upstream slowness can be told apart from our own.
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+BAR_LENGTH = {
+    '1m': pd.Timedelta(minutes=1),
+    '2m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '60m': pd.Timedelta(hours=1),
+    '90m': pd.Timedelta(minutes=90),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(days=1),
+}
+
+# Longest range fetched in one request per intraday interval; longer ranges
+# are split into chunks that are downloaded concurrently
+CHUNK_SPAN = {
+    '1m': pd.Timedelta(days=7),
+    '2m': pd.Timedelta(days=59),
+    '5m': pd.Timedelta(days=59),
+    '15m': pd.Timedelta(days=59),
+    '30m': pd.Timedelta(days=59),
+    '60m': pd.Timedelta(days=729),
+    '90m': pd.Timedelta(days=59),
+    '1h': pd.Timedelta(days=729),
+}
+
+
+def normalize_frame(data):
+    # Flat columns and a tz-naive (UTC) index, whatever the source returned
+    if data is None or data.empty:
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name='Date'), dtype='f8')
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy()
+        data.columns = data.columns.get_level_values(0)
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    frame = pd.DataFrame({col: data[col].to_numpy(dtype='f8') if col in data else np.nan for col in COLUMNS},
+                         index=index.rename('Date'))
+    return frame[~frame.index.duplicated(keep='last')].sort_index()
+
+
+def split_range(start, end, span=None, lookback=None, now=None):
+    """
+    Split [start, end) into consecutive (start, end) chunks of at most span,
+    dropping the part older than now - lookback that the source cannot serve.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if lookback is not None:
+        now = pd.Timestamp.now('UTC').tz_localize(None) if now is None else pd.Timestamp(now)
+        start = max(start, now - lookback)
+    chunks = []
+    while start < end:
+        stop = end if span is None else min(start + span, end)
+        chunks.append((start, stop))
+        start = stop
+    return chunks
+
+
+class Provider:
+
+    name = 'base'
+    chunk_span = CHUNK_SPAN
+    lookback = {}
+
+    def fetch(self, symbol, start, end, interval='1d'):
+        """OHLCV bars of one symbol for [start, end)."""
+        return self._timed(self._fetch, symbol, pd.Timestamp(start), pd.Timestamp(end), interval)
+
+    def fetch_many(self, symbols, start, end, interval='1d'):
+        """Dict of symbol -> OHLCV bars for [start, end), fetched as one batch where the source allows."""
+        return self._timed(self._fetch_many, list(symbols), pd.Timestamp(start), pd.Timestamp(end), interval)
+
+    def chunk_ranges(self, start, end, interval='1d'):
+        """Provider-sized (start, end) chunks covering the servable part of [start, end)."""
+        return split_range(start, end, self.chunk_span.get(interval), self.lookback.get(interval))
+
+    def _fetch(self, symbol, start, end, interval):
+        raise NotImplementedError
+
+    def _fetch_many(self, symbols, start, end, interval):
+        return {symbol: self._fetch(symbol, start, end, interval) for symbol in symbols}
+
+    def _timed(self, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception:
+            metrics_util.inc('vol_app_errors_total', stage='provider')
+            raise
+        finally:
+            metrics_util.observe('vol_app_provider_seconds', time.perf_counter() - t0, provider=self.name)
+
+
+class YFinanceProvider(Provider):
+
+    name = 'yfinance'
+    # Yahoo serves 1m bars for the last 30 days, other minute bars for 60 days
+    # and hourly bars for 730 days; a day of margin keeps requests inside the limit
+    lookback = {'1m': pd.Timedelta(days=29), '2m': pd.Timedelta(days=59), '5m': pd.Timedelta(days=59),
+                '15m': pd.Timedelta(days=59), '30m': pd.Timedelta(days=59), '90m': pd.Timedelta(days=59),
+                '60m': pd.Timedelta(days=729), '1h': pd.Timedelta(days=729)}
+
+    def __init__(self, retries=3, backoff=1.0):
+        import yfinance as yf
+
+        # Surface upstream errors instead of empty frames, so they can be retried
+        yf.config.debug.hide_exceptions = False
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        # One pooled HTTP session shared by every call of this process
+        with self._session_lock:
+            if self._session is None or self._session_pid != os.getpid():
+                from curl_cffi import requests as curl_requests
+
+                self._session = curl_requests.Session(impersonate='chrome')
+                self._session_pid = os.getpid()
+            return self._session
+
+    def _retry(self, fn):
+        import yfinance as yf
+        from yfinance.exceptions import YFTickerMissingError
+
+        for attempt in range(self.retries + 1):
+            try:
+                return fn(yf)
+            except YFTickerMissingError:
+                # Unknown symbol or no bars in the range, retrying will not help
+                return None
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _fetch(self, symbol, start, end, interval):
+        def history(yf):
+            return yf.Ticker(symbol, session=self.session).history(
+                start=start, end=end, interval=interval, auto_adjust=True, actions=False)
+        return normalize_frame(self._retry(history))
+
+    def _fetch_many(self, symbols, start, end, interval):
+        def download(yf):
+            return yf.download(symbols, start=start, end=end, interval=interval, group_by='ticker',
+                               auto_adjust=True, progress=False, threads=True, session=self.session)
+        data = self._retry(download)
+        if data is None:
+            data = pd.DataFrame()
+        frames = {}
+        for symbol in symbols:
+            frame = data[symbol] if isinstance(data.columns, pd.MultiIndex) and symbol in data.columns.get_level_values(0) else None
+            frame = normalize_frame(frame.dropna(how='all') if frame is not None else None)
+            # Symbols missing from the batch are retried one by one
+            frames[symbol] = frame if not frame.empty else self._fetch(symbol, start, end, interval)
+        return frames
+
+
+class LocalProvider(Provider):
+
+    name = 'local'
+    # Every read loads the whole file, so splitting would only read it again
+    chunk_span = {}
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, symbol, interval):
+        for name in (f"{symbol}_{interval}", symbol):
+            for ext in ('.parquet', '.csv'):
+                path = os.path.join(self.directory, name + ext)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def _fetch(self, symbol, start, end, interval):
+        path = self._path(symbol, interval)
+        if path is None:
+            return normalize_frame(None)
+        if path.endswith('.parquet'):
+            data = pd.read_parquet(path)
+        else:
+            data = pd.read_csv(path, index_col=0, parse_dates=True)
+        data = normalize_frame(data)
+        return data[(data.index >= start) & (data.index < end)]
+
+
+class SyntheticProvider(Provider):
+    """
+    Deterministic random-walk prices for benchmarks and offline runs. The
+    same symbol always gets the same bar for the same timestamp, so
+    overlapping fetches merge cleanly in the store.
+    """
+
+    name = 'synthetic'
+    ORIGIN = pd.Timestamp('1990-01-01')
+
+    def __init__(self, seed=0, daily_vol=0.012):
+        self.seed = seed
+        self.daily_vol = daily_vol
+
+    def _rng(self, *key):
+        return np.random.default_rng([self.seed, *key])
+
+    def _daily_path(self, symbol, n_days):
+        # Log close and overnight gap of every calendar day since ORIGIN,
+        # each from its own stream so a longer path keeps the same prefix
+        key = zlib.crc32(symbol.encode())
+        log_close = np.log(100) + np.cumsum(self._rng(key, 0).normal(0.0002, self.daily_vol, n_days))
+        gap = self._rng(key, 1).normal(0, self.daily_vol / 3, n_days)
+        return log_close, gap
+
+    def _fetch(self, symbol, start, end, interval):
+        start = max(start, self.ORIGIN)
+        if interval == '1d':
+            index = pd.bdate_range(start, end, inclusive='left')
+        else:
+            index = pd.date_range(start.normalize(), end, freq=BAR_LENGTH[interval], inclusive='left')
+            index = index[(index >= start) & (index.dayofweek < 5)]
+        if not len(index):
+            return normalize_frame(None)
+
+        day = ((index.normalize() - self.ORIGIN) // pd.Timedelta(days=1)).to_numpy()
+        log_close, gap = self._daily_path(symbol, int(day.max()) + 2)
+        prev_close = log_close[day - 1]
+
+        if interval == '1d':
+            close = log_close[day]
+            open_ = prev_close + gap[day]
+            rng = self._rng(zlib.crc32(symbol.encode()), 2)
+            wiggle = np.abs(rng.normal(0, self.daily_vol / 2, (len(log_close), 2)))[day].T
+        else:
+            # Intraday walk of each day, seeded by (symbol, day)
+            close = np.empty(len(index))
+            open_ = np.empty(len(index))
+            wiggle = np.empty((2, len(index)))
+            bar_vol = self.daily_vol * np.sqrt(BAR_LENGTH[interval] / pd.Timedelta(days=1))
+            bounds = np.flatnonzero(np.diff(day, prepend=-1, append=day[-1] + 1))
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                key = (zlib.crc32(symbol.encode()), 3, int(day[lo]))
+                bar_of_day = ((index[lo:hi] - index[lo].normalize()) // BAR_LENGTH[interval]).to_numpy()
+                n_bars = int(bar_of_day.max()) + 1
+                day_open = prev_close[lo] + gap[day[lo]]
+                walk = day_open + np.cumsum(self._rng(*key, 0).normal(0, bar_vol, n_bars))
+                close[lo:hi] = walk[bar_of_day]
+                open_[lo:hi] = np.concatenate([[day_open], walk[:-1]])[bar_of_day]
+                wiggle[:, lo:hi] = np.abs(self._rng(*key, 1).normal(0, bar_vol / 2, (n_bars, 2)))[bar_of_day].T
+
+        high = np.maximum(open_, close) + wiggle[0]
+        low = np.minimum(open_, close) - wiggle[1]
+        volume = np.round(np.exp(13 + 50 * np.abs(close - open_)))
+        return pd.DataFrame({'Open': np.exp(open_), 'High': np.exp(high), 'Low': np.exp(low),
+                             'Close': np.exp(close), 'Volume': volume}, index=index.rename('Date'))
+
+
+def synthetic_ohlcv(n_rows, seed=0, freq='1min', start='2000-01-03', daily_vol=0.012):
+    """
+    Seeded OHLCV frame with exactly n_rows bars, for benchmarks that need a
+    given size rather than a given date range.
+    """
+    rng = np.random.default_rng(seed)
+    bar_vol = daily_vol * np.sqrt(pd.Timedelta(freq) / pd.Timedelta(days=1))
+    close = np.log(100) + np.cumsum(rng.normal(0, bar_vol, n_rows))
+    open_ = np.concatenate([[np.log(100)], close[:-1]]) + rng.normal(0, bar_vol / 3, n_rows)
+    wiggle = np.abs(rng.normal(0, bar_vol / 2, (2, n_rows)))
+    index = pd.date_range(start, periods=n_rows, freq=freq, name='Date')
+    return pd.DataFrame({'Open': np.exp(open_),
+                         'High': np.exp(np.maximum(open_, close) + wiggle[0]),
+                         'Low': np.exp(np.minimum(open_, close) - wiggle[1]),
+                         'Close': np.exp(close),
+                         'Volume': np.round(rng.lognormal(13, 1, n_rows))}, index=index)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def make_provider(name):
+    if name == 'yfinance':
+        return YFinanceProvider(config.FETCH_RETRIES, config.FETCH_BACKOFF)
+    if name == 'local':
+        return LocalProvider(config.LOCAL_DATA_DIR)
+    if name == 'synthetic':
+        return SyntheticProvider(config.SYNTHETIC_SEED)
+    raise ValueError(f"Unknown data provider '{name}'")
+
+
+def get_provider():
+    # Provider selected by VOL_APP_PROVIDER, created once per process
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = make_provider(config.PROVIDER)
+        return _provider
@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+
+from store_util import normalize_symbol, read_meta, read_records
+
+# Prefix-sum index over a stored symbol history
+# Any [start, end) window is answered in O(1) after two binary searches.
+
+SERIES = ('close', 'h_l', 'o_c')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _shift(values):
+    # Mean of the whole series; sums of squares are taken around it so a
+    # window's variance does not cancel catastrophically when its std is
+    # small next to its mean
+    valid = ~np.isnan(values)
+    return float(values[valid].mean()) if valid.any() else 0.0
+
+
+def _prefix(values, shift):
+    # Cumulative count, shifted sums and squares, and positive/negative splits with a leading zero row
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+    d = np.where(valid, values - shift, 0.0)
+    parts = np.stack([valid, d, d * d, x > 0, x < 0, np.where(x > 0, x, 0.0), np.where(x < 0, x, 0.0)])
+    out = np.zeros((parts.shape[0], len(values) + 1))
+    np.cumsum(parts, axis=1, out=out[:, 1:])
+    return out
+
+
+class PrefixIndex:
+
+    def __init__(self, ts, open_, high, low, close):
+        self.ts = np.asarray(ts, dtype='i8')
+        self.close = np.asarray(close, dtype='f8')
+        close_ret = np.full(len(self.close), np.nan)
+        close_ret[1:] = np.log(self.close[1:] / self.close[:-1])
+        h_l = np.asarray(high, dtype='f8') / np.asarray(low, dtype='f8') - 1
+        o_c = np.asarray(open_, dtype='f8') / self.close - 1
+        series = (close_ret, h_l, o_c)
+        self.shift = np.array([_shift(x) for x in series])
+        # Shape (7, n_series, n + 1): count, shifted sum and sum of squares, pos/neg count, pos/neg sum
+        self.prefix = np.stack([_prefix(x, k) for x, k in zip(series, self.shift)], axis=1)
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(records['ts'], records['Open'], records['High'], records['Low'], records['Close'])
+
+    def __len__(self):
+        return len(self.ts)
+
+    def positions(self, start_ns, end_ns):
+        return tuple(int(i) for i in np.searchsorted(self.ts, [start_ns, end_ns], side='left'))
+
+    def query_positions(self, lo, hi):
+        """
+        Statistics of bars [lo, hi) in the stats_util.return_stats layout
+        (one value per series in SERIES order) plus the cumulative return.
+        """
+        lo, hi = max(lo, 0), min(hi, len(self.ts))
+        # The first close return of a window needs the previous close, so it is left out
+        starts = np.array([min(lo + 1, hi), lo, lo])
+        cnt, s1, s2, pos_cnt, neg_cnt, pos_sum, neg_sum = (
+            self.prefix[:, np.arange(len(SERIES)), hi] - self.prefix[:, np.arange(len(SERIES)), starts])
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shifted_mean = s1 / cnt
+            mean = self.shift + shifted_mean
+            std = np.sqrt(np.maximum(s2 - s1 * shifted_mean, 0.0) / (cnt - 1))
+            cumulative = self.close[hi - 1] / self.close[lo] - 1 if hi > lo else np.nan
+            return {
+                "count": cnt.astype('i8'),
+                "mean": mean,
+                "std": std,
+                "pos_count": pos_cnt.astype('i8'),
+                "neg_count": neg_cnt.astype('i8'),
+                "pos_mean": pos_sum / pos_cnt,
+                "neg_mean": neg_sum / neg_cnt,
+                "pos_perc": pos_cnt / cnt * 100,
+                "neg_perc": neg_cnt / cnt * 100,
+                "cumulative": cumulative,
+            }
+
+
+def get_index(symbol, interval='1d', store_dir=None):
+    # Cached index of the full stored history, rebuilt whenever the store is rewritten
+    symbol = normalize_symbol(symbol)
+    meta = read_meta(symbol, interval, store_dir)
+    if meta is None:
+        return None
+    key = (symbol, interval, store_dir)
+    version = (meta['start'], meta['end'], meta.get('fetched_at'))
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    index = PrefixIndex.from_records(read_records(symbol, interval, store_dir))
+    with _cache_lock:
+        _cache[key] = (version, index)
+    return index
@@ -0,0 +1,33 @@
+from dash import html, dcc
+from hist_util import hist_bins
+from stats_util import STD_LEVELS
+
+# Histogram controls module
+# Bin width, range and σ lines are applied in the browser (assets/rebin.js)
+# from the sorted returns kept in the panel's store.
+
+INPUT_STYLE = {'width': '70px', 'padding': '2px 5px', 'border': 'none', 'borderRadius': '3px'}
+LABEL_STYLE = {'color': '#e7e8e6ff', 'fontSize': '13px', 'margin': '0 4px'}
+
+
+def rebin_controls(prefix):
+    start, end, size, _ = hist_bins('1d')[prefix]
+    return html.Div([
+        # Sorted returns (float32, percent, base64) sent with every FIND
+        dcc.Store(id=f'{prefix}-returns'),
+        html.Span('Bin %', style=LABEL_STYLE),
+        dcc.Input(id=f'{prefix}-bin-width', type='number', value=size, min=0.01, step=0.01, debounce=True,
+                  style=INPUT_STYLE),
+        html.Span('Range %', style=LABEL_STYLE),
+        dcc.Input(id=f'{prefix}-bin-min', type='number', value=start, debounce=True, style=INPUT_STYLE),
+        dcc.Input(id=f'{prefix}-bin-max', type='number', value=end, debounce=True, style=INPUT_STYLE),
+        dcc.Checklist(
+            id=f'{prefix}-sigma',
+            options=[{'label': f' {k}σ', 'value': k} for k in STD_LEVELS],
+            value=list(STD_LEVELS),
+            inline=True,
+            style=LABEL_STYLE,
+            inputStyle={'marginLeft': '6px'}
+        ),
+    ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center',
+              'padding': '5px', 'backgroundColor': '#20374c', 'borderRadius': '3px', 'marginTop': '5px'})
@@ -1,212 +1,1013 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from dash import Dash, html, dcc, Input, Output, State, dash_table, no_update
+from dash import Dash, html, dcc, Input, Output, State, dash_table, no_update, Patch, ClientsideFunction
 import dash_bootstrap_components as dbc
 from datetime import date
+from urllib.parse import quote
+from flask import Response, request as flask_request
+import config
 from plotly.subplots import make_subplots
 from close_layout import close_return_output
 from high_low_layout import high_low_return_output
 from o_c_layout import open_close_return_output
+from vol_layout import volatility_estimator_output, estimator_columns
+from compare_layout import compare_output
+from corr_layout import correlation_output
+from horizon_layout import horizon_return_output
+from group_layout import conditional_output
+from ci_layout import confidence_output
+from tail_layout import tail_output
 from close_util import close_return_calc
-from h_l_util import h_l_return_calc
+from h_l_util import h_l_return_calc, h_l_stats_table
 from o_c_util import o_c_return_calc
+from ohlcv_util import OHLCV, column
+from store_util import (load_history, update_store, store_version, window_version, needs_update,
+                        normalize_symbol, split_symbols, read_range)
+from stream_util import stream_history, SERIES, chunk_series
+from live_util import live_stats, live_key
+from stats_util import stats_table, std_table
+from range_util import get_index
+from hist_util import bin_returns, histogram_figure, hist_bins, band_shapes, encode_sorted, overlay_figure, \
+    heatmap_figure, horizon_bins, fan_figure, grouped_bin_counts, binned_result, small_multiples_figure
+from cache_util import result_cache, make_key
+from precompute_util import precomputed
+from estimator_util import estimate_volatility, volatility_table, asset_class
+from compare_util import compare_stats, compare_table, check_symbols
+from corr_util import correlation_result
+from horizon_util import horizon_stats
+from group_util import GROUPINGS, group_codes, grouped_stats, group_table
+from sketch_util import window_sketches, tail_table
+from bootstrap_util import bootstrap, confidence_intervals, point_stats, ci_table, simulate_paths, path_quantiles
+from batch import fetch_batch
+from job_util import background_callback_manager, job_cache, job_slots, QueueFull, BUSY
+from metrics_util import timer, observe, inc, render, sampled_profile
 
-# Initialize the Dash app
-app = Dash(external_stylesheets=[dbc.themes.SUPERHERO])
+# Initialize the Dash app (FIND runs as a background job outside the web workers)
+app = Dash(__name__, external_stylesheets=[dbc.themes.SUPERHERO],
+           background_callback_manager=background_callback_manager)
 server = app.server
+
+INTERVALS = [('Daily', '1d'), ('1 Hour', '1h'), ('15 Min', '15m'), ('5 Min', '5m'), ('1 Min', '1m')]
+
 # --- App Layout ---
-app.layout = html.Div(
-    style={'fontFamily': 'Arial, sans-serif', 
-           'width':'100%',
-           'maxHeigh':'100%', 
-           'margin': 'auto', 
-           'padding': '20px', 
-           'backgroundColor': "#0f2537"},
-    children=[
+def serve_layout():
+    # Built per page load, so the default end date is today rather than the day the worker started
+    return html.Div(
+        style={'fontFamily': 'Arial, sans-serif', 
+               'width':'100%',
+               'maxHeigh':'100%', 
+               'margin': 'auto', 
+               'padding': '20px', 
+               'backgroundColor': "#0f2537"},
+        children=[
         
-    # Header
-    html.H1(
-        children='Daily Return Distribution and Statistics (Indices-Stocks-FX-Rates-Commodities-Crypto)',
-        style={'textAlign': 'center', 
-               'fontSize':'20px', 
-               'color': '#e7e8e6ff',
-               'marginBottom': '20px',
-              }
-    ),  
-
-    html.Div(style={'display': 'flex', 
-                    'alignItems': 'center', 
-                    'justifyContent': 'space-between', 
-                    'padding': '10px', 
-                    'width':'600px',
-                    'heigh':'100%', 
-                    'backgroundColor': "#20374c", 
-                    'borderRadius': '3px', 
-                    'marginBottom':'10px'}, 
+        # Header
+        html.H1(
+            children='Daily Return Distribution and Statistics (Indices-Stocks-FX-Rates-Commodities-Crypto)',
+            style={'textAlign': 'center', 
+                   'fontSize':'20px', 
+                   'color': '#e7e8e6ff',
+                   'marginBottom': '20px',
+                  }
+        ),  
+
+        html.Div(style={'display': 'flex', 
+                        'alignItems': 'center', 
+                        'justifyContent': 'space-between', 
+                        'padding': '10px', 
+                        'width':'700px',
+                        'heigh':'100%', 
+                        'backgroundColor': "#20374c", 
+                        'borderRadius': '3px', 
+                        'marginBottom':'10px'}, 
              
-             children=[
-        # Ticker Symbol Input
-        dcc.Input(
-            id='stock-ticker-input',
-            type='text',
-            value='Ticker',  # Default value
-            style={'padding': '10px 15px', 
-                   'fontSize': '18px', 
-                   'border':'none', 
-                   'borderRadius': '3px',
-                   'width':'150px'}
-        ),
-
-        # Date Range Picker
-        dcc.DatePickerRange(
-            id='date-picker-range',
-            start_date="2018-01-01",
-            end_date="2025-08-30",
-            display_format='YYYY-MM-DD',
-            style={'fontSize': '10px', 'borderRadius': '3px'}
-        ),
-
-        # Submit Button
-        html.Button('FIND', id='submit-button', n_clicks=0, style={
-            'backgroundColor': "#df6919",
-            'color': 'white',
-            'border': 'none',
-            'padding': '10px 15px',
-            'borderRadius': '3px',
-            'cursor': 'pointer',
-            'fontSize': '15px'
-        }),
+                 children=[
+            # Ticker Symbol Input
+            dcc.Input(
+                id='stock-ticker-input',
+                type='text',
+                value='Ticker',  # Default value
+                style={'padding': '10px 15px', 
+                       'fontSize': '18px', 
+                       'border':'none', 
+                       'borderRadius': '3px',
+                       'width':'150px'}
+            ),
+
+            # Date Range Picker
+            dcc.DatePickerRange(
+                id='date-picker-range',
+                start_date=config.DEFAULT_START,
+                end_date=date.today().isoformat(),
+                display_format='YYYY-MM-DD',
+                style={'fontSize': '10px', 'borderRadius': '3px'}
+            ),
+
+            # Bar Interval (intraday history is limited by the data source)
+            dcc.Dropdown(
+                id='interval-dropdown',
+                options=[{'label': label, 'value': value} for label, value in INTERVALS],
+                value='1d',
+                clearable=False,
+                style={'width': '90px', 'color': '#0f2537'}
+            ),
+
+            # Submit Button
+            html.Button('FIND', id='submit-button', n_clicks=0, style={
+                'backgroundColor': "#df6919",
+                'color': 'white',
+                'border': 'none',
+                'padding': '10px 15px',
+                'borderRadius': '3px',
+                'cursor': 'pointer',
+                'fontSize': '15px'
+            }),
+
+            # Live Mode (distributions tick while the last bar is forming)
+            dcc.Checklist(
+                id='live-toggle',
+                options=[{'label': ' Live', 'value': 'live'}],
+                value=[],
+                style={'color': '#e7e8e6ff', 'fontSize': '15px'}
+            ),
         
-    ]),
-    # Symbol Return Output 
-    html.Div(id='cumulative-return-output',
-        style={'textAlign': 'left', 'marginTop': '20px','marginBottom': '40px', 'paddingLeft': 'inherit', 'fontSize': '1.2em' , 'color': "#d7f93eff"}),
+        ]),
+        # FIND progress (fetching -> computing -> rendering), shown while the job runs
+        html.Div(id='find-progress-container', style={'width': '600px', 'display': 'none'}, children=[
+            dbc.Progress(id='find-progress', value=0, label='', striped=True, animated=True,
+                         style={'height': '18px', 'marginBottom': '10px'}),
+        ]),
+        # Request handed from the FIND click to the background job, and the
+        # reference to the shared result the panels load from
+        dcc.Store(id='find-request'),
+        dcc.Store(id='find-result'),
+        # Live mode ticks; live-state remembers which window the figures were last drawn for
+        dcc.Interval(id='live-interval', interval=config.LIVE_INTERVAL_MS, disabled=True),
+        dcc.Store(id='live-state'),
+        html.Div(id='live-output',
+            style={'textAlign': 'left', 'paddingLeft': '25px', 'fontSize': '0.9em', 'color': '#d7f93eff'}),
+        # Window slider over the loaded history (answered from the prefix-sum index)
+        html.Div(style={'width': '600px', 'marginTop': '10px'}, children=[
+            dcc.RangeSlider(id='window-slider', min=0, max=1, step=1, value=[0, 1], marks=None, allowCross=False),
+            html.Div(id='window-return-output',
+                style={'textAlign': 'left', 'paddingLeft': '25px', 'fontSize': '0.9em', 'color': '#e7e8e6ff'}),
+        ]),
+        # Symbol Return Output 
+        html.Div(id='cumulative-return-output',
+            style={'textAlign': 'left', 'marginTop': '20px','marginBottom': '40px', 'paddingLeft': 'inherit', 'fontSize': '1.2em' , 'color': "#d7f93eff"}),
     
-    html.Div([
-    close_return_output(),
-    high_low_return_output(),
-    open_close_return_output(),
+        html.Div([
+        close_return_output(),
+        high_low_return_output(),
+        open_close_return_output(),
     
-    ], style={'display':'flex', 'justifyContent':'space-evenly', 'flexWrap':'wrap'})
-
-])
-
-
-# --- Callback to connect inputs to outputs ---
-@app.callback(
-    [Output('close-histogram', 'figure'),
-     Output('high_low', 'figure'),
-     Output('open_close', 'figure'),
-     Output('close_stats-table', 'data'),
-     Output('close_stats-table', 'columns'),
-     Output('close_std-table', 'data'),
-     Output('close_std-table', 'columns'),
-     Output('h_l_stats-table', 'data'),
-     Output('h_l_stats-table', 'columns'),
-     Output('h_l_std-table', 'data'),
-     Output('h_l_std-table', 'columns'),
-     Output('o_c_stats-table', 'data'),
-     Output('o_c_stats-table', 'columns'),
-     Output('o_c_std-table', 'data'),
-     Output('o_c_std-table', 'columns'),
-     Output('cumulative-return-output', 'children')],
+        ], style={'display':'flex', 'justifyContent':'space-evenly', 'flexWrap':'wrap'}),
+
+        volatility_estimator_output(),
+
+        tail_output(),
+
+        horizon_return_output(),
+
+        conditional_output(),
+
+        confidence_output(),
+
+        compare_output(),
+
+        correlation_output(),
+
+    ])
+
+
+app.layout = serve_layout
+
+
+# --- Callbacks: FIND computes one shared result, each panel loads its own part ---
+PANELS = {'close': ('close-histogram', 'close_stats-table', 'close_std-table'),
+          'h_l': ('high_low', 'h_l_stats-table', 'h_l_std-table'),
+          'o_c': ('open_close', 'o_c_stats-table', 'o_c_std-table')}
+
+
+@app.callback(
+    [Output('find-result', 'data', allow_duplicate=True),
+     Output('find-request', 'data')],
     [Input('submit-button', 'n_clicks')],
     [State('stock-ticker-input', 'value'),
      State('date-picker-range', 'start_date'),
-     State('date-picker-range', 'end_date')]
+     State('date-picker-range', 'end_date'),
+     State('interval-dropdown', 'value'),
+     State('find-result', 'data')],
+    prevent_initial_call=True
+)
+def serve_precomputed(n_clicks, ticker_symbol, start_date, end_date, interval='1d', previous=None):
+    """
+    Triggered when the find button is clicked. Common symbols over the
+    default window are served from the nightly precomputed index without
+    starting a job; anything else is handed to the background job, unless
+    the job slots are full.
+    """
+    symbol_class = asset_class(ticker_symbol or "")
+    inc('vol_app_requests_total', symbol_class=symbol_class)
+    # Once figures are drawn, panels only patch their traces and keep the template
+    drawn = bool(previous) and ('message' not in previous or previous.get('drawn', False))
+    if ticker_symbol and start_date and end_date:
+        # A store that needs a top-up goes to the job, so a hit is never older than the store allows
+        with timer('precomputed_lookup', symbol_class=symbol_class):
+            version = None
+            if not needs_update(ticker_symbol, start_date, end_date, interval):
+                version = window_version(ticker_symbol, start_date, end_date, interval)
+            hit = version is not None and precomputed.contains(ticker_symbol, interval, start_date, end_date, version)
+        if hit:
+            return {'source': 'precomputed', 'window': [ticker_symbol, interval, start_date, end_date],
+                    'version': version, 'drawn': drawn}, no_update
+    if job_slots.full():
+        return message_result(BUSY, drawn), no_update
+    request = {'n_clicks': n_clicks, 'ticker': ticker_symbol, 'start': start_date, 'end': end_date,
+               'interval': interval, 'drawn': drawn}
+    return no_update, request
+
+
+@app.callback(
+    Output('find-result', 'data'),
+    [Input('find-request', 'data')],
+    background=True,
+    progress=[Output('find-progress', 'value'), Output('find-progress', 'label')],
+    running=[(Output('find-progress-container', 'style'),
+              {'width': '600px', 'display': 'block'}, {'width': '600px', 'display': 'none'})],
+    prevent_initial_call=True
 )
 
 
 # --- Main Functions ---
-def update_graph(n_clicks, ticker_symbol, start_date, end_date):
+def update_graph(set_progress, request):
     """
-    This function is triggered when the find button is clicked.
-    It downloads stock data, calculates returns, and creates a histogram.
+    It runs as a background job for every FIND the precomputed index cannot
+    answer: tops up the local store and makes sure the result is in the
+    shared result cache, computing it only on a miss. Returns a small
+    reference to the result; the panels load their parts from the cache.
+    Clicking FIND again while a job runs cancels it.
     """
-    # Prevent the callback from firing on initial load
-    if n_clicks == 0:
-     return go.Figure(), go.Figure(),go.Figure(), [],[],[],[],[],[]
-
+    ticker_symbol, start_date, end_date = request['ticker'], request['start'], request['end']
+    interval = request.get('interval') or '1d'
+    drawn = request.get('drawn', False)
+    symbol_class = asset_class(ticker_symbol or "")
     try:
-        # Download stock data using yfinance
-        data = yf.download(ticker_symbol, start=start_date, end=end_date, interval="1d")
+        with sampled_profile(quote(normalize_symbol(ticker_symbol or ""), safe='')), \
+                timer('total', symbol_class=symbol_class):
+            with timer('queue', symbol_class=symbol_class):
+                job_slots.acquire(on_wait=lambda ahead: set_progress((0, f"queued ({ahead} ahead)")))
+            try:
+                # Top up the local store, fetching only missing ranges
+                set_progress((10, "fetching"))
+                with timer('fetch', symbol_class=symbol_class):
+                    update_store(ticker_symbol, start_date, end_date, interval=interval)
 
-        if data.empty:
-            return go.Figure(),go.Figure(),go.Figure(), f"No data found for symbol '{ticker_symbol}'. Please check the ticker."
-        
-       
-        # Close Return Module Import
-        returns, close_stats_data, close_stats_columns, close_std_data, close_std_columns = close_return_calc(data)
-        h_l_result = h_l_return_calc(data)
-        o_c_result = o_c_return_calc(data)
-        
-        
-        
-        # Calculate Cumulative Return
-        first_price = data['Close'].iloc[0].item()
-        last_price = data['Close'].iloc[-1].item()
-        cumulative_return = ((last_price / first_price) - 1) * 100
-        cumulative_return_text = f"{ticker_symbol.upper()} Total Return : {cumulative_return:.2f}%"
-      
-       # Close fig
-        close_fig = go.Figure()
-        close_fig.add_trace(go.Histogram(
-            x=returns * 100,
-            marker_color='#007BFF',
-            opacity=0.8,
-            xbins=dict(start=-12, end=12, size=0.5),
-            name="Daily Log Returns"
-        ))
-        close_fig.update_layout(
-            template='plotly_white',
-            bargap=0.05,
-            margin=dict(l=20, r=20, t=30, b=20),
-            xaxis=dict(dtick=2)
-            ) 
-
-        # High to Low fig
-        h_l_fig = go.Figure()
-        h_l_fig.add_trace(go.Histogram(
-            x=h_l_result['h_l']*100,
-            marker_color="#00FF59",
-            opacity=0.8,
-            xbins=dict(start=0, end=20, size=1),
-            name="High Low"
-        ))
-        h_l_fig.update_layout(
-            template='plotly_dark',
-            bargap=0.05,
-            margin=dict(l=20, r=20, t=30, b=20)
-            )
-        # Open to Close fig
-        o_c_fig = go.Figure()
-        o_c_fig.add_trace(go.Histogram(
-            x=o_c_result['o_c']*100,
-            marker_color="#00FF59",
-            opacity=0.8,
-            xbins=dict(start=-12, end=12, size=0.5),
-            name="Open Close"
-        ))
-        o_c_fig.update_layout(
-            template='plotly_dark',
-            bargap=0.05,
-            margin=dict(l=20, r=20, t=30, b=20),
-            xaxis=dict(dtick=2)
-            )
-        
+                # Normalized inputs plus the store version, so new bars invalidate old results
+                key = make_key(normalize_symbol(ticker_symbol),
+                               pd.Timestamp(start_date).isoformat(), pd.Timestamp(end_date).isoformat(), interval,
+                               store_version(ticker_symbol, interval))
+                with timer('cache_lookup', symbol_class=symbol_class):
+                    hit, result = result_cache.get(key)
+                if not hit:
+                    result = compute_outputs(ticker_symbol, start_date, end_date, set_progress, interval)
+                    if 'message' in result:
+                        return dict(result, drawn=drawn)
+                    with timer('cache_store', symbol_class=symbol_class):
+                        result_cache.set(key, result)
+            finally:
+                job_slots.release()
+            return {'source': 'cache', 'key': key, 'interval': interval, 'drawn': drawn}
 
-        return (close_fig, h_l_fig, o_c_fig,
-                close_stats_data, close_stats_columns, close_std_data, close_std_columns,
-                h_l_result['h_l_stats_data'],h_l_result['h_l_stats_columns'], h_l_result['h_l_std_data'],h_l_result['h_l_std_columns'],
-                o_c_result['o_c_stats_data'],o_c_result['o_c_stats_columns'], o_c_result['o_c_std_data'],o_c_result['o_c_std_columns'],
-                cumulative_return_text)
-               
+    except QueueFull as e:
+        return message_result(str(e), drawn)
     except Exception as e:
         #error handling
         error_message = f"An error occurred: {e}"
-        return go.Figure(),go.Figure(), go.Figure(), f"{error_message}: {e}"
+        return message_result(error_message, drawn)
+
+
+def message_result(message, drawn=False):
+    # Panels stay as they are and the message shows in place of the total return
+    return {'message': message, 'drawn': drawn}
+
+
+def load_result(ref):
+    # The shared result a find-result reference points to, None when missing or expired
+    if not ref or 'message' in ref:
+        return None
+    if ref['source'] == 'precomputed':
+        hit, result = precomputed.get(*ref['window'], ref['version'])
+    else:
+        hit, result = result_cache.get(ref['key'], count=False)
+    return result if hit else None
+
+
+def register_panel(name, graph_id, stats_id, std_id):
+    # One callback per panel, so each renders as soon as its own response arrives
+    @app.callback(
+        [Output(graph_id, 'figure'),
+         Output(stats_id, 'data'),
+         Output(std_id, 'data'),
+         Output(f'{name}-returns', 'data'),
+         Output(f'{name}-bin-width', 'value'),
+         Output(f'{name}-bin-min', 'value'),
+         Output(f'{name}-bin-max', 'value')],
+        [Input('find-result', 'data')],
+        prevent_initial_call=True
+    )
+    def update_panel(ref):
+        result = load_result(ref)
+        if result is None:
+            return (no_update,) * 7
+        panel = result[name]
+        figure = figure_patch(panel['figure']) if ref.get('drawn') else panel['figure']
+        # The re-binning controls start from the server's bins of this result
+        start, end, size = panel.get('bins', (no_update,) * 3)
+        return figure, panel['stats'], panel['std'], panel.get('returns'), size, start, end
+
+    # Bin width, range and σ lines are redrawn in the browser from the sorted returns
+    app.clientside_callback(
+        ClientsideFunction(namespace='volApp', function_name='rebin'),
+        Output(graph_id, 'figure', allow_duplicate=True),
+        [Input(f'{name}-returns', 'data'),
+         Input(f'{name}-bin-width', 'value'),
+         Input(f'{name}-bin-min', 'value'),
+         Input(f'{name}-bin-max', 'value'),
+         Input(f'{name}-sigma', 'value')],
+        [State(graph_id, 'figure')],
+        prevent_initial_call=True
+    )
+    return update_panel
+
+
+for panel_name, panel_ids in PANELS.items():
+    register_panel(panel_name, *panel_ids)
+
+
+@app.callback(
+    [Output('vol-estimator-table', 'data'),
+     Output('vol-estimator-table', 'columns'),
+     Output('tail-table', 'data'),
+     Output('cumulative-return-output', 'children')],
+    [Input('find-result', 'data')],
+    prevent_initial_call=True
+)
+def update_summary(ref):
+    if ref and 'message' in ref:
+        return no_update, no_update, no_update, ref['message']
+    result = load_result(ref)
+    if result is None:
+        return no_update, no_update, no_update, "The result is no longer cached, please press FIND again."
+    interval = ref['window'][1] if ref['source'] == 'precomputed' else ref.get('interval', '1d')
+    return result['vol'], estimator_columns(interval), result.get('tails', []), result['cumulative']
+
+
+def figure_patch(figure):
+    # Trace, σ lines and axis of a histogram without resending the template
+    patch = Patch()
+    patch['data'] = figure['data']
+    patch['layout']['shapes'] = figure['layout']['shapes']
+    patch['layout']['xaxis'] = figure['layout'].get('xaxis', {})
+    return patch
+
+
+def compute_outputs(ticker_symbol, start_date, end_date, set_progress=None, interval='1d'):
+    result = compute_panels(ticker_symbol, start_date, end_date, set_progress, interval)
+    if 'message' not in result:
+        # Tail statistics from monthly quantile sketches, merged instead of rescanned
+        with timer('tails', symbol_class=asset_class(ticker_symbol)):
+            result['tails'] = tail_table(window_sketches(ticker_symbol, start_date, end_date, interval))
+    return result
+
+
+def compute_panels(ticker_symbol, start_date, end_date, set_progress=None, interval='1d'):
+    if interval != '1d':
+        # Intraday history can run to millions of bars, so it is streamed from the store in chunks
+        with timer('stream', symbol_class=asset_class(ticker_symbol)):
+            result = stream_history(ticker_symbol, start_date, end_date, interval, hist_bins(interval))
+        if result is None:
+            return message_result(f"No {interval} data found for symbol '{ticker_symbol}' in this range.")
+        return build_streamed_outputs(result, ticker_symbol, interval)
+
+    # Read stock data from the local store
+    with timer('load', symbol_class=asset_class(ticker_symbol)):
+        data = load_history(ticker_symbol, start_date, end_date, interval="1d", offline=True)
+
+    if not len(data):
+        return message_result(f"No data found for symbol '{ticker_symbol}'. Please check the ticker.")
+    return build_outputs(data, ticker_symbol, set_progress)
+
+
+def build_outputs(data, ticker_symbol, set_progress=None):
+    set_progress = set_progress or (lambda progress: None)
+    symbol_class = asset_class(ticker_symbol)
+    
+   
+    # Close Return Module Import
+    set_progress((40, "computing"))
+    with timer('close_calc', symbol_class=symbol_class):
+        returns, close_stats_data, _, close_std_data, _, close_stats = close_return_calc(data)
+    with timer('h_l_calc', symbol_class=symbol_class):
+        h_l_result = h_l_return_calc(data)
+    with timer('o_c_calc', symbol_class=symbol_class):
+        o_c_result = o_c_return_calc(data)
+    
+    
+    
+    # Calculate Cumulative Return
+    close = column(data, 'Close')
+    first_price = close[0].item()
+    last_price = close[-1].item()
+    cumulative_return = ((last_price / first_price) - 1) * 100
+    cumulative_return_text = f"{ticker_symbol.upper()} Total Return : {cumulative_return:.2f}%"
+
+    # Range-based volatility estimators
+    with timer('estimators', symbol_class=symbol_class):
+        vol_data = volatility_table(estimate_volatility(data, ticker_symbol, "1d"))
+  
+    # Histograms binned on the server, only bin counts go to the browser
+    set_progress((75, "rendering"))
+    bins = hist_bins("1d")
+    with timer('figures', symbol_class=symbol_class):
+        close_fig, h_l_fig, o_c_fig = histogram_figures(
+            {"close": _bin(returns, close_stats, bins["close"]),
+             "h_l": _bin(h_l_result['h_l'], h_l_result['h_l_stats'], bins["h_l"]),
+             "o_c": _bin(o_c_result['o_c'], o_c_result['o_c_stats'], bins["o_c"])},
+            bins, "Daily")
+
+    # Close returns over longer horizons, all from one log-price array
+    with timer('horizons', symbol_class=symbol_class):
+        horizons = horizon_outputs(close)
+
+    # Statistics by weekday, month and volatility regime, all groups in one pass each
+    with timer('groups', symbol_class=symbol_class):
+        groups = group_outputs(data)
+
+    # Sorted returns for re-binning in the browser
+    with timer('encode', symbol_class=symbol_class):
+        encoded = {name: encode_sorted(values, max_values=config.CLIENT_RETURNS_MAX)
+                   for name, values in (("close", returns), ("h_l", h_l_result['h_l']), ("o_c", o_c_result['o_c']))}
+
+    # Column specs are static in the layout modules, only the rows are kept
+    return {
+        'close': {'figure': close_fig, 'stats': close_stats_data, 'std': close_std_data,
+                  'returns': encoded["close"], 'bins': bins["close"][:3]},
+        'h_l': {'figure': h_l_fig, 'stats': h_l_result['h_l_stats_data'], 'std': h_l_result['h_l_std_data'],
+                'returns': encoded["h_l"], 'bins': bins["h_l"][:3]},
+        'o_c': {'figure': o_c_fig, 'stats': o_c_result['o_c_stats_data'], 'std': o_c_result['o_c_std_data'],
+                'returns': encoded["o_c"], 'bins': bins["o_c"][:3]},
+        'vol': vol_data,
+        'cumulative': cumulative_return_text,
+        'horizons': horizons,
+        'groups': groups,
+    }
+
+
+def _bin(values, stats, bins, j=0):
+    # Histogram with the σ lines of the statistics already computed for the table
+    return bin_returns(values, *bins[:3], mean=stats['mean'][j], std=stats['std'][j])
+
+
+def horizon_outputs(close):
+    # {mode: {horizon: {'figure', 'stats', 'std'}}} for the horizon selector
+    values, stats, columns = horizon_stats(close)
+    horizons = {}
+    for j, (mode, h) in enumerate(columns):
+        start, end, size, dtick = horizon_bins(h)
+        binned = bin_returns(values[:, j], start, end, size, mean=stats['mean'][j], std=stats['std'][j])
+        figure = histogram_figure(binned, f"{h}-Day Log Returns", '#007BFF', 'plotly_white', dtick=dtick)
+        horizons.setdefault(mode, {})[h] = {'figure': figure, 'stats': stats_table(stats, j),
+                                            'std': std_table(stats, j), 'count': int(stats['count'][j])}
+    return horizons
+
+
+def group_outputs(data):
+    # {grouping: {series: {'figure', 'table', 'count'}}} for the breakdown selectors
+    if not isinstance(data, OHLCV):
+        data = OHLCV.from_frame(data)
+    values = chunk_series(data)
+    bins = hist_bins("1d")
+    groups = {}
+    for by in GROUPINGS:
+        codes, labels = group_codes(data['ts'], values[:, 0], by)
+        stats = grouped_stats(values, codes, len(labels))
+        for j, name in enumerate(SERIES):
+            start, end, size, dtick = bins[name]
+            x = values[:, j]
+            valid = ~np.isnan(x)
+            counts = grouped_bin_counts(x[valid] * 100, codes[valid], len(labels), start, end, size)
+            shown = [g for g in range(len(labels)) if stats['count'][g, j]]
+            binned = [binned_result(counts[g], start, size, stats['mean'][g, j] * 100, stats['std'][g, j] * 100)
+                      for g in shown]
+            figure = small_multiples_figure(binned, [labels[g] for g in shown], '#007BFF', 'plotly_white',
+                                            cols=4 if len(shown) > 3 else 3, dtick=dtick)
+            groups.setdefault(by, {})[name] = {'figure': figure, 'table': group_table(stats, labels, j),
+                                               'count': int(stats['count'][:, j].sum())}
+    return groups
+
+
+def histogram_figures(binned, bins, period):
+    return (histogram_figure(binned["close"], f"{period} Log Returns", '#007BFF', 'plotly_white',
+                             dtick=bins["close"][3]),
+            histogram_figure(binned["h_l"], "High Low", "#00FF59", 'plotly_dark', dtick=bins["h_l"][3]),
+            histogram_figure(binned["o_c"], "Open Close", "#00FF59", 'plotly_dark', dtick=bins["o_c"][3]))
+
+
+def build_streamed_outputs(result, ticker_symbol, interval):
+    # Same outputs as build_outputs, from the aggregates of stream_history
+    # The returns themselves are never held in memory, so these panels keep the server's bins
+    stats = result["stats"]
+    bins = hist_bins(interval)
+    cumulative_return = (result["last_close"] / result["first_close"] - 1) * 100
+    cumulative_return_text = f"{ticker_symbol.upper()} Total Return : {cumulative_return:.2f}%"
+    with timer('figures', symbol_class=asset_class(ticker_symbol)):
+        close_fig, h_l_fig, o_c_fig = histogram_figures(result["binned"], bins, interval)
+
+    return {
+        'close': {'figure': close_fig, 'stats': stats_table(stats, 0), 'std': std_table(stats, 0),
+                  'returns': None, 'bins': bins["close"][:3]},
+        'h_l': {'figure': h_l_fig, 'stats': h_l_stats_table(stats, 1), 'std': std_table(stats, 1),
+                'returns': None, 'bins': bins["h_l"][:3]},
+        'o_c': {'figure': o_c_fig, 'stats': stats_table(stats, 2), 'std': std_table(stats, 2),
+                'returns': None, 'bins': bins["o_c"][:3]},
+        'vol': volatility_table(result["vols"]),
+        'cumulative': cumulative_return_text,
+        'horizons': None,
+        'groups': None,
+    }
+
+
+@app.callback(
+    [Output('horizon-histogram', 'figure'),
+     Output('horizon_stats-table', 'data'),
+     Output('horizon_std-table', 'data'),
+     Output('horizon-output', 'children')],
+    [Input('find-result', 'data'),
+     Input('horizon-select', 'value'),
+     Input('horizon-mode', 'value')],
+    prevent_initial_call=True
+)
+def update_horizon(ref, horizon, mode):
+    # Every horizon is part of the FIND result, the selector only picks one
+    result = load_result(ref)
+    if result is None:
+        return no_update, no_update, no_update, no_update
+    if not result.get('horizons'):
+        return no_update, [], [], "Horizon distributions are available for daily bars."
+    panel = result['horizons'][mode][horizon]
+    text = f"{panel['count']} {'overlapping' if mode == 'overlap' else 'non-overlapping'} {horizon}-day returns"
+    return panel['figure'], panel['stats'], panel['std'], text
+
+
+@app.callback(
+    [Output('group-histograms', 'figure'),
+     Output('group-table', 'data'),
+     Output('group-output', 'children')],
+    [Input('find-result', 'data'),
+     Input('group-by', 'value'),
+     Input('group-series', 'value')],
+    prevent_initial_call=True
+)
+def update_groups(ref, by, series):
+    # All groupings and series are part of the FIND result, the selectors only pick one
+    result = load_result(ref)
+    if result is None:
+        return no_update, no_update, no_update
+    if not result.get('groups'):
+        return no_update, [], "Conditional statistics are available for daily bars."
+    panel = result['groups'][by][series]
+    text = f"{panel['count']} daily bars by {'volatility regime' if by == 'regime' else by}"
+    return panel['figure'], panel['table'], text
+
+
+# --- Confidence intervals: bootstrap of the statistics and Monte Carlo paths ---
+@app.callback(
+    [Output('ci-output', 'children', allow_duplicate=True),
+     Output('ci-request', 'data')],
+    [Input('ci-button', 'n_clicks')],
+    [State('stock-ticker-input', 'value'),
+     State('date-picker-range', 'start_date'),
+     State('date-picker-range', 'end_date'),
+     State('interval-dropdown', 'value'),
+     State('ci-method', 'value'),
+     State('mc-method', 'value')],
+    prevent_initial_call=True
+)
+def request_confidence(n_clicks, ticker_symbol, start_date, end_date, interval='1d', method='iid', mc_method='empirical'):
+    # A busy server answers here, before a job process is started
+    if job_slots.full():
+        return BUSY, no_update
+    return no_update, {'n_clicks': n_clicks, 'ticker': ticker_symbol, 'start': start_date, 'end': end_date,
+                       'interval': interval, 'method': method, 'mc_method': mc_method}
+
+
+@app.callback(
+    [Output('ci-table', 'data'),
+     Output('mc-fan', 'figure'),
+     Output('ci-output', 'children')],
+    [Input('ci-request', 'data')],
+    background=True,
+    running=[(Output('ci-button', 'disabled'), True, False)],
+    prevent_initial_call=True
+)
+def update_confidence(request):
+    """
+    Runs as a background job: bootstrap intervals of the mean, std,
+    positive frequency and σ-band coverage of the three return series, and
+    a Monte Carlo fan of the cumulative close return. Seeded, so the same
+    request always gives the same intervals (and is cached).
+    """
+    ticker_symbol, start_date, end_date = request['ticker'], request['start'], request['end']
+    interval = request.get('interval') or '1d'
+    method, mc_method = request.get('method') or 'iid', request.get('mc_method') or 'empirical'
+    try:
+        job_slots.acquire()
+    except QueueFull as e:
+        return no_update, no_update, str(e)
+    try:
+        update_store(ticker_symbol, start_date, end_date, interval=interval)
+        key = make_key('ci', normalize_symbol(ticker_symbol), pd.Timestamp(start_date).isoformat(),
+                       pd.Timestamp(end_date).isoformat(), interval, store_version(ticker_symbol, interval),
+                       method, mc_method, config.BOOTSTRAP_RESAMPLES, config.MC_HORIZON)
+        hit, result = result_cache.get(key)
+        if not hit:
+            with timer('bootstrap', symbol_class=asset_class(ticker_symbol)):
+                result = confidence_outputs(read_range(ticker_symbol, start_date, end_date, interval),
+                                            method, mc_method)
+            result_cache.set(key, result)
+        return result
+    except Exception as e:
+        return no_update, no_update, f"An error occurred: {e}"
+    finally:
+        job_slots.release()
+
+
+def confidence_outputs(records, method='iid', mc_method='empirical'):
+    values = chunk_series(records)
+    block = config.BOOTSTRAP_BLOCK if method == 'block' else None
+    boot = bootstrap(values, block=block)
+    rows = ci_table(point_stats(values), confidence_intervals(boot), ["Close", "High-Low", "Open-Close"])
+
+    quantiles = (5, 25, 50, 75, 95)
+    paths = simulate_paths(values[:, 0], config.MC_HORIZON, method=mc_method, block=block)
+    bands = np.round(np.expm1(path_quantiles(paths, quantiles)) * 100, 4)
+    figure = fan_figure(bands, quantiles, 'plotly_dark', f"{config.MC_HORIZON}-bar simulated close return")
+    text = (f"{config.BOOTSTRAP_RESAMPLES:,} {'block' if block else 'iid'} resamples of "
+            f"{len(records) - 1:,} bars, {len(paths):,} {mc_method} paths")
+    return rows, figure, text
+
+
+# --- Live mode: O(1) statistics per tick, sent as Patch deltas ---
+@app.callback(
+    Output('live-interval', 'disabled'),
+    [Input('live-toggle', 'value')],
+    [State('stock-ticker-input', 'value'),
+     State('date-picker-range', 'start_date'),
+     State('interval-dropdown', 'value')]
+)
+def toggle_live(value, ticker_symbol=None, start_date=None, interval=None):
+    live = 'live' in (value or [])
+    if live and ticker_symbol and start_date:
+        # Start seeding the accumulator now rather than on the first tick
+        interval = interval or '1d'
+        live_stats(job_cache, ticker_symbol, start_date, interval, hist_bins(interval))
+    return not live
+
+
+@app.callback(
+    [Output('close-histogram', 'figure', allow_duplicate=True),
+     Output('high_low', 'figure', allow_duplicate=True),
+     Output('open_close', 'figure', allow_duplicate=True),
+     Output('close_stats-table', 'data', allow_duplicate=True),
+     Output('h_l_stats-table', 'data', allow_duplicate=True),
+     Output('o_c_stats-table', 'data', allow_duplicate=True),
+     Output('live-output', 'children'),
+     Output('live-state', 'data')],
+    [Input('live-interval', 'n_intervals')],
+    [State('stock-ticker-input', 'value'),
+     State('date-picker-range', 'start_date'),
+     State('interval-dropdown', 'value'),
+     State('live-state', 'data')],
+    prevent_initial_call=True
+)
+def update_live(n_intervals, ticker_symbol, start_date, interval, live_state):
+    """
+    Push the histogram counts, σ lines and return statistics of the shared
+    live accumulator. The tick only reads it; fetching the newest bars is
+    left to the refresher, so a tick shows the bars of the previous refresh.
+    Only the first tick of a window sends whole figures; later ticks patch
+    the bar heights and shapes. σ-band counts need a pass over the history,
+    so the σ tables keep their FIND values.
+    """
+    if not ticker_symbol or not start_date:
+        return (no_update,) * 8
+    interval = interval or '1d'
+    bins = hist_bins(interval)
+    with timer('live_tick', symbol_class=asset_class(ticker_symbol)):
+        acc, error = live_stats(job_cache, ticker_symbol, start_date, interval, bins)
+    if acc is None:
+        text = f"Live update failed: {error}" if error else "Loading live data..."
+        return (no_update,) * 6 + (text, no_update)
+    if acc.last is None:
+        return (no_update,) * 6 + (f"No {interval} data for '{ticker_symbol}'", no_update)
+
+    moments = acc.moments()
+    stats = moments.stats()
+    binned = {name: moments.binned(j) for j, name in enumerate(SERIES)}
+    window = list(live_key(ticker_symbol, interval, start_date))
+    if live_state and live_state.get('window') == window:
+        figures = [histogram_patch(binned[name]) for name in SERIES]
+    else:
+        figures = histogram_figures(binned, bins, "Daily" if interval == '1d' else interval)
+
+    last_bar = pd.Timestamp(acc.last[0])
+    live_text = (f"Live {ticker_symbol.upper()} Total Return : {acc.cumulative() * 100:.2f}% "
+                 f"(last bar {last_bar:%Y-%m-%d %H:%M})")
+    if error:
+        live_text += f" - last refresh failed: {error}"
+    return (*figures, stats_table(stats, 0), h_l_stats_table(stats, 1), stats_table(stats, 2),
+            live_text, {'window': window})
+
+
+def histogram_patch(binned):
+    # Only the bar heights and σ lines of an already drawn histogram
+    fig = Patch()
+    fig['data'][0]['y'] = binned["counts"].tolist()
+    fig['layout']['shapes'] = band_shapes(binned)
+    return fig
+
+
+# --- Comparison: one batched download and one statistics pass for all symbols ---
+@app.callback(
+    [Output('compare-result', 'data', allow_duplicate=True),
+     Output('compare-request', 'data')],
+    [Input('compare-button', 'n_clicks')],
+    [State('compare-tickers-input', 'value'),
+     State('date-picker-range', 'start_date'),
+     State('date-picker-range', 'end_date'),
+     State('interval-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def request_compare(n_clicks, tickers, start_date, end_date, interval='1d'):
+    if job_slots.full():
+        return message_result(BUSY), no_update
+    return no_update, {'n_clicks': n_clicks, 'tickers': tickers, 'start': start_date, 'end': end_date,
+                       'interval': interval}
+
+
+@app.callback(
+    Output('compare-result', 'data'),
+    [Input('compare-request', 'data')],
+    background=True,
+    running=[(Output('compare-button', 'disabled'), True, False)],
+    prevent_initial_call=True
+)
+def update_compare(request):
+    """
+    Runs as a background job: tops up every symbol of the list with one
+    batched provider request per chunk, then computes the statistics and
+    overlaid histograms of all of them together. Returns a reference to
+    the result in the shared cache, like FIND.
+    """
+    tickers, start_date, end_date = request['tickers'], request['start'], request['end']
+    interval = request.get('interval') or '1d'
+    try:
+        job_slots.acquire()
+    except QueueFull as e:
+        return message_result(str(e))
+    try:
+        symbols = check_symbols(split_symbols(tickers))
+        with timer('compare_fetch'):
+            errors = fetch_batch(symbols, start_date, end_date, interval)
+        key = make_key('compare', symbols, pd.Timestamp(start_date).isoformat(), pd.Timestamp(end_date).isoformat(),
+                       interval, [store_version(s, interval) for s in symbols])
+        hit, _ = result_cache.get(key)
+        if not hit:
+            with timer('compare'):
+                result = compare_outputs(symbols, start_date, end_date, interval, errors)
+            if 'message' in result:
+                return result
+            result_cache.set(key, result)
+        return {'key': key}
+    except Exception as e:
+        return message_result(f"An error occurred: {e}")
+    finally:
+        job_slots.release()
+
+
+def compare_outputs(symbols, start_date, end_date, interval='1d', errors=None):
+    bins = hist_bins(interval)
+    result = compare_stats(symbols, start_date, end_date, interval, bins, errors=errors)
+    if not result['symbols']:
+        return message_result("No data found for any of the symbols.")
+    period = "Daily Log Returns" if interval == '1d' else f"{interval} Log Returns"
+    titles = {"close": period, "h_l": "High Low", "o_c": "Open Close"}
+    figures = {}
+    for name, title in titles.items():
+        figures[name] = overlay_figure(result['binned'][name], result['symbols'], 'plotly_dark', bins[name][3])
+        figures[name]['layout']['title'] = dict(text=title, font=dict(size=14))
+    text = f"{len(result['symbols'])} of {len(symbols)} symbols compared"
+    return {'figures': figures, 'table': compare_table(result), 'text': text}
+
+
+@app.callback(
+    [Output('compare-histogram', 'figure'),
+     Output('compare-table', 'data'),
+     Output('compare-output', 'children')],
+    [Input('compare-result', 'data'),
+     Input('compare-series', 'value')],
+    prevent_initial_call=True
+)
+def show_compare(ref, series):
+    # Switching the series only reloads the cached result
+    if not ref:
+        return no_update, no_update, no_update
+    if 'message' in ref:
+        return no_update, no_update, ref['message']
+    hit, result = result_cache.get(ref['key'], count=False)
+    if not hit:
+        return no_update, no_update, "The comparison is no longer cached, please press COMPARE again."
+    return result['figures'][series], result['table'], result['text']
+
+
+# --- Correlation: pairwise-complete matrices over a universe, computed in blocks ---
+@app.callback(
+    [Output('corr-result', 'data', allow_duplicate=True),
+     Output('corr-request', 'data')],
+    [Input('corr-button', 'n_clicks')],
+    [State('corr-tickers-input', 'value'),
+     State('date-picker-range', 'start_date'),
+     State('date-picker-range', 'end_date'),
+     State('interval-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def request_correlation(n_clicks, tickers, start_date, end_date, interval='1d'):
+    if job_slots.full():
+        return message_result(BUSY), no_update
+    return no_update, {'n_clicks': n_clicks, 'tickers': tickers, 'start': start_date, 'end': end_date,
+                       'interval': interval}
+
+
+@app.callback(
+    Output('corr-result', 'data'),
+    [Input('corr-request', 'data')],
+    background=True,
+    running=[(Output('corr-button', 'disabled'), True, False)],
+    prevent_initial_call=True
+)
+def update_correlation(request):
+    """
+    Runs as a background job: tops up the universe in batched provider
+    requests, then computes (or finds in the shared cache) the covariance
+    and correlation matrices and their clustered order.
+    """
+    tickers, start_date, end_date = request['tickers'], request['start'], request['end']
+    interval = request.get('interval') or '1d'
+    try:
+        job_slots.acquire()
+    except QueueFull as e:
+        return message_result(str(e))
+    try:
+        symbols = split_symbols(tickers)
+        if len(symbols) < 2:
+            return message_result("Enter two or more symbols.")
+        if len(symbols) > config.CORR_MAX_SYMBOLS:
+            return message_result(f"At most {config.CORR_MAX_SYMBOLS} symbols can be correlated at once.")
+        errors = {}
+        with timer('corr_fetch'):
+            for i in range(0, len(symbols), 100):
+                errors.update(fetch_batch(symbols[i:i + 100], start_date, end_date, interval))
+        symbols = [s for s in symbols if s not in errors]
+        key = make_key('corr', symbols, pd.Timestamp(start_date).isoformat(), pd.Timestamp(end_date).isoformat(),
+                       interval, [store_version(s, interval) for s in symbols])
+        hit, _ = result_cache.get(key)
+        if not hit:
+            with timer('corr'):
+                result = correlation_result(symbols, start_date, end_date, interval)
+            if result is None:
+                return message_result("Fewer than two of the symbols have data in this range.")
+            result['missing'] += list(errors)
+            result_cache.set(key, result)
+        return {'key': key}
+    except Exception as e:
+        return message_result(f"An error occurred: {e}")
+    finally:
+        job_slots.release()
+
+
+@app.callback(
+    [Output('corr-heatmap', 'figure'),
+     Output('corr-output', 'children')],
+    [Input('corr-result', 'data'),
+     Input('corr-kind', 'value'),
+     Input('corr-order', 'value')],
+    prevent_initial_call=True
+)
+def show_correlation(ref, kind, order):
+    if not ref:
+        return no_update, no_update
+    if 'message' in ref:
+        return no_update, ref['message']
+    hit, result = result_cache.get(ref['key'], count=False)
+    if not hit:
+        return no_update, "The matrix is no longer cached, please press CORRELATE again."
+    text = f"{len(result['symbols'])} symbols over {result['dates']} dates"
+    if result['missing']:
+        text += f", no data for {', '.join(result['missing'])}"
+    return correlation_figure(result, kind, order), text
+
+
+def correlation_figure(result, kind='corr', order='cluster'):
+    # Heatmap as a plain dict; covariance in %² per bar, values rounded to keep large universes small
+    idx = np.asarray(result['order'] if order == 'cluster' else range(len(result['symbols'])))
+    labels = [result['symbols'][i] for i in idx]
+    if kind == 'cov':
+        z = np.round(result['cov'][np.ix_(idx, idx)].astype('f8') * 1e4, 4)
+        scale = dict(colorscale='Viridis', colorbar=dict(title='%²'))
+    else:
+        z = np.round(result['corr'][np.ix_(idx, idx)].astype('f8'), 3)
+        scale = dict(colorscale='RdBu', reversescale=True, zmin=-1, zmax=1, zmid=0)
+    return heatmap_figure(z, labels, 'plotly_dark', **scale)
+
+
+# --- Window slider: reset to the searched range after every FIND ---
+@app.callback(
+    [Output('window-slider', 'min'),
+     Output('window-slider', 'max'),
+     Output('window-slider', 'value'),
+     Output('window-slider', 'marks')],
+    [Input('cumulative-return-output', 'children')],
+    [State('stock-ticker-input', 'value'),
+     State('date-picker-range', 'start_date'),
+     State('date-picker-range', 'end_date'),
+     State('interval-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def update_window_slider(_, ticker_symbol, start_date, end_date, interval='1d'):
+    if interval != '1d':
+        # The prefix-sum index grows with the history, so windows are daily only
+        return 0, 1, [0, 1], None
+    index = get_index(ticker_symbol)
+    if index is None or len(index) < 2:
+        return no_update, no_update, no_update, no_update
+
+    lo, hi = index.positions(pd.Timestamp(start_date).value, pd.Timestamp(end_date).value)
+    # One mark at the first bar of every year
+    years = pd.DatetimeIndex(index.ts).year
+    firsts = np.flatnonzero(np.diff(years, prepend=years[0] - 1))
+    marks = {int(i): str(years[i]) for i in firsts}
+    return 0, len(index) - 1, [lo, max(hi - 1, lo)], marks
+
+
+# --- Window statistics: O(1) per slider move, no download or rescan ---
+@app.callback(
+    [Output('close_stats-table', 'data', allow_duplicate=True),
+     Output('h_l_stats-table', 'data', allow_duplicate=True),
+     Output('o_c_stats-table', 'data', allow_duplicate=True),
+     Output('window-return-output', 'children')],
+    [Input('window-slider', 'value')],
+    [State('stock-ticker-input', 'value'),
+     State('interval-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def update_window(window, ticker_symbol, interval='1d'):
+    if interval != '1d':
+        return no_update, no_update, no_update, no_update
+    index = get_index(ticker_symbol)
+    if index is None or len(index) < 2:
+        return no_update, no_update, no_update, no_update
+
+    first, last = window
+    stats = index.query_positions(first, last + 1)
+    first_date, last_date = pd.DatetimeIndex(index.ts[[first, last]])
+    window_text = (f"{ticker_symbol.upper()} {first_date:%Y-%m-%d} → {last_date:%Y-%m-%d} "
+                   f"Return : {stats['cumulative'] * 100:.2f}%")
+    return stats_table(stats, 0), h_l_stats_table(stats, 1), stats_table(stats, 2), window_text
+
+# --- Prometheus metrics endpoint ---
+@server.after_request
+def observe_payload(response):
+    # Size of each callback response as sent, measured once per response
+    if flask_request.path.endswith('/_dash-update-component') and response.status_code == 200 \
+            and not response.direct_passthrough:
+        body = flask_request.get_json(silent=True) or {}
+        callback = str(body.get('output', '')).lstrip('.').split('.')[0]
+        observe('vol_app_payload_bytes', len(response.get_data()), callback=callback)
+    return response
+
+
+@server.route('/metrics')
+def metrics():
+    cache_stats = result_cache.stats()
+    gauges = {
+        'vol_app_result_cache': ('Shared result cache counters',
+                                 [({'field': name}, value) for name, value in cache_stats.items()]),
+        'vol_app_precomputed': ('Precomputed index size and last build time',
+                                [({'field': name}, value) for name, value in precomputed.stats().items()]),
+    }
+    return Response(render(gauges), mimetype='text/plain; version=0.0.4')
 
 # --- Run application ---
 if __name__ == '__main__':
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+import config
+from provider_util import COLUMNS
+from store_util import normalize_symbol, read_range
+from stream_util import SERIES, chunk_series
+
+# Quantile sketches for tail statistics
+# A merging t-digest keeps a bounded number of weighted centroids, fine in
+# the tails and coarse in the middle, so percentiles, VaR and expected
+# shortfall of years of intraday bars need neither the sorted history nor a
+# rescan. Up to SKETCH_EXACT values every value is its own centroid and the
+# answers are exact. One digest per series and calendar month is persisted;
+# a window merges the stored months it covers and only scans the months it cuts.
+
+TAIL_LEVELS = (0.95, 0.99)
+PERCENTILES = (1, 5, 50, 95, 99)
+
+TAIL_COLUMNS = ([{"name": "", "id": "Label"}]
+                + [{"name": f"P{p:g}", "id": f"P{p:g}"} for p in PERCENTILES]
+                + [{"name": f"{kind} {level:.0%}", "id": f"{kind} {level:.0%}"}
+                   for level in TAIL_LEVELS for kind in ("VaR", "ES")])
+
+
+class TDigest:
+
+    def __init__(self, compression=None, exact=None):
+        self.compression = compression or config.SKETCH_COMPRESSION
+        self.exact = config.SKETCH_EXACT if exact is None else exact
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min, self.max = np.inf, -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    @property
+    def is_exact(self):
+        return bool((self.weights == 1).all())
+
+    def update(self, values):
+        x = np.asarray(values, dtype='f8').ravel()
+        x = x[~np.isnan(x)]
+        if len(x):
+            self.min, self.max = min(self.min, x.min()), max(self.max, x.max())
+            self._add(x, np.ones(len(x)))
+        return self
+
+    def merge(self, other):
+        if len(other.means):
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            self._add(other.means, other.weights)
+        return self
+
+    def _add(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        self.means, self.weights = means[order], weights[order]
+        if self.weights.sum() > self.exact and len(self.means) > self.compression:
+            self._compress()
+
+    def _compress(self):
+        # Centroids whose left edge falls in the same unit of the k1 scale
+        # k(q) = δ / 2π · asin(2q - 1) are merged, so clusters shrink towards the tails
+        w = self.weights
+        q_left = (np.cumsum(w) - w) / w.sum()
+        k = self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q_left - 1, -1, 1))
+        group = np.floor(k - k[0]).astype('i8')
+        starts = np.flatnonzero(np.diff(group, prepend=-1))
+        weights = np.add.reduceat(w, starts)
+        self.means = np.add.reduceat(self.means * w, starts) / weights
+        self.weights = weights
+
+    def quantile(self, q):
+        q = np.asarray(q, dtype='f8')
+        if not len(self.means):
+            return np.full(q.shape, np.nan)
+        if self.is_exact:
+            return np.percentile(self.means, q * 100)
+        w = self.weights
+        centers = np.cumsum(w) - w / 2
+        t = np.concatenate([[0.0], centers, [w.sum()]])
+        v = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q * w.sum(), t, v)
+
+    def tail_mean(self, q):
+        # Mean of the lowest q share of the values (expected shortfall of returns)
+        if not len(self.means):
+            return np.nan
+        if self.is_exact:
+            return float(self.means[self.means <= self.quantile(q)].mean())
+        w = self.weights
+        take = np.clip(q * w.sum() - (np.cumsum(w) - w), 0, w)
+        return float((take * self.means).sum() / take.sum()) if take.sum() else float(self.min)
+
+    def negated(self):
+        # Digest of the negated values, so upper-tail questions become lower-tail ones
+        digest = TDigest(self.compression, self.exact)
+        digest.means, digest.weights = -self.means[::-1], self.weights[::-1].copy()
+        digest.min, digest.max = -self.max, -self.min
+        return digest
+
+    def to_dict(self):
+        return {'compression': self.compression, 'exact': self.exact, 'means': self.means.tolist(),
+                'weights': self.weights.tolist(), 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, state):
+        digest = cls(state['compression'], state['exact'])
+        digest.means = np.asarray(state['means'], dtype='f8')
+        digest.weights = np.asarray(state['weights'], dtype='f8')
+        digest.min, digest.max = state['min'], state['max']
+        return digest
+
+
+class SketchStore:
+    """Monthly digests of the return series per (symbol, interval), in one SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per thread and per process (never reused after a fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS sketches ('
+                     'symbol TEXT, interval TEXT, period TEXT, fingerprint TEXT, value TEXT, '
+                     'PRIMARY KEY (symbol, interval, period))')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def periods(self, symbol, interval):
+        # {period: (fingerprint, JSON digests)} of every stored month
+        rows = self._connect().execute(
+            'SELECT period, fingerprint, value FROM sketches WHERE symbol = ? AND interval = ?',
+            (normalize_symbol(symbol), interval)).fetchall()
+        return {period: (fingerprint, value) for period, fingerprint, value in rows}
+
+    def put(self, symbol, interval, period, fingerprint, digests):
+        value = json.dumps([d.to_dict() for d in digests])
+        self._connect().execute('INSERT OR REPLACE INTO sketches VALUES (?, ?, ?, ?, ?)',
+                                (normalize_symbol(symbol), interval, period, fingerprint, value))
+
+
+sketches = SketchStore(config.SKETCH_PATH)
+
+
+def _fingerprint(chunk, prev):
+    # Changes whenever any bar of a month (or the close before it) is rewritten
+    digest = hashlib.blake2b(digest_size=16)
+    for col in ('ts',) + tuple(COLUMNS):
+        digest.update(np.ascontiguousarray(chunk[col]))
+    digest.update(np.asarray(prev['Close'][:1], dtype='f8'))
+    return digest.hexdigest()
+
+
+def _month_digests(chunk, prev):
+    values = chunk_series(chunk, prev)
+    return [TDigest().update(values[:, j]) for j in range(len(SERIES))]
+
+
+def window_sketches(symbol, start, end, interval='1d', store_dir=None, store=None):
+    """
+    Digests of the close, high-low and open-close series of [start, end).
+    Calendar months the window covers whole come from the sketch store (built
+    and saved on first use); the months it cuts are scanned from the records.
+    """
+    store = store or sketches
+    records = read_range(symbol, start, end, interval, store_dir)
+    digests = [TDigest() for _ in SERIES]
+    if not len(records):
+        return digests
+    months = np.asarray(records['ts']).astype('datetime64[ns]').astype('datetime64[M]')
+    bounds = list(np.flatnonzero(np.diff(months.astype('i8'), prepend=months[0].astype('i8') - 1))) + [len(records)]
+    stored = store.periods(symbol, interval)
+    window_start, window_end = pd.Timestamp(start), pd.Timestamp(end)
+
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        chunk, prev = records[lo:hi], records[lo - 1:lo] if lo else records[:0]
+        month = pd.Timestamp(months[lo])
+        # The first month has no previous close inside the window, so it is always scanned
+        whole = lo > 0 and window_start <= month and month + pd.offsets.MonthBegin(1) <= window_end
+        if not whole:
+            parts = _month_digests(chunk, prev)
+        else:
+            period, fingerprint = str(months[lo]), _fingerprint(chunk, prev)
+            if stored.get(period, (None,))[0] == fingerprint:
+                parts = [TDigest.from_dict(state) for state in json.loads(stored[period][1])]
+            else:
+                parts = _month_digests(chunk, prev)
+                store.put(symbol, interval, period, fingerprint, parts)
+        for digest, part in zip(digests, parts):
+            digest.merge(part)
+    return digests
+
+
+def tail_stats(digest, levels=TAIL_LEVELS, percentiles=PERCENTILES, loss_is_rise=False):
+    # Percentiles and VaR / expected shortfall (as positive losses) from the
+    # lower tail, or from the upper one for a series that rises on a loss
+    stats = {f"P{p:g}": float(v) for p, v in zip(percentiles, digest.quantile(np.asarray(percentiles) / 100))}
+    gains = digest.negated() if loss_is_rise else digest
+    for level in levels:
+        stats[f"VaR {level:.0%}"] = -float(gains.quantile(1 - level))
+        stats[f"ES {level:.0%}"] = -gains.tail_mean(1 - level)
+    return stats
+
+
+def tail_table(digests, labels=("Close", "High-Low", "Open-Close")):
+    # One row per series; High-Low has no losses, so it only shows percentiles.
+    # Open-Close (Open / Close - 1) is positive when the price falls, its losses are the upper tail.
+    rows = []
+    for name, digest, label in zip(SERIES, digests, labels):
+        row = {"Label": label}
+        for key, value in tail_stats(digest, loss_is_rise=name == 'o_c').items():
+            row[key] = "-" if name == 'h_l' and key[0] in "VE" else f"{value:.2%}"
+        rows.append(row)
+    return rows
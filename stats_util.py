@@ -0,0 +1,113 @@
+import numpy as np
+
+# Shared return statistics engine used by the close, high-low and open-close modules
+
+STD_LEVELS = (1, 2, 3)
+
+STATS_COLUMNS = [
+    {"name": "", "id": "Label"},
+    {"name": "Mean", "id": "Mean"},
+    {"name": "Count", "id": "Count"},
+    {"name": "Frequency %", "id": "Frequency %"},
+    {"name": "Adj Return", "id": "Adj Return"}
+    ]
+
+STD_COLUMNS = [
+    {"name": "", "id": "Label"},
+    {"name": "Upper Bound", "id": "Upper Bound"},
+    {"name": "Lower Bound", "id": "Lower Bound"},
+    {"name": "Count", "id": "Count"},
+    {"name": "Count %", "id": "Count %"},
+    ]
+
+
+def return_stats(values, ks=STD_LEVELS):
+    """
+    Compute the statistics of one or more return series in a single sort.
+    values is a 1-D array or a 2-D (n_obs, n_series) array, NaN marks a missing
+    observation. Every entry of the result is an array with one value per series,
+    the σ-band entries have shape (len(ks), n_series).
+    """
+    x = np.asarray(values, dtype='f8')
+    if x.ndim == 1:
+        x = x[:, None]
+    ks = np.asarray(ks, dtype='f8')
+    n_series = x.shape[1]
+
+    # Sort once (NaN goes last), every count below is then a binary search
+    srt = np.sort(x, axis=0)
+    count = np.count_nonzero(~np.isnan(srt), axis=0)
+    csum = np.cumsum(np.nan_to_num(srt), axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total = np.where(count > 0, csum[np.maximum(count - 1, 0), np.arange(n_series)], 0.0)
+        mean = total / count
+        dev = np.where(np.isnan(srt), 0.0, srt - mean)
+        # NaN below two observations (an empty series would give -0.0)
+        std = np.where(count > 1, np.sqrt((dev * dev).sum(axis=0) / (count - 1)), np.nan)
+
+    lower = mean - ks[:, None] * std
+    upper = mean + ks[:, None] * std
+
+    neg_count = np.zeros(n_series, dtype='i8')
+    pos_count = np.zeros(n_series, dtype='i8')
+    neg_sum = np.zeros(n_series)
+    pos_sum = np.zeros(n_series)
+    band_count = np.zeros((len(ks), n_series), dtype='i8')
+    for j in range(n_series):
+        col = srt[:count[j], j]
+        if not len(col):
+            continue
+        neg_end = np.searchsorted(col, 0.0, side='left')
+        pos_start = np.searchsorted(col, 0.0, side='right')
+        lo = np.searchsorted(col, lower[:, j], side='left')
+        hi = np.searchsorted(col, upper[:, j], side='right')
+        band_count[:, j] = hi - lo
+        neg_count[j] = neg_end
+        pos_count[j] = len(col) - pos_start
+        neg_sum[j] = csum[neg_end - 1, j] if neg_end else 0.0
+        pos_sum[j] = total[j] - (csum[pos_start - 1, j] if pos_start else 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            "ks": ks,
+            "count": count,
+            "mean": mean,
+            "std": std,
+            "pos_count": pos_count,
+            "neg_count": neg_count,
+            "pos_mean": pos_sum / pos_count,
+            "neg_mean": neg_sum / neg_count,
+            "pos_perc": pos_count / count * 100,
+            "neg_perc": neg_count / count * 100,
+            "lower": lower,
+            "upper": upper,
+            "band_count": band_count,
+            "band_perc": band_count / count,
+        }
+
+
+def stats_table(stats, j=0):
+    # Positive / negative rows of the Return Statistics table for series j
+    rows = []
+    for label, key in (("Positive", "pos"), ("Negative", "neg")):
+        mean = stats[f"{key}_mean"][j]
+        perc = stats[f"{key}_perc"][j]
+        rows.append({"Label": label,
+                     "Mean": f"{mean:.2%}",
+                     "Count": int(stats[f"{key}_count"][j]),
+                     "Frequency %": f"{perc:.2f}%",
+                     "Adj Return": f"{mean * perc:.2f}%"})
+    return rows
+
+
+def std_table(stats, j=0):
+    # One row per σ level of the σ-Levels table for series j
+    return [
+        {"Label": f"Std_{k:g}",
+         "Upper Bound": f"{stats['upper'][i, j]:.2%}",
+         "Lower Bound": f"{stats['lower'][i, j]:.2%}",
+         "Count": f"{stats['band_count'][i, j]}",
+         "Count %": f"{stats['band_perc'][i, j]:.2%}"}
+        for i, k in enumerate(stats["ks"])
+    ]
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+import config
+from flight_util import flight
+from ohlcv_util import OHLCV
+from provider_util import BAR_LENGTH, COLUMNS, get_provider
+
+# Local OHLCV store
+# Each symbol/interval lives in one memory-mappable .npy file next to a small
+# .json sidecar recording the covered date range and fetch time. The file is
+# columnar: a single record whose fields are whole arrays (ts, Open, High,
+# ...), so every column is one contiguous block of the file, and one rename
+# still replaces all of them at once. Records are read as an OHLCV.
+
+
+def _file_dtype(n):
+    return np.dtype([('ts', '<i8', (n,))] + [(col, '<f8', (n,)) for col in COLUMNS])
+
+
+def normalize_symbol(symbol):
+    return symbol.strip().upper()
+
+
+def split_symbols(text):
+    # Comma or space separated symbols, normalized, in order and without repeats
+    return list(dict.fromkeys(normalize_symbol(s) for s in (text or '').replace(',', ' ').split()))
+
+
+def _paths(symbol, interval, store_dir=None):
+    store_dir = store_dir or config.STORE_DIR
+    name = f"{quote(normalize_symbol(symbol), safe='')}_{interval}"
+    return os.path.join(store_dir, name + '.npy'), os.path.join(store_dir, name + '.json')
+
+
+def _to_ns(value):
+    return pd.Timestamp(value).value
+
+
+def _merge(old, new):
+    # New bars win over stored ones with the same timestamp
+    merged = OHLCV.concat([new, old])
+    _, keep = np.unique(merged.ts, return_index=True)
+    return OHLCV(merged.ts[keep], {col: merged[col][keep] for col in COLUMNS})
+
+
+def read_meta(symbol, interval, store_dir=None):
+    _, meta_path = _paths(symbol, interval, store_dir)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_version(symbol, interval, store_dir=None):
+    # Stamp that changes whenever the stored history is rewritten
+    meta = read_meta(symbol, interval, store_dir)
+    if meta is None:
+        return None
+    return [meta['start'], meta['end'], meta.get('fetched_at')]
+
+
+def read_records(symbol, interval, store_dir=None):
+    data_path, _ = _paths(symbol, interval, store_dir)
+    if not os.path.exists(data_path):
+        return OHLCV.empty()
+    stored = np.load(data_path, mmap_mode='r')
+    # Zero-copy: the columns stay views of the memory-mapped file
+    return OHLCV(stored['ts'], {col: stored[col] for col in COLUMNS})
+
+
+def write_records(symbol, interval, records, meta, store_dir=None):
+    data_path, _ = _paths(symbol, interval, store_dir)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    # Write to temp files then rename so readers never see half-written data
+    stored = np.zeros((), dtype=_file_dtype(len(records)))
+    stored['ts'] = records['ts']
+    for col in COLUMNS:
+        stored[col] = records[col]
+    tmp = f"{data_path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, stored)
+    os.replace(tmp, data_path)
+    write_meta(symbol, interval, meta, store_dir)
+
+
+def write_meta(symbol, interval, meta, store_dir=None):
+    _, meta_path = _paths(symbol, interval, store_dir)
+    tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def missing_ranges(meta, records, start_ns, end_ns, interval, now=None, stale_after=None):
+    """
+    Return the (start_ns, end_ns) ranges that must be fetched so the store
+    covers [start_ns, end_ns), including a refetch of a stale still-forming last bar.
+    """
+    if meta is None:
+        return [(start_ns, end_ns)]
+
+    now = time.time() if now is None else now
+    stale_after = config.STORE_STALE_AFTER if stale_after is None else stale_after
+    ranges = []
+
+    # Missing head
+    if start_ns < meta['start']:
+        ranges.append((start_ns, meta['start']))
+
+    # Missing tail, or a last bar that was still forming when fetched and is now stale
+    tail_start = meta['end'] if end_ns > meta['end'] else None
+    if len(records):
+        last_ts = int(records['ts'][-1])
+        bar_close = last_ts + BAR_LENGTH.get(interval, pd.Timedelta(days=1)).value
+        provisional = meta['fetched_at'] * 1e9 < bar_close
+        if provisional and now - meta['fetched_at'] > stale_after and end_ns > last_ts:
+            tail_start = last_ts if tail_start is None else min(tail_start, last_ts)
+    if tail_start is not None:
+        ranges.append((tail_start, max(end_ns, meta['end'])))
+    return ranges
+
+
+def store_gaps(symbol, start, end, interval='1d', store_dir=None):
+    # The (start_ns, end_ns) ranges update_store would fetch for [start, end)
+    meta = read_meta(symbol, interval, store_dir)
+    records = read_records(symbol, interval, store_dir)
+    return missing_ranges(meta, records, _to_ns(start), _to_ns(end), interval)
+
+
+def needs_update(symbol, start, end, interval='1d', store_dir=None):
+    # Whether update_store would have to fetch anything for [start, end)
+    return bool(store_gaps(symbol, start, end, interval, store_dir))
+
+
+def read_range(symbol, start, end, interval='1d', store_dir=None):
+    # Stored records of [start, end), still memory-mapped
+    records = read_records(symbol, interval, store_dir)
+    lo, hi = np.searchsorted(records['ts'], [_to_ns(start), _to_ns(end)])
+    return records[lo:hi]
+
+
+def window_version(symbol, start, end, interval='1d', store_dir=None):
+    # Digest of the stored bars of [start, end); top-ups outside the window leave it unchanged
+    records = read_range(symbol, start, end, interval, store_dir)
+    if not len(records):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    for col in ('ts',) + tuple(COLUMNS):
+        digest.update(np.ascontiguousarray(records[col]))
+    return digest.hexdigest()
+
+
+def update_store(symbol, start, end, interval='1d', fetch=None, offline=None, store_dir=None):
+    """
+    Bring the stored history of a symbol up to date for [start, end),
+    fetching only the missing head/tail ranges. Returns the full stored records.
+    """
+    offline = config.OFFLINE if offline is None else offline
+    symbol = normalize_symbol(symbol)
+    start_ns, end_ns = _to_ns(start), _to_ns(end)
+
+    meta = read_meta(symbol, interval, store_dir)
+    records = read_records(symbol, interval, store_dir)
+    if offline or not missing_ranges(meta, records, start_ns, end_ns, interval):
+        return records
+
+    if fetch is None:
+        provider = get_provider()
+        fetch, chunk_ranges = provider.fetch, provider.chunk_ranges
+    else:
+        def chunk_ranges(lo, hi, interval):
+            return [(lo, hi)]
+
+    # Concurrent requests for the same data share one fetch; the per-file lock
+    # also keeps two workers from merging into the same file at once
+    data_path, _ = _paths(symbol, interval, store_dir)
+    lock_path = os.path.join(os.path.dirname(data_path), '.locks', os.path.basename(data_path) + '.lock')
+    return flight.do((symbol, interval, start_ns, end_ns, store_dir),
+                     lambda: _top_up(symbol, start_ns, end_ns, interval, fetch, chunk_ranges, store_dir),
+                     lock_path=lock_path)
+
+
+def fetch_chunks(symbol, chunks, interval, fetch, workers=None):
+    """
+    Download the (start, end) chunks of one symbol concurrently and return
+    them merged into store records.
+    """
+    def fetch_one(chunk):
+        return OHLCV.from_frame(fetch(symbol, chunk[0], chunk[1], interval))
+
+    if len(chunks) <= 1:
+        parts = [fetch_one(chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers or config.FETCH_WORKERS, len(chunks))) as pool:
+            parts = list(pool.map(fetch_one, chunks))
+    return _merge(OHLCV.empty(), OHLCV.concat(parts)) if parts else OHLCV.empty()
+
+
+def _top_up(symbol, start_ns, end_ns, interval, fetch, chunk_ranges, store_dir):
+    # Re-read under the lock, another worker may have fetched the data meanwhile
+    meta = read_meta(symbol, interval, store_dir)
+    records = read_records(symbol, interval, store_dir)
+    ranges = missing_ranges(meta, records, start_ns, end_ns, interval)
+    if not ranges:
+        return records
+
+    merged = records
+    new_meta = dict(meta) if meta else None
+    for lo, hi in ranges:
+        chunks = chunk_ranges(pd.Timestamp(lo), pd.Timestamp(hi), interval)
+        fetched = fetch_chunks(symbol, chunks, interval, fetch)
+        # A range is covered up to now only; bars after that are still to come
+        covered_end = min(hi, time.time_ns())
+        if not len(fetched):
+            # A successful empty answer (weekend, holiday, before listing) still
+            # covers the range, so it is not fetched again on every request.
+            # Fetch errors raise instead; nothing creates a store.
+            if new_meta is not None:
+                new_meta['start'] = min(lo, new_meta['start'])
+                new_meta['end'] = max(covered_end, new_meta['end'])
+            continue
+        merged = _merge(merged, fetched)
+        if new_meta is None:
+            new_meta = {'start': lo, 'end': covered_end}
+        new_meta['start'] = min(lo, new_meta['start'])
+        new_meta['end'] = max(covered_end, new_meta['end'])
+        new_meta['fetched_at'] = time.time()
+
+    if new_meta is None or new_meta == meta:
+        return records
+    if merged is records:
+        # Only the covered range grew
+        write_meta(symbol, interval, new_meta, store_dir)
+        return records
+    write_records(symbol, interval, merged, new_meta, store_dir)
+    return read_records(symbol, interval, store_dir)
+
+
+def load_history(symbol, start, end, interval='1d', fetch=None, offline=None, store_dir=None):
+    """
+    Read OHLCV bars for [start, end) from the local store, topping it up
+    from the data source first when the requested range is not covered.
+    Returns a read-only OHLCV whose columns are views of the stored records.
+    """
+    records = update_store(symbol, start, end, interval, fetch, offline, store_dir)
+    lo, hi = np.searchsorted(records['ts'], [_to_ns(start), _to_ns(end)])
+    return records[lo:hi]
@@ -0,0 +1,291 @@
+import numpy as np
+
+import config
+from estimator_util import ROLLING_WINDOWS, estimate_volatility, estimator_terms, full_volatility, term_sums
+from hist_util import bin_counts, binned_result
+from stats_util import STD_LEVELS
+from store_util import read_range
+
+# Streaming statistics over the stored history
+# The memory-mapped store is read in fixed-size chunks and every chunk is
+# folded into mergeable partial aggregates, so peak memory depends on the
+# chunk size and not on the length of the requested range.
+
+SERIES = ('close', 'h_l', 'o_c')
+
+
+def series_bins(bins):
+    # hist_util.hist_bins layout to the per-series (start, end, size) list of Moments
+    return [bins[name][:3] for name in SERIES]
+
+
+def iter_chunks(records, chunk_rows=None):
+    # (previous bar, chunk) pairs over consecutive slices of the records; the
+    # previous bar is a slice too, empty for the first chunk
+    chunk_rows = chunk_rows or config.STREAM_CHUNK_ROWS
+    for lo in range(0, len(records), chunk_rows):
+        yield records[max(lo - 1, 0):lo], records[lo:lo + chunk_rows]
+
+
+def chunk_series(chunk, prev=()):
+    """
+    Close log return, high/low and open/close of every bar of a chunk as an
+    (n, 3) array. The first close return uses the previous chunk's last close.
+    """
+    close = np.asarray(chunk['Close'], dtype='f8')
+    prev_close = prev['Close'][0] if len(prev) else np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        close_ret = np.log(close / np.concatenate([[prev_close], close[:-1]]))
+        h_l = np.asarray(chunk['High']) / np.asarray(chunk['Low']) - 1
+        o_c = np.asarray(chunk['Open']) / close - 1
+    return np.stack([close_ret, h_l, o_c], axis=1)
+
+
+class Moments:
+    """
+    Mergeable partial aggregate of several series: count, mean and sum of
+    squared deviations (combined with Chan's parallel formula), positive and
+    negative counts and sums, and fixed-bin histograms. Bins are given per
+    series as (start, end, size) in units of value * scale.
+    """
+
+    FIELDS = ('count', 'mean', 'm2', 'pos_count', 'neg_count', 'pos_sum', 'neg_sum')
+
+    def __init__(self, n_series, bins=None, scale=100):
+        self.count = np.zeros(n_series, dtype='i8')
+        self.mean = np.zeros(n_series)
+        self.m2 = np.zeros(n_series)
+        self.pos_count = np.zeros(n_series, dtype='i8')
+        self.neg_count = np.zeros(n_series, dtype='i8')
+        self.pos_sum = np.zeros(n_series)
+        self.neg_sum = np.zeros(n_series)
+        self.bins = bins
+        self.scale = scale
+        self.hist = [bin_counts(np.empty(0), *b) for b in bins] if bins else None
+
+    @classmethod
+    def from_values(cls, values, bins=None, scale=100):
+        x = np.asarray(values, dtype='f8')
+        if x.ndim == 1:
+            x = x[:, None]
+        part = cls(x.shape[1], bins, scale)
+        valid = ~np.isnan(x)
+        x0 = np.where(valid, x, 0.0)
+        part.count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            part.mean = np.where(part.count > 0, x0.sum(axis=0) / part.count, 0.0)
+        part.m2 = (np.where(valid, x - part.mean, 0.0) ** 2).sum(axis=0)
+        part.pos_count = (x0 > 0).sum(axis=0)
+        part.neg_count = (x0 < 0).sum(axis=0)
+        part.pos_sum = np.where(x0 > 0, x0, 0.0).sum(axis=0)
+        part.neg_sum = np.where(x0 < 0, x0, 0.0).sum(axis=0)
+        if bins:
+            part.hist = [bin_counts(x[valid[:, j], j] * scale, *b) for j, b in enumerate(bins)]
+        return part
+
+    def update(self, values):
+        return self.merge(Moments.from_values(values, self.bins, self.scale))
+
+    def merge(self, other):
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = np.where(n > 0, self.mean + delta * other.count / n, 0.0)
+            self.m2 = self.m2 + other.m2 + np.where(n > 0, delta ** 2 * self.count * other.count / n, 0.0)
+        self.count = n
+        self.pos_count = self.pos_count + other.pos_count
+        self.neg_count = self.neg_count + other.neg_count
+        self.pos_sum = self.pos_sum + other.pos_sum
+        self.neg_sum = self.neg_sum + other.neg_sum
+        if self.hist is not None:
+            self.hist = [a + b for a, b in zip(self.hist, other.hist)]
+        return self
+
+    def to_dict(self):
+        # JSON-safe state, e.g. for a cache or a dcc.Store
+        state = {name: getattr(self, name).tolist() for name in self.FIELDS}
+        state.update(bins=self.bins, scale=self.scale,
+                     hist=[h.tolist() for h in self.hist] if self.hist is not None else None)
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        part = cls(len(state['count']), state['bins'], state['scale'])
+        for name in cls.FIELDS:
+            setattr(part, name, np.asarray(state[name], dtype=getattr(part, name).dtype))
+        if state['hist'] is not None:
+            part.hist = [np.asarray(h, dtype='i8') for h in state['hist']]
+        return part
+
+    def copy(self):
+        return Moments.from_dict(self.to_dict())
+
+    @property
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    def stats(self, ks=STD_LEVELS, band_count=None):
+        """Statistics in the stats_util.return_stats layout; σ-band counts come from a second pass."""
+        ks = np.asarray(ks, dtype='f8')
+        mean, std, count = np.where(self.count > 0, self.mean, np.nan), self.std, self.count
+        band_count = np.zeros((len(ks), len(count)), dtype='i8') if band_count is None else band_count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                "ks": ks,
+                "count": count,
+                "mean": mean,
+                "std": std,
+                "pos_count": self.pos_count,
+                "neg_count": self.neg_count,
+                "pos_mean": self.pos_sum / self.pos_count,
+                "neg_mean": self.neg_sum / self.neg_count,
+                "pos_perc": self.pos_count / count * 100,
+                "neg_perc": self.neg_count / count * 100,
+                "lower": mean - ks[:, None] * std,
+                "upper": mean + ks[:, None] * std,
+                "band_count": band_count,
+                "band_perc": band_count / count,
+            }
+
+    def binned(self, j, ks=STD_LEVELS):
+        # Histogram of series j in the hist_util.bin_returns layout
+        start, _, size = self.bins[j]
+        mean = self.mean[j] * self.scale if self.count[j] else np.nan
+        return binned_result(self.hist[j], start, size, mean, self.std[j] * self.scale, ks)
+
+
+class IncrementalStats:
+    """
+    Per-bar accumulator of the close, high-low and open-close series for live
+    updates. Completed bars are folded into a Moments (O(1) per bar); the
+    still-forming last bar is kept apart so every tick can replace it.
+    """
+
+    def __init__(self, bins=None, scale=100):
+        self.done = Moments(len(SERIES), bins, scale)
+        self.last = None  # [ts, open, high, low, close] of the forming bar
+        self.prev_close = np.nan  # close of the bar before it
+        self.first_close = np.nan
+
+    @classmethod
+    def from_records(cls, records, bins=None, scale=100, chunk_rows=None):
+        # Seed from stored history, the last record becomes the forming bar
+        acc = cls(bins, scale)
+        if not len(records):
+            return acc
+        for prev, chunk in iter_chunks(records[:-1], chunk_rows):
+            acc.done.update(chunk_series(chunk, prev))
+        acc.first_close = float(records['Close'][0])
+        acc.prev_close = float(records['Close'][-2]) if len(records) > 1 else np.nan
+        acc.last = [int(records['ts'][-1])] + [float(records[col][-1]) for col in ('Open', 'High', 'Low', 'Close')]
+        return acc
+
+    @staticmethod
+    def _row(bar, prev_close):
+        _, open_, high, low, close = bar
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.array([[np.log(close / prev_close), high / low - 1, open_ / close - 1]])
+
+    def push(self, ts, open_, high, low, close):
+        """
+        Append a bar, or replace the forming one when ts is the same.
+        Bars older than the forming one are ignored. Returns whether anything changed.
+        """
+        bar = [int(ts), float(open_), float(high), float(low), float(close)]
+        if self.last is not None:
+            if bar[0] < self.last[0] or bar == self.last:
+                return False
+            if bar[0] > self.last[0]:
+                self.done.update(self._row(self.last, self.prev_close))
+                self.prev_close = self.last[4]
+        if np.isnan(self.first_close):
+            self.first_close = bar[4]
+        self.last = bar
+        return True
+
+    def moments(self):
+        # Completed bars plus the forming one
+        total = self.done.copy()
+        if self.last is not None:
+            total.update(self._row(self.last, self.prev_close))
+        return total
+
+    def cumulative(self):
+        return self.last[4] / self.first_close - 1 if self.last is not None else np.nan
+
+    def to_dict(self):
+        return {'done': self.done.to_dict(), 'last': self.last,
+                'prev_close': self.prev_close, 'first_close': self.first_close}
+
+    @classmethod
+    def from_dict(cls, state):
+        acc = cls()
+        acc.done = Moments.from_dict(state['done'])
+        acc.last, acc.prev_close, acc.first_close = state['last'], state['prev_close'], state['first_close']
+        return acc
+
+
+def band_counts(values, lower, upper):
+    # Values inside every [lower, upper] band, shape (n_bands, n_series)
+    x = np.asarray(values, dtype='f8')[:, None, :]
+    return ((x >= lower) & (x <= upper)).sum(axis=0)
+
+
+def stream_stats(records, bins=None, ks=STD_LEVELS, chunk_rows=None):
+    """
+    Statistics of the close, high-low and open-close series of the records
+    in two passes over chunks: moments and histograms first, then the
+    counts inside the σ bands they define.
+    """
+    moments = Moments(len(SERIES), bins)
+    for prev, chunk in iter_chunks(records, chunk_rows):
+        moments.update(chunk_series(chunk, prev))
+
+    stats = moments.stats(ks)
+    band_count = np.zeros_like(stats["band_count"])
+    for prev, chunk in iter_chunks(records, chunk_rows):
+        band_count += band_counts(chunk_series(chunk, prev), stats["lower"], stats["upper"])
+    return moments.stats(ks, band_count), moments
+
+
+def stream_volatility(records, symbol, interval, windows=ROLLING_WINDOWS, chunk_rows=None):
+    """
+    estimate_volatility over chunks: the full-sample values come from
+    mergeable term sums, the rolling ones from the tail that holds the
+    latest window of every length.
+    """
+    sums = None
+    chunk_rows = chunk_rows or config.STREAM_CHUNK_ROWS
+    for lo in range(0, len(records), chunk_rows):
+        # The chunk with the bar before it, one slice rather than a concatenated copy
+        bars = records[max(lo - 1, 0):lo + chunk_rows]
+        part = term_sums(estimator_terms(bars['Open'], bars['High'], bars['Low'], bars['Close']))
+        sums = part if sums is None else {name: sums[name] + part[name] for name in sums}
+
+    # A few spare bars cover ones dropped for missing prices
+    tail = records[-2 * max(windows):]
+    vols = estimate_volatility(tail, symbol, interval, windows)
+    full = full_volatility(sums, symbol, interval) if sums else {name: np.nan for name in vols}
+    for name in vols:
+        vols[name]["full"] = full[name]
+    return vols
+
+
+def stream_history(symbol, start, end, interval, bins, store_dir=None, chunk_rows=None):
+    """
+    Everything the FIND panels need for [start, end) of a stored history,
+    streamed from the memory-mapped store. Returns None when there are no bars.
+    """
+    records = read_range(symbol, start, end, interval, store_dir)
+    if not len(records):
+        return None
+
+    stats, moments = stream_stats(records, series_bins(bins), chunk_rows=chunk_rows)
+    return {
+        "stats": stats,
+        "binned": {name: moments.binned(j) for j, name in enumerate(SERIES)},
+        "vols": stream_volatility(records, symbol, interval, chunk_rows=chunk_rows),
+        "first_close": float(records['Close'][0]),
+        "last_close": float(records['Close'][-1]),
+    }
@@ -0,0 +1,20 @@
+from dash import html, dash_table
+from sketch_util import TAIL_COLUMNS
+
+# Tail statistics module
+
+def tail_output():
+    return html.Div(
+        html.Div([
+            html.H2(children='Percentiles, VaR and Expected Shortfall',
+                    style={'textAlign': 'center', 'fontSize':'18px', 'color': "#f9ec3eff", 'marginTop':'20px'}),
+            dash_table.DataTable(
+                id='tail-table',
+                columns=TAIL_COLUMNS,
+                data=[],
+                style_table={'marginTop': '1px'},
+                style_cell={'textAlign': 'center', 'padding': '8px','backgroundColor': "#20374c", 'color': "#FAF25A",'fontSize':'15px'},
+                style_header={'backgroundColor': "#0f2537", 'color': "#ff933b", 'fontWeight': 'bold'}
+            ),
+            ], style={'display':'flex', 'flexDirection':'column','alignItems':'center'})
+    )
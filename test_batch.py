@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+import batch
+from provider_util import SyntheticProvider
+from store_util import read_records, update_store
+
+
+class CountingProvider(SyntheticProvider):
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def _fetch_many(self, symbols, start, end, interval):
+        self.calls.append((tuple(symbols), start, end))
+        return super()._fetch_many(symbols, start, end, interval)
+
+
+def test_fetch_batch_fetches_only_the_gaps(tmp_path, monkeypatch):
+    store_dir = str(tmp_path)
+    provider = CountingProvider()
+    monkeypatch.setattr(batch, 'get_provider', lambda: provider)
+    for symbol in ('AAA', 'BBB'):
+        update_store(symbol, '2020-01-01', '2020-06-01', fetch=provider.fetch, store_dir=store_dir)
+    update_store('CCC', '2020-03-01', '2020-06-01', fetch=provider.fetch, store_dir=store_dir)
+    provider.calls.clear()
+
+    assert batch.fetch_batch(['AAA', 'BBB', 'CCC'], '2020-01-01', '2020-06-08', '1d', store_dir) == {}
+    # The shared tail gap is one request for all three, the head gap one for CCC
+    assert provider.calls == [
+        (('AAA', 'BBB', 'CCC'), pd.Timestamp('2020-06-01'), pd.Timestamp('2020-06-08')),
+        (('CCC',), pd.Timestamp('2020-01-01'), pd.Timestamp('2020-03-01')),
+    ]
+    for symbol in ('AAA', 'BBB', 'CCC'):
+        records = read_records(symbol, '1d', store_dir)
+        expected = provider.fetch(symbol, '2020-01-01', '2020-06-08', '1d')
+        np.testing.assert_array_equal(records['ts'], expected.index.as_unit('ns').asi8)
+        np.testing.assert_array_equal(records['Close'], expected['Close'].to_numpy())
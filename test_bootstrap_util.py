@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from bootstrap_util import (STATISTICS, bootstrap, point_stats, resample_indices, resample_stats,
+                            simulate_paths)
+from stats_util import return_stats
+
+
+@pytest.fixture(scope='module')
+def values():
+    rng = np.random.default_rng(0)
+    return np.stack([rng.standard_t(4, 600) * 0.01, np.abs(rng.normal(0, 0.01, 600)), rng.normal(0, 0.01, 600)], 1)
+
+
+@pytest.mark.parametrize('block', [None, 7])
+def test_resample_stats_match_gathered_resamples(values, block):
+    idx = resample_indices(np.random.default_rng(1), len(values), 50, block)
+    got = resample_stats(values, idx)
+    sample = values[idx]
+    mean, std = sample.mean(axis=1), sample.std(axis=1, ddof=1)
+    np.testing.assert_allclose(got['mean'], mean, rtol=1e-10)
+    np.testing.assert_allclose(got['std'], std, rtol=1e-8)
+    np.testing.assert_allclose(got['pos_perc'], (sample > 0).mean(axis=1) * 100)
+    for i, k in enumerate((1, 2, 3)):
+        inside = np.abs(sample - mean[:, None]) <= k * std[:, None]
+        np.testing.assert_allclose(got['band_perc'][i], inside.mean(axis=1), atol=1 / len(values))
+
+
+def test_block_indices_are_consecutive_runs():
+    idx = resample_indices(np.random.default_rng(2), 100, 5, block=10, length=35)
+    assert idx.shape == (5, 35)
+    assert idx.min() >= 0 and idx.max() < 100
+    runs = idx[:, :30].reshape(5, 3, 10)
+    assert (np.diff(runs, axis=2) == 1).all()
+
+
+def test_point_stats_are_the_sample_statistics(values):
+    point = point_stats(values)
+    ref = return_stats(values)
+    np.testing.assert_allclose(point['mean'][0], ref['mean'])
+    np.testing.assert_allclose(point['std'][0], ref['std'])
+    np.testing.assert_allclose(point['band_perc'][:, 0], ref['band_perc'])
+
+
+def test_bootstrap_is_independent_of_chunking_and_workers(values):
+    one = bootstrap(values, 300, seed=4)
+    small = bootstrap(values, 300, seed=4, chunk_bytes=40 * len(values) * 64)
+    pooled = bootstrap(values, 300, seed=4, chunk_bytes=40 * len(values) * 7, workers=2)
+    for name in STATISTICS:
+        assert one[name].shape[-2] == 300
+        np.testing.assert_allclose(small[name], one[name], rtol=1e-12)
+        np.testing.assert_allclose(pooled[name], one[name], rtol=1e-12)
+    # The spread of the bootstrap means is close to the standard error of the mean
+    se = values.std(axis=0, ddof=1) / np.sqrt(len(values))
+    np.testing.assert_allclose(one['mean'].std(axis=0), se, rtol=0.15)
+
+
+def test_simulated_paths(values):
+    paths = simulate_paths(values[:, 0], 21, 2000, seed=3)
+    assert paths.shape == (2000, 21)
+    assert np.isin(paths[:, 0], values[:, 0]).all()
+    np.testing.assert_allclose(np.diff(paths, axis=1).std(), values[:, 0].std(), rtol=0.1)
+    again = simulate_paths(values[:, 0], 21, 2000, seed=3, chunk_bytes=16 * 21 * 300)
+    np.testing.assert_array_equal(paths, again)
+
+
+@pytest.mark.parametrize('method, block', [('empirical', 5), ('normal', None)])
+def test_simulated_paths_are_independent_of_chunking(values, method, block):
+    paths = simulate_paths(values[:, 0], 10, 500, method=method, block=block, seed=8)
+    again = simulate_paths(values[:, 0], 10, 500, method=method, block=block, seed=8, chunk_bytes=16 * 10 * 37)
+    np.testing.assert_array_equal(paths, again)
+    if method == 'normal':
+        np.testing.assert_allclose(np.diff(paths, axis=1).std(), values[:, 0].std(), rtol=0.1)
@@ -0,0 +1,57 @@
+import fcntl
+import os
+import threading
+import time
+
+import metrics_util
+from flight_util import SingleFlight
+
+
+def coalesced(scope):
+    metrics_util.flush()
+    return metrics_util._cache().get(('counter', 'vol_app_coalesced_total', (('scope', scope),)), 0)
+
+
+def test_threads_share_one_call_and_are_counted():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait()
+        return 'done'
+
+    before = coalesced('thread')
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', fn))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while coalesced('thread') - before < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ['done'] * 4
+    assert coalesced('thread') - before == 3
+
+
+def test_waiting_on_another_workers_lock_is_counted(tmp_path):
+    lock_path = str(tmp_path / '.locks' / 'SPY.lock')
+    os.makedirs(os.path.dirname(lock_path))
+    # A separate open file stands in for the lock held by another worker
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    before = coalesced('worker')
+    result = []
+    thread = threading.Thread(target=lambda: result.append(SingleFlight().do('key', lambda: 1, lock_path)))
+    thread.start()
+    while coalesced('worker') == before:
+        time.sleep(0.01)
+    assert not result
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+    thread.join()
+    assert result == [1]
+    assert coalesced('worker') - before == 1
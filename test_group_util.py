@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import config
+from group_util import MONTHS, WEEKDAYS, expanding_rank, group_codes, grouped_stats, trailing_volatility
+from hist_util import bin_counts, grouped_bin_counts
+from ohlcv_util import OHLCV
+from provider_util import synthetic_ohlcv
+from stats_util import return_stats
+from stream_util import chunk_series
+
+
+@pytest.fixture(scope='module')
+def data():
+    return OHLCV.from_frame(synthetic_ohlcv(3000, freq='1D', seed=11))
+
+
+@pytest.mark.parametrize('by', ['weekday', 'month', 'regime'])
+def test_grouped_stats_match_filtered_subsets(data, by):
+    values = chunk_series(data)
+    codes, labels = group_codes(data.ts, values[:, 0], by)
+    stats = grouped_stats(values, codes, len(labels))
+    for g in range(len(labels)):
+        subset = values[codes == g]
+        if not len(subset):
+            assert (stats["count"][g] == 0).all()
+            continue
+        ref = return_stats(subset)
+        for name in ("count", "pos_count", "neg_count", "band_count"):
+            got = stats[name][:, g] if name == "band_count" else stats[name][g]
+            np.testing.assert_array_equal(got, ref[name], err_msg=f"{by} {labels[g]} {name}")
+        for name in ("mean", "std", "pos_mean", "neg_mean"):
+            np.testing.assert_allclose(stats[name][g], ref[name], rtol=1e-10, err_msg=f"{by} {labels[g]} {name}")
+
+
+def test_calendar_codes(data):
+    index = data.index
+    codes, labels = group_codes(data.ts, np.zeros(len(data)), 'weekday')
+    assert [labels[c] for c in codes[:10]] == [WEEKDAYS[d] for d in index.dayofweek[:10]]
+    codes, labels = group_codes(data.ts, np.zeros(len(data)), 'month')
+    np.testing.assert_array_equal(codes, index.month - 1)
+    assert labels == MONTHS
+
+
+def test_trailing_volatility_excludes_the_bar_itself():
+    x = np.random.default_rng(2).normal(0, 0.01, 100)
+    vol = trailing_volatility(x, window=10)
+    assert np.isnan(vol[:10]).all()
+    assert vol[10] == pytest.approx(x[:10].std(ddof=1))
+    assert vol[57] == pytest.approx(x[47:57].std(ddof=1))
+
+
+def test_expanding_rank_matches_brute_force():
+    x = np.round(np.random.default_rng(4).normal(size=1500), 1)
+    np.testing.assert_allclose(expanding_rank(x), [(x[:i + 1] <= x[i]).mean() for i in range(len(x))])
+
+
+def test_regimes_use_no_later_data(data):
+    close_returns = chunk_series(data)[:, 0]
+    codes, _ = group_codes(data.ts, close_returns, 'regime')
+    for end in (500, 1500):
+        prefix, _ = group_codes(data.ts[:end], close_returns[:end], 'regime')
+        np.testing.assert_array_equal(prefix, codes[:end])
+    known = np.flatnonzero(codes >= 0)
+    # Bars are classified once REGIME_WINDOW trailing volatilities exist
+    first_vol = np.flatnonzero(~np.isnan(trailing_volatility(close_returns)))[0]
+    assert known[0] == first_vol + config.REGIME_WINDOW - 1
+    assert set(codes[known]) == {0, 1, 2}
+
+
+def test_grouped_bin_counts_match_per_group_bins(data):
+    values = chunk_series(data)[1:, 0] * 100
+    codes, labels = group_codes(data.ts[1:], values, 'weekday')
+    counts = grouped_bin_counts(values, codes, len(labels), -12, 12, 0.5)
+    for g in range(len(labels)):
+        np.testing.assert_array_equal(counts[g], bin_counts(values[codes == g], -12, 12, 0.5))
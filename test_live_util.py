@@ -0,0 +1,82 @@
+import diskcache
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import live_util
+from hist_util import bin_counts, hist_bins
+from ohlcv_util import OHLCV
+from provider_util import get_provider, synthetic_ohlcv
+from stats_util import return_stats
+from stream_util import IncrementalStats, chunk_series, series_bins
+
+BARS = ('ts', 'Open', 'High', 'Low', 'Close')
+
+
+@pytest.fixture(scope='module')
+def records():
+    return OHLCV.from_frame(synthetic_ohlcv(2000, freq='1h', seed=5))
+
+
+def check_against_batch(acc, records, bins):
+    moments = acc.moments()
+    values = chunk_series(records)
+    ref = return_stats(values)
+    stats = moments.stats()
+    for name in ("count", "pos_count", "neg_count"):
+        np.testing.assert_array_equal(stats[name], ref[name], err_msg=name)
+    for name in ("mean", "std", "pos_mean", "neg_mean"):
+        np.testing.assert_allclose(stats[name], ref[name], rtol=1e-10, err_msg=name)
+    for j, (start, end, size) in enumerate(bins):
+        x = values[:, j]
+        np.testing.assert_array_equal(moments.hist[j], bin_counts(x[~np.isnan(x)] * 100, start, end, size))
+    assert acc.cumulative() == pytest.approx(records['Close'][-1] / records['Close'][0] - 1)
+
+
+@pytest.mark.parametrize('seed_rows', [1, 500, 2000])
+def test_pushed_bars_match_batch_statistics(records, seed_rows):
+    bins = series_bins(hist_bins('1h'))
+    acc = IncrementalStats.from_records(records[:seed_rows], bins)
+    for bar in zip(*(records[col][seed_rows:] for col in BARS)):
+        acc.push(*bar)
+    check_against_batch(acc, records, bins)
+    acc = IncrementalStats.from_dict(acc.to_dict())
+    check_against_batch(acc, records, bins)
+
+
+def test_forming_bar_is_replaced(records):
+    bins = series_bins(hist_bins('1h'))
+    acc = IncrementalStats.from_records(records[:-1], bins)
+    ts, open_, high, low, close = (records[col][-1] for col in BARS)
+    # Earlier states of the last bar, then its final values
+    acc.push(ts, open_, open_, open_, open_)
+    acc.push(ts, open_, high, low, (open_ + close) / 2)
+    assert not acc.push(records.ts[-2], 1.0, 1.0, 1.0, 1.0)
+    acc.push(ts, open_, high, low, close)
+    check_against_batch(acc, records, bins)
+
+
+def test_refresh_fetches_once_per_period(tmp_path, monkeypatch):
+    cache = diskcache.Cache(str(tmp_path / 'jobs'))
+    monkeypatch.setattr(config, 'STORE_DIR', str(tmp_path / 'store'))
+    monkeypatch.setattr(config, 'LIVE_INTERVAL_MS', 60_000)
+    provider = get_provider()
+    calls = []
+    fetch = provider.fetch
+    monkeypatch.setattr(provider, 'fetch', lambda *args, **kw: calls.append(args) or fetch(*args, **kw))
+
+    start = (pd.Timestamp.now() - pd.Timedelta(days=10)).normalize()
+    bins = hist_bins('1h')
+    acc, error = live_util.live_stats(cache, 'SPY', start, '1h', bins)
+    assert acc is None and error is None
+    live_util.refresh(cache, 'SPY', start, '1h', bins)
+    seeded = len(calls)
+    # Fresh for the whole period: readers and further refreshes fetch nothing
+    for _ in range(3):
+        live_util.refresh(cache, 'SPY', start, '1h', bins)
+    assert len(calls) == seeded
+    state = cache.get(live_util.live_key('SPY', '1h', start))
+    cache.set(live_util.live_key('SPY', '1h', start), dict(state, refreshed_at=0))
+    live_util.refresh(cache, 'SPY', start, '1h', bins)
+    assert len(calls) == seeded + 1
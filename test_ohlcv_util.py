@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+
+from ohlcv_util import OHLCV
+from provider_util import synthetic_ohlcv
+
+
+def test_frame_round_trip():
+    df = synthetic_ohlcv(500, freq='1h', seed=3)
+    df.index = df.index.as_unit('ns')  # the container keeps epoch nanoseconds
+    pd.testing.assert_frame_equal(OHLCV.from_frame(df).to_frame(), df, check_freq=False)
+
+
+def test_to_frame_copies_the_readonly_columns():
+    data = OHLCV.from_frame(synthetic_ohlcv(10, seed=1))
+    frame = data.to_frame()
+    frame['Close'] *= 2
+    np.testing.assert_array_equal(frame['Close'].to_numpy(), 2 * data['Close'])
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from ohlcv_util import OHLCV
+from provider_util import synthetic_ohlcv
+from range_util import PrefixIndex
+from stats_util import return_stats
+from stream_util import chunk_series
+
+
+@pytest.fixture(scope='module')
+def data():
+    return OHLCV.from_frame(synthetic_ohlcv(3000, freq='1D'))
+
+
+@pytest.mark.parametrize('lo, hi', [(0, 3000), (0, 1), (1, 2), (250, 1750), (2990, 3000), (10, 10)])
+def test_window_matches_direct_stats(data, lo, hi):
+    index = PrefixIndex.from_records(data)
+    got = index.query_positions(lo, hi)
+    window = data[lo:hi]
+    ref = return_stats(chunk_series(window)) if hi > lo else None
+    if ref is None:
+        assert got["count"].tolist() == [0, 0, 0]
+        return
+    for name in ("count", "pos_count", "neg_count"):
+        np.testing.assert_array_equal(got[name], ref[name])
+    for name in ("mean", "std", "pos_mean", "neg_mean"):
+        np.testing.assert_allclose(got[name], ref[name], rtol=1e-9, equal_nan=True)
+    assert got["cumulative"] == pytest.approx(window['Close'][-1] / window['Close'][0] - 1)
+
+
+def test_positions_follow_timestamps(data):
+    index = PrefixIndex.from_records(data)
+    assert index.positions(int(data.ts[5]), int(data.ts[20])) == (5, 20)
+    assert index.positions(int(data.ts[5]) + 1, int(data.ts[-1]) + 1) == (6, len(data))
+
+
+def test_low_variance_window_keeps_precision():
+    # Prices far from the mean level with tiny moves: plain sums of squares would cancel
+    n = 5000
+    rng = np.random.default_rng(3)
+    close = 1e4 * np.exp(np.cumsum(rng.normal(0, 1e-7, n)))
+    high, low = close * (1 + 1e-3 + rng.uniform(0, 1e-8, n)), close
+    index = PrefixIndex(np.arange(n), close, high, low, close)
+    got = index.query_positions(1000, 4000)
+    h_l = high[1000:4000] / low[1000:4000] - 1
+    assert got["std"][1] == pytest.approx(h_l.std(ddof=1), rel=1e-6)
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ohlcv_util import OHLCV
+from provider_util import SyntheticProvider
+from sketch_util import SketchStore, TDigest, tail_table, window_sketches
+from store_util import read_meta, read_range, read_records, update_store, write_records
+from stream_util import chunk_series
+
+QUANTILES = np.array([0.001, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 0.999])
+
+
+def rank_error(values, estimates, q):
+    # Distance in rank (as a fraction of n) between the estimates and the exact quantiles
+    srt = np.sort(values)
+    return np.abs(np.searchsorted(srt, estimates) / len(srt) - q)
+
+
+@pytest.fixture(scope='module')
+def values():
+    return np.random.default_rng(0).standard_t(3, 200_000) * 0.01
+
+
+def test_small_digests_are_exact(values):
+    digest = TDigest().update(values[:1000])
+    assert digest.is_exact
+    np.testing.assert_array_equal(digest.quantile(QUANTILES), np.percentile(values[:1000], QUANTILES * 100))
+    tail = np.sort(values[:1000])
+    assert digest.tail_mean(0.05) == pytest.approx(tail[tail <= np.percentile(tail, 5)].mean())
+
+
+def test_rank_error_is_small_in_the_tails(values):
+    digest = TDigest(compression=1000, exact=0).update(values)
+    assert len(digest.means) < 5000
+    err = rank_error(values, digest.quantile(QUANTILES), QUANTILES)
+    # Relative to the tail size the error stays small at the extremes
+    assert (err <= np.maximum(0.002, 0.05 * np.minimum(QUANTILES, 1 - QUANTILES))).all(), err
+
+
+def test_merged_digests_match_one_digest(values):
+    parts = [TDigest(compression=1000, exact=0).update(part) for part in np.array_split(values, 24)]
+    merged = TDigest(compression=1000, exact=0)
+    for part in parts:
+        merged.merge(TDigest.from_dict(part.to_dict()))
+    assert merged.count == len(values)
+    err = rank_error(values, merged.quantile(QUANTILES), QUANTILES)
+    assert (err <= np.maximum(0.002, 0.05 * np.minimum(QUANTILES, 1 - QUANTILES))).all(), err
+    assert merged.tail_mean(0.01) == pytest.approx(np.sort(values)[:len(values) // 100].mean(), rel=0.02)
+
+
+def test_window_uses_stored_months_until_bars_change(tmp_path):
+    store_dir, store = str(tmp_path / 'store'), SketchStore(str(tmp_path / 'sketches.sqlite'))
+    update_store('SPY', '2019-01-01', '2021-01-01', fetch=SyntheticProvider().fetch, store_dir=store_dir)
+    window = ('SPY', '2019-01-15', '2020-11-20', '1d', store_dir)
+    direct = chunk_series(read_range(*window[:3], '1d', store_dir))
+    for _ in range(2):
+        digests = window_sketches(*window, store=store)
+        for j, digest in enumerate(digests):
+            x = direct[:, j]
+            np.testing.assert_allclose(digest.quantile(QUANTILES), np.percentile(x[~np.isnan(x)], QUANTILES * 100))
+    assert len(store.periods('SPY', '1d')) == 21
+
+    # Rewriting one high of a stored month must not serve its old digest
+    stored = store.periods('SPY', '1d')
+    fingerprint, value = stored['2020-03']
+    store.put('SPY', '1d', '2020-03', fingerprint, [TDigest().update([9.0])] * 3)
+    assert window_sketches(*window, store=store)[1].max == 9.0
+    records = read_records('SPY', '1d', store_dir)
+    high = np.array(records['High'])
+    high[np.searchsorted(records.ts, pd.Timestamp('2020-03-10').value)] *= 1.5
+    columns = {col: records[col] for col in records.columns}
+    write_records('SPY', '1d', OHLCV(records.ts, dict(columns, High=high)), read_meta('SPY', '1d', store_dir), store_dir)
+    assert window_sketches(*window, store=store)[1].max < 9.0
+
+
+def test_open_close_losses_are_its_upper_tail(values):
+    # 10 of 100 bars close 10% below their open: Open / Close - 1 = 0.1111 is a loss
+    noise = np.random.default_rng(1).normal(0, 0.001, 90)
+    loss = 1 / 0.9 - 1
+    o_c = np.concatenate([noise, np.full(10, loss)])
+    close = np.concatenate([noise, np.full(10, -0.1)])
+    h_l = np.abs(noise).tolist() + [0.1] * 10
+    close_row, _, o_c_row = tail_table([TDigest().update(close), TDigest().update(h_l), TDigest().update(o_c)])
+    assert close_row["VaR 95%"] == close_row["ES 99%"] == "10.00%"
+    assert o_c_row["VaR 95%"] == o_c_row["ES 99%"] == f"{loss:.2%}"
+    # Negating a compressed digest mirrors its upper tail
+    upper = TDigest().update(values).negated()
+    assert upper.tail_mean(0.01) == pytest.approx(-np.sort(values)[-len(values) // 100:].mean(), rel=0.02)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from stats_util import return_stats
+
+
+def naive_stats(x, ks=(1, 2, 3)):
+    # Straightforward per-series reference with boolean masks
+    x = x[~np.isnan(x)]
+    mean, std = x.mean(), x.std(ddof=1)
+    return {
+        "count": len(x),
+        "mean": mean,
+        "std": std,
+        "pos_count": (x > 0).sum(),
+        "neg_count": (x < 0).sum(),
+        "pos_mean": x[x > 0].mean() if (x > 0).any() else np.nan,
+        "neg_mean": x[x < 0].mean() if (x < 0).any() else np.nan,
+        "band_count": [((x >= mean - k * std) & (x <= mean + k * std)).sum() for k in ks],
+    }
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    x = np.stack([rng.standard_t(4, 2000) * 0.01, np.abs(rng.normal(0, 0.01, 2000)), rng.normal(0, 0.01, 2000)], 1)
+    x[0, 0] = np.nan
+    x[rng.integers(0, 2000, 50), 2] = np.nan
+    x[:20, 1] = 0.0
+    return x
+
+
+def test_return_stats_matches_reference(values):
+    stats = return_stats(values)
+    for j in range(values.shape[1]):
+        ref = naive_stats(values[:, j])
+        for name, expected in ref.items():
+            got = stats[name][:, j] if name == "band_count" else stats[name][j]
+            np.testing.assert_allclose(got, expected, rtol=1e-12, err_msg=f"{name}[{j}]")
+        assert stats["pos_perc"][j] == pytest.approx(ref["pos_count"] / ref["count"] * 100)
+
+
+def test_return_stats_one_series_and_empty():
+    x = np.array([0.01, -0.02, np.nan, 0.03])
+    stats = return_stats(x)
+    assert stats["count"].tolist() == [3]
+    assert stats["mean"][0] == pytest.approx(np.nanmean(x))
+    empty = return_stats(np.full(3, np.nan))
+    assert empty["count"].tolist() == [0]
+    assert np.isnan(empty["mean"][0]) and np.isnan(empty["std"][0])
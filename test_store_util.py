@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from provider_util import SyntheticProvider
+from store_util import missing_ranges, read_meta, read_records, update_store
+
+DAY = pd.Timedelta(days=1).value
+
+
+def ns(value):
+    return pd.Timestamp(value).value
+
+
+class CountingFetch:
+
+    def __init__(self):
+        self.provider = SyntheticProvider()
+        self.calls = []
+
+    def __call__(self, symbol, start, end, interval):
+        self.calls.append((pd.Timestamp(start), pd.Timestamp(end)))
+        return self.provider.fetch(symbol, start, end, interval)
+
+
+def test_missing_ranges_without_store():
+    assert missing_ranges(None, None, 1, 2, '1d') == [(1, 2)]
+
+
+def test_missing_ranges_head_and_tail():
+    meta = {'start': ns('2020-02-01'), 'end': ns('2020-03-01'), 'fetched_at': time.time()}
+    ts = np.arange(ns('2020-02-03'), ns('2020-02-28'), DAY)
+    records = {'ts': ts}
+    assert missing_ranges(meta, records, ns('2020-02-05'), ns('2020-02-20'), '1d') == []
+    assert missing_ranges(meta, records, ns('2020-01-01'), ns('2020-02-20'), '1d') == [
+        (ns('2020-01-01'), meta['start'])]
+    assert missing_ranges(meta, records, ns('2020-02-05'), ns('2020-04-01'), '1d') == [
+        (meta['end'], ns('2020-04-01'))]
+
+
+def test_missing_ranges_refetches_stale_forming_bar():
+    last = ns('2020-02-28')
+    fetched_at = (last + DAY // 2) / 1e9  # fetched while the last bar was forming
+    meta = {'start': ns('2020-02-01'), 'end': last + DAY, 'fetched_at': fetched_at}
+    records = {'ts': np.array([last - DAY, last])}
+    end = last + DAY
+    # Fresh: nothing to do; stale: the forming bar is fetched again
+    assert missing_ranges(meta, records, ns('2020-02-01'), end, '1d', now=fetched_at + 60) == []
+    assert missing_ranges(meta, records, ns('2020-02-01'), end, '1d', now=fetched_at + 3600) == [(last, end)]
+
+
+def test_update_store_fetches_only_missing_ranges_and_merges(tmp_path):
+    fetch = CountingFetch()
+    update_store('SPY', '2020-03-01', '2020-06-01', fetch=fetch, store_dir=str(tmp_path))
+    update_store('SPY', '2020-01-01', '2020-07-01', fetch=fetch, store_dir=str(tmp_path))
+    assert fetch.calls[1:] == [(pd.Timestamp('2020-01-01'), pd.Timestamp('2020-03-01')),
+                               (pd.Timestamp('2020-06-01'), pd.Timestamp('2020-07-01'))]
+    records = read_records('SPY', '1d', str(tmp_path))
+    expected = SyntheticProvider().fetch('SPY', '2020-01-01', '2020-07-01')
+    np.testing.assert_array_equal(records.ts, expected.index.as_unit('ns').asi8)
+    for col in ('Open', 'High', 'Low', 'Close', 'Volume'):
+        np.testing.assert_array_equal(records[col], expected[col].to_numpy())
+        assert records[col].flags.c_contiguous
+    meta = read_meta('SPY', '1d', str(tmp_path))
+    assert (meta['start'], meta['end']) == (ns('2020-01-01'), ns('2020-07-01'))
+
+    # Covered now: no further fetch
+    update_store('SPY', '2020-02-01', '2020-05-01', fetch=fetch, store_dir=str(tmp_path))
+    assert len(fetch.calls) == 3
+
+
+def test_update_store_remembers_empty_ranges(tmp_path):
+    fetch = CountingFetch()
+    update_store('SPY', '2020-01-06', '2020-01-11', fetch=fetch, store_dir=str(tmp_path))
+    # A weekend tail has no bars, but once asked it counts as covered
+    update_store('SPY', '2020-01-06', '2020-01-13', fetch=fetch, store_dir=str(tmp_path))
+    update_store('SPY', '2020-01-06', '2020-01-13', fetch=fetch, store_dir=str(tmp_path))
+    assert len(fetch.calls) == 2
+    assert read_meta('SPY', '1d', str(tmp_path))['end'] == ns('2020-01-13')
+
+
+def test_update_store_covers_a_future_end_only_up_to_now(tmp_path):
+    end = pd.Timestamp.now().normalize() + pd.Timedelta(days=30)
+    update_store('SPY', end - pd.Timedelta(days=60), end, fetch=CountingFetch(), store_dir=str(tmp_path))
+    assert read_meta('SPY', '1d', str(tmp_path))['end'] <= time.time_ns()
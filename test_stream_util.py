@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from estimator_util import estimate_volatility
+from hist_util import bin_counts, hist_bins
+from ohlcv_util import OHLCV
+from provider_util import synthetic_ohlcv
+from stats_util import return_stats
+from stream_util import Moments, SERIES, chunk_series, series_bins, stream_stats, stream_volatility
+
+
+@pytest.fixture(scope='module')
+def records():
+    return OHLCV.from_frame(synthetic_ohlcv(5000, freq='1D', seed=7))
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 97, 1000, 10_000])
+def test_stream_stats_match_in_memory(records, chunk_rows):
+    bins = series_bins(hist_bins('1d'))
+    stats, moments = stream_stats(records, bins, chunk_rows=chunk_rows)
+    values = chunk_series(records)
+    ref = return_stats(values)
+    for name in ("count", "pos_count", "neg_count", "band_count"):
+        np.testing.assert_array_equal(stats[name], ref[name], err_msg=name)
+    for name in ("mean", "std", "pos_mean", "neg_mean", "lower", "upper"):
+        np.testing.assert_allclose(stats[name], ref[name], rtol=1e-10, err_msg=name)
+    for j, (start, end, size) in enumerate(bins):
+        x = values[:, j]
+        np.testing.assert_array_equal(moments.hist[j], bin_counts(x[~np.isnan(x)] * 100, start, end, size))
+
+
+def test_moments_merge_in_any_order(records):
+    values = chunk_series(records)
+    parts = [Moments.from_values(part) for part in np.array_split(values, 7)]
+    forward, backward = Moments(len(SERIES)), Moments(len(SERIES))
+    for part in parts:
+        forward.merge(part)
+    for part in reversed(parts):
+        backward.merge(part)
+    whole = Moments.from_values(values)
+    for m in (forward, backward, Moments.from_dict(forward.to_dict())):
+        np.testing.assert_array_equal(m.count, whole.count)
+        np.testing.assert_allclose(m.mean, whole.mean, rtol=1e-12)
+        np.testing.assert_allclose(m.std, whole.std, rtol=1e-10)
+
+
+def test_empty_moments_have_nan_std():
+    assert np.isnan(Moments(3).std).all()
+
+
+@pytest.mark.parametrize('chunk_rows', [100, 10_000])
+def test_stream_volatility_matches_in_memory(records, chunk_rows):
+    got = stream_volatility(records, 'SPY', '1d', chunk_rows=chunk_rows)
+    ref = estimate_volatility(records, 'SPY', '1d')
+    for name, vols in ref.items():
+        assert got[name]["full"] == pytest.approx(vols["full"], rel=1e-10)
+        for w, rolling in vols["rolling"].items():
+            assert got[name]["rolling"][w][-1] == pytest.approx(rolling[-1], rel=1e-10)
@@ -0,0 +1,27 @@
+from dash import Dash, html, dcc, Input, Output, State, dash_table, no_update
+from estimator_util import ROLLING_WINDOWS
+
+# Volatility Estimators module
+
+def estimator_columns(interval='1d'):
+    # Rolling windows count bars, which are days only for daily data
+    unit = 'Day' if interval == '1d' else 'Bar'
+    return ([{"name": "", "id": "Label"}, {"name": "Full Period", "id": "Full"}]
+            + [{"name": f"{w}-{unit} Rolling", "id": f"{w}"} for w in ROLLING_WINDOWS])
+
+
+def volatility_estimator_output():
+    return html.Div(
+        html.Div([
+            html.H2(children='Annualized Volatility Estimators',
+                    style={'textAlign': 'center', 'fontSize':'18px', 'color': "#f9ec3eff", 'marginTop':'20px'}),
+            dash_table.DataTable(
+                id='vol-estimator-table',
+                columns=estimator_columns(),
+                data=[],
+                style_table={'marginTop': '1px'},
+                style_cell={'textAlign': 'center', 'padding': '8px','backgroundColor': "#20374c", 'color': "#FAF25A",'fontSize':'15px'},
+                style_header={'backgroundColor': "#0f2537", 'color': "#ff933b", 'fontWeight': 'bold'}
+            ),
+            ], style={'display':'flex', 'flexDirection':'column','alignItems':'center'})
+    )